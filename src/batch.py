@@ -0,0 +1,205 @@
+"""
+Knolling Adventures - Headless Batch Runner
+Runs many books through Agent Omega without Telegram (e.g. a whole catalogue overnight).
+
+Input is JSONL, one job per line:
+    "Firefighter"
+    {"id": "fire-01", "theme": "Firefighter"}
+    {"id": "fire-02", "theme": "Firefighter", "bible_version": "5.22"}
+    {"id": "fire-01", "resume_run_id": "ab12cd34"}
+Blank lines and lines starting with # are ignored.
+
+Every finished job is appended to the output JSONL immediately. Re-running with
+the same output file skips jobs whose id already succeeded and resumes failed
+jobs from their run manifest (run_id of the failed row), so an interrupted
+batch can simply be started again.
+
+Usage:
+    python src/batch.py themes.jsonl [-o results.jsonl] [--jobs N]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+
+# Add project root to sys.path to allow 'from src...' imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src import config
+from src.modules.scheduler import JobScheduler, PRIORITY_LOW
+from src.modules.bible_store import available_versions
+from src.modules.job_manifest import JobManifest
+
+logger = logging.getLogger("BatchRunner")
+
+BATCH_USER_ID = "batch"
+
+
+def read_jobs(path):
+    """
+    Parses the input JSONL into job dicts: {"id", "theme", "resume_run_id", "bible_version"}.
+    Raises ValueError on a malformed line (before any API budget is spent).
+    """
+    jobs = []
+    with open(path, "r") as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                spec = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}:{line_no}: invalid JSON ({e})")
+
+            if isinstance(spec, str):
+                spec = {"theme": spec}
+            if not isinstance(spec, dict) or not (spec.get("theme") or spec.get("resume_run_id")):
+                raise ValueError(f"{path}:{line_no}: expected a theme string or an object with 'theme' or 'resume_run_id'")
+
+            bible_version = spec.get("bible_version")
+            if bible_version and bible_version not in available_versions():
+                raise ValueError(f"{path}:{line_no}: unknown bible_version {bible_version} (have {available_versions()})")
+
+            jobs.append({
+                "id": str(spec.get("id") or f"line-{line_no}"),
+                "theme": spec.get("theme"),
+                "resume_run_id": spec.get("resume_run_id"),
+                "bible_version": bible_version
+            })
+
+    ids = [job["id"] for job in jobs]
+    duplicates = sorted({job_id for job_id in ids if ids.count(job_id) > 1})
+    if duplicates:
+        raise ValueError(f"{path}: duplicate job ids {duplicates}")
+    return jobs
+
+
+def previous_results(path):
+    """Latest result per job id from a previous run (read from the output JSONL)."""
+    latest = {}
+    if not os.path.exists(path):
+        return latest
+    with open(path, "r") as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                continue # Torn last line of an interrupted run
+            latest[result.get("id")] = result
+    return latest
+
+
+def resume_failed(job, previous):
+    """
+    The job to run again after a failed attempt: resumed from the failed run's manifest
+    when the row recorded a run_id whose manifest still exists, otherwise unchanged.
+    """
+    run_id = (previous or {}).get("run_id")
+    if job["resume_run_id"] or not run_id:
+        return job
+    try:
+        if not os.path.exists(JobManifest.path_for(run_id)):
+            return job
+    except ValueError:
+        return job
+    logger.info(f"Resuming failed job {job['id']} from run {run_id}.")
+    return {**job, "resume_run_id": run_id}
+
+
+async def run_batch(orchestrator, jobs, output_path, max_jobs=None):
+    """
+    Runs jobs through a JobScheduler (shared page budget, caches and rate limits)
+    and appends one result line per job to output_path as soon as it finishes.
+    Returns the list of results written by this run.
+    """
+    max_jobs = max_jobs or config.MAX_CONCURRENT_JOBS
+    # One client owns the whole scheduler, so the per-user cap is the job cap
+    scheduler = JobScheduler(orchestrator, max_running=max_jobs, max_per_user=max_jobs)
+
+    previous = previous_results(output_path)
+    done = {job_id for job_id, result in previous.items() if result.get("status") == "SUCCESS"}
+    pending = [resume_failed(job, previous.get(job["id"])) for job in jobs if job["id"] not in done]
+    if len(pending) < len(jobs):
+        logger.info(f"Skipping {len(jobs) - len(pending)} jobs already completed in {output_path}.")
+    logger.info(f"Batch: {len(pending)} jobs, {max_jobs} at a time.")
+
+    # Only keep as many jobs submitted as can run, so the queue never overflows
+    window = asyncio.Semaphore(max_jobs)
+    results = []
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    with open(output_path, "a") as out:
+        async def run_one(job):
+            async with window:
+                started = time.monotonic()
+                result = {"id": job["id"], "theme": job["theme"]}
+                try:
+                    outcome = await scheduler.submit(
+                        BATCH_USER_ID, job["theme"], priority=PRIORITY_LOW,
+                        resume_run_id=job["resume_run_id"], bible_version=job["bible_version"]
+                    )
+                    result.update({
+                        "status": outcome["status"],
+                        "run_id": outcome.get("run_id"),
+                        "pdf_path": outcome.get("pdf_path")
+                    })
+                except Exception as e:
+                    logger.error(f"Batch job {job['id']} failed: {e}")
+                    # run_id is attached by AgentOmega.start_job once the run has a manifest
+                    result.update({"status": "FAILED", "run_id": getattr(e, "run_id", None), "error": str(e)})
+                result["elapsed_sec"] = round(time.monotonic() - started, 1)
+
+            # Stream the result right away so a crash never loses finished work
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+            results.append(result)
+            logger.info(f"Batch progress: {len(results)}/{len(pending)} ({job['id']}: {result['status']})")
+
+        await asyncio.gather(*(run_one(job) for job in pending))
+
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate many Knolling Adventure books from a JSONL file.")
+    parser.add_argument("input", help="JSONL file with one theme or job spec per line")
+    parser.add_argument("-o", "--output", help="Results JSONL (default: <input>.results.jsonl)")
+    parser.add_argument("--jobs", type=int, default=None,
+                        help=f"Books generated at the same time (default: MAX_CONCURRENT_JOBS={config.MAX_CONCURRENT_JOBS})")
+    args = parser.parse_args(argv)
+
+    os.makedirs("logs", exist_ok=True)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler("logs/batch.log"),
+            logging.StreamHandler()
+        ]
+    )
+
+    output_path = args.output or f"{os.path.splitext(args.input)[0]}.results.jsonl"
+    try:
+        jobs = read_jobs(args.input)
+    except (OSError, ValueError) as e:
+        logger.error(f"Cannot read batch input: {e}")
+        return 2
+
+    # Imported late so --help works without API credentials
+    from src.modules.orchestrator import AgentOmega
+    omega = AgentOmega()
+    results = asyncio.run(run_batch(omega, jobs, output_path, args.jobs))
+
+    failed = [r for r in results if r["status"] != "SUCCESS"]
+    logger.info(f"Batch finished: {len(results) - len(failed)} succeeded, {len(failed)} failed. Results: {output_path}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
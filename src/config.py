@@ -4,6 +4,7 @@ Handles dynamic rate limiting based on deployment tier.
 """
 
 import os
+import json
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -25,6 +26,15 @@ try:
 except ValueError:
     pass
 
+# Page Pipeline Concurrency (Pages in flight through Agent Charlie & Delta)
+# FREE tier defaults to serial processing; the per-call delays make overlap pointless.
+PIPELINE_CONCURRENCY = 4 if DEPLOYMENT_TIER == "PAID" else 1
+try:
+    if os.getenv("PIPELINE_CONCURRENCY"):
+        PIPELINE_CONCURRENCY = max(1, int(os.getenv("PIPELINE_CONCURRENCY")))
+except ValueError:
+    pass
+
 # Target Pages Configuration (Specific Pages/Ranges)
 # Format: "1,3,5-7" -> [1, 3, 5, 6, 7]
 TARGET_PAGES_LIST = []
@@ -52,29 +62,288 @@ FONT_LEGAL = "Sniglet-Regular.ttf"
 
 PATH_FONTS = "assets/fonts/"
 
+# Generation Cache (Content-addressed, LRU by size)
+GEN_CACHE_ENABLED = os.getenv("GEN_CACHE_ENABLED", "true").lower() == "true"
+GEN_CACHE_DIR = os.getenv("GEN_CACHE_DIR", "cache/generation")
+GEN_CACHE_MAX_MB = 500
+try:
+    if os.getenv("GEN_CACHE_MAX_MB"):
+        GEN_CACHE_MAX_MB = int(os.getenv("GEN_CACHE_MAX_MB"))
+except ValueError:
+    pass
+
+# Series Master Bible (default version; jobs may select another, e.g. "5.12.1", "5.21", "5.22")
+BIBLE_VERSION = os.getenv("BIBLE_VERSION", "5.21")
+
+# Visual DNA Store (Agent Bravo's extracted style DNA, keyed by reference file content + QA model)
+# DNA_WARM_ON_STARTUP: analyze missing/changed references when the bot starts, not in the first job
+DNA_STORE_ENABLED = os.getenv("DNA_STORE_ENABLED", "true").lower() == "true"
+DNA_STORE_PATH = os.getenv("DNA_STORE_PATH", "cache/visual_dna.json")
+DNA_WARM_ON_STARTUP = os.getenv("DNA_WARM_ON_STARTUP", "true").lower() == "true"
+
+# QA Verdict Cache (Agent Delta's model verdicts, keyed by image bytes + QA prompt version + QA model)
+QA_CACHE_ENABLED = os.getenv("QA_CACHE_ENABLED", "true").lower() == "true"
+QA_CACHE_PATH = os.getenv("QA_CACHE_PATH", "cache/qa_verdicts.json")
+QA_CACHE_MAX_ENTRIES = 5000
+try:
+    if os.getenv("QA_CACHE_MAX_ENTRIES"):
+        QA_CACHE_MAX_ENTRIES = max(1, int(os.getenv("QA_CACHE_MAX_ENTRIES")))
+except ValueError:
+    pass
+
+# Prompt Planning Mode
+# "page": one smart-prompt call per page (default) | "book": one structured JSON call plans every page,
+# falling back to per-page calls for anything missing or invalid (~6x fewer requests)
+PROMPT_PLANNING_MODE = os.getenv("PROMPT_PLANNING_MODE", "page").lower()
+if PROMPT_PLANNING_MODE not in ("page", "book"):
+    print(f"Warning: Invalid PROMPT_PLANNING_MODE: {PROMPT_PLANNING_MODE}")
+    PROMPT_PLANNING_MODE = "page"
+
+# Smart Prompt Cache (in-memory, TTL + LRU)
+# PROMPT_CACHE_FORCE_FRESH: always ask the model again (creative variety); results still refresh the cache
+PROMPT_CACHE_ENABLED = os.getenv("PROMPT_CACHE_ENABLED", "true").lower() == "true"
+PROMPT_CACHE_FORCE_FRESH = os.getenv("PROMPT_CACHE_FORCE_FRESH", "false").lower() == "true"
+PROMPT_CACHE_TTL_SEC = 24 * 3600
+PROMPT_CACHE_MAX_ENTRIES = 256
+try:
+    if os.getenv("PROMPT_CACHE_TTL_SEC"):
+        PROMPT_CACHE_TTL_SEC = int(os.getenv("PROMPT_CACHE_TTL_SEC"))
+    if os.getenv("PROMPT_CACHE_MAX_ENTRIES"):
+        PROMPT_CACHE_MAX_ENTRIES = max(1, int(os.getenv("PROMPT_CACHE_MAX_ENTRIES")))
+except ValueError:
+    pass
+
+# Reference Registry (assets/ref_* loaded once, downscaled + recompressed, kept in memory)
+REF_IMAGE_MAX_SIDE = 1024
+REF_REGISTRY_MAX_MB = 64
+try:
+    if os.getenv("REF_IMAGE_MAX_SIDE"):
+        REF_IMAGE_MAX_SIDE = max(64, int(os.getenv("REF_IMAGE_MAX_SIDE")))
+    if os.getenv("REF_REGISTRY_MAX_MB"):
+        REF_REGISTRY_MAX_MB = int(os.getenv("REF_REGISTRY_MAX_MB"))
+except ValueError:
+    pass
+
+# Run Manifests (Checkpoint/Resume state, one JSON per run_id)
+MANIFEST_DIR = os.getenv("MANIFEST_DIR", "temp/manifests")
+
+# Image Backend (Agent Charlie)
+# "imagen": Imagen 4.0 :predict | "gemini_flash": Gemini Flash :generateContent
+# "stub": local synthetic line art server (offline load tests / benchmarks, no API key)
+IMAGE_MODEL_IDS = {
+    "imagen": "imagen-4.0-generate-001",
+    "gemini_flash": "models/gemini-2.0-flash-exp-image-generation",
+    "stub": "stub-line-art"
+}
+IMAGE_BACKEND = os.getenv("IMAGE_BACKEND", "imagen" if DEPLOYMENT_TIER == "PAID" else "gemini_flash").lower()
+
 # Image Model Configuration (Agent Alpha Logic)
-if DEPLOYMENT_TIER == "PAID":
-    GEN_MODEL_ID = "imagen-4.0-generate-001"
-else:
-    # FREE Tier: Use Gemini 2.0 Flash Exp (Image Generation)
-    GEN_MODEL_ID = "models/gemini-2.0-flash-exp-image-generation"
+# PAID Tier: Imagen 4.0 / FREE Tier: Gemini 2.0 Flash Exp (Image Generation), unless IMAGE_BACKEND says otherwise
+GEN_MODEL_ID = IMAGE_MODEL_IDS.get(IMAGE_BACKEND, IMAGE_MODEL_IDS["imagen" if DEPLOYMENT_TIER == "PAID" else "gemini_flash"])
+
+# Stub Image Server (IMAGE_BACKEND=stub)
+# STUB_SERVER_URL: use an already running server (python -m src.modules.stub_image_server);
+# empty starts one in-process on localhost. Error/throttle rates are fractions of requests.
+STUB_SERVER_URL = os.getenv("STUB_SERVER_URL", "")
+STUB_LATENCY_SEC = 0.5
+STUB_ERROR_RATE = 0.0      # Answered with HTTP 500
+STUB_THROTTLE_RATE = 0.0   # Answered with HTTP 429 + Retry-After
+STUB_IMAGE_SIZE = 1024
+STUB_SEED = 0
+try:
+    if os.getenv("STUB_LATENCY_SEC"):
+        STUB_LATENCY_SEC = max(0.0, float(os.getenv("STUB_LATENCY_SEC")))
+    if os.getenv("STUB_ERROR_RATE"):
+        STUB_ERROR_RATE = min(1.0, max(0.0, float(os.getenv("STUB_ERROR_RATE"))))
+    if os.getenv("STUB_THROTTLE_RATE"):
+        STUB_THROTTLE_RATE = min(1.0, max(0.0, float(os.getenv("STUB_THROTTLE_RATE"))))
+    if os.getenv("STUB_IMAGE_SIZE"):
+        STUB_IMAGE_SIZE = max(64, int(os.getenv("STUB_IMAGE_SIZE")))
+    if os.getenv("STUB_SEED"):
+        STUB_SEED = int(os.getenv("STUB_SEED"))
+except ValueError:
+    pass
 
 # QA Model Configuration (Same for both tiers)
 QA_MODEL_NAME = "models/gemini-2.5-pro"
+# QA criteria a cover never fails on (1: black and white line art only, 2: no shading/colors): covers are full color
+QA_COVER_EXEMPT_CRITERIA = [1, 2]
+
+# Batched QA (Agent Delta): checks that arrive within QA_BATCH_WINDOW_SEC of each other (candidates of a page,
+# pages in flight) share one vision request of up to QA_BATCH_SIZE images. 1 = one request per image.
+QA_BATCH_SIZE = 4
+QA_BATCH_WINDOW_SEC = 0.5
+try:
+    if os.getenv("QA_BATCH_SIZE"):
+        QA_BATCH_SIZE = max(1, int(os.getenv("QA_BATCH_SIZE")))
+    if os.getenv("QA_BATCH_WINDOW_SEC"):
+        QA_BATCH_WINDOW_SEC = max(0.0, float(os.getenv("QA_BATCH_WINDOW_SEC")))
+except ValueError:
+    pass
+
+# QA Cascade (Agent Delta): local pre-check -> fast model -> QA_MODEL_NAME only when the fast verdict is
+# unclear, below its confidence threshold or disagrees with the local metrics. Thresholds are fast-model confidences (0-1).
+QA_CASCADE_ENABLED = os.getenv("QA_CASCADE_ENABLED", "true").lower() == "true"
+QA_FAST_MODEL_NAME = os.getenv("QA_FAST_MODEL_NAME", "models/gemini-2.5-flash")
+QA_FAST_PASS_CONFIDENCE = 0.9  # A fast PASS below this is confirmed by QA_MODEL_NAME (strictness)
+QA_FAST_FAIL_CONFIDENCE = 0.8  # A fast FAIL below this is confirmed by QA_MODEL_NAME (saves a needless regeneration)
+QA_LOCAL_BORDERLINE = 0.5      # Pre-check metrics above this fraction of their limit make a page "borderline"
+try:
+    if os.getenv("QA_FAST_PASS_CONFIDENCE"):
+        QA_FAST_PASS_CONFIDENCE = float(os.getenv("QA_FAST_PASS_CONFIDENCE"))
+    if os.getenv("QA_FAST_FAIL_CONFIDENCE"):
+        QA_FAST_FAIL_CONFIDENCE = float(os.getenv("QA_FAST_FAIL_CONFIDENCE"))
+    if os.getenv("QA_LOCAL_BORDERLINE"):
+        QA_LOCAL_BORDERLINE = float(os.getenv("QA_LOCAL_BORDERLINE"))
+except ValueError:
+    pass
+
+# Local Pre-QA Filter (Agent Delta): cheap NumPy checks reject obvious failures before the vision call
+# Ratios are fractions of the image's pixels (analysed at PRECHECK_MAX_SIDE). Covers skip the color/gray/fill checks.
+PRECHECK_ENABLED = os.getenv("PRECHECK_ENABLED", "true").lower() == "true"
+PRECHECK_MAX_SIDE = 512
+PRECHECK_SATURATION = 0.30        # HSV saturation above which a pixel counts as colored
+PRECHECK_MAX_COLOR_RATIO = 0.01   # Colored pixels allowed (line art: ~0)
+PRECHECK_MAX_GRAY_RATIO = 0.20    # Mid-gray pixels allowed (gray shading / gradients)
+PRECHECK_MIN_INK = 0.003          # Dark pixels needed (below: blank page)
+PRECHECK_MAX_INK = 0.45           # Dark pixels allowed (above: solid black fills)
+PRECHECK_MIN_EDGE_DENSITY = 0.004 # Edge pixels needed (below: no line work)
+try:
+    if os.getenv("PRECHECK_MAX_SIDE"):
+        PRECHECK_MAX_SIDE = max(64, int(os.getenv("PRECHECK_MAX_SIDE")))
+    if os.getenv("PRECHECK_SATURATION"):
+        PRECHECK_SATURATION = float(os.getenv("PRECHECK_SATURATION"))
+    if os.getenv("PRECHECK_MAX_COLOR_RATIO"):
+        PRECHECK_MAX_COLOR_RATIO = float(os.getenv("PRECHECK_MAX_COLOR_RATIO"))
+    if os.getenv("PRECHECK_MAX_GRAY_RATIO"):
+        PRECHECK_MAX_GRAY_RATIO = float(os.getenv("PRECHECK_MAX_GRAY_RATIO"))
+    if os.getenv("PRECHECK_MIN_INK"):
+        PRECHECK_MIN_INK = float(os.getenv("PRECHECK_MIN_INK"))
+    if os.getenv("PRECHECK_MAX_INK"):
+        PRECHECK_MAX_INK = float(os.getenv("PRECHECK_MAX_INK"))
+    if os.getenv("PRECHECK_MIN_EDGE_DENSITY"):
+        PRECHECK_MIN_EDGE_DENSITY = float(os.getenv("PRECHECK_MIN_EDGE_DENSITY"))
+except ValueError:
+    pass
+
+# API Key Pool (one key per Google Cloud project; calls are spread across all of them)
+# GOOGLE_API_KEYS="key1,key2,..." (falls back to GOOGLE_API_KEY). RATE_LIMITS apply per key.
+GOOGLE_API_KEYS = [key.strip() for key in os.getenv("GOOGLE_API_KEYS", os.getenv("GOOGLE_API_KEY", "")).split(",") if key.strip()]
+KEY_COOLDOWN_SEC = 60.0     # Key benched after a 429 without Retry-After
+KEY_DISABLE_SEC = 3600.0    # Key benched after an auth error (invalid / revoked key)
+try:
+    if os.getenv("KEY_COOLDOWN_SEC"):
+        KEY_COOLDOWN_SEC = max(0.0, float(os.getenv("KEY_COOLDOWN_SEC")))
+    if os.getenv("KEY_DISABLE_SEC"):
+        KEY_DISABLE_SEC = max(0.0, float(os.getenv("KEY_DISABLE_SEC")))
+except ValueError:
+    pass
 
 # Mission Control Sheet URL
 MISSION_CONTROL_SHEET_URL = "https://docs.google.com/spreadsheets/d/1uNFeH89l96fbuB6olSHAWip-w_et-iqLDJLfBfuMvCo/edit?usp=sharing"
 
-# Rate Limiting Delays (in seconds)
+# HTTP Connection Pool (Agent Charlie REST calls)
+# Timeouts in seconds; HTTP/2 needs the 'h2' package (httpx[http2] in the Pipfile; falls back to HTTP/1.1 without it)
+HTTP_POOL_SIZE = 16 if DEPLOYMENT_TIER == "PAID" else 4
+HTTP_CONNECT_TIMEOUT = 10.0
+HTTP_READ_TIMEOUT = 180.0
+HTTP_KEEPALIVE_SEC = 60.0
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "true").lower() == "true"
+try:
+    if os.getenv("HTTP_POOL_SIZE"):
+        HTTP_POOL_SIZE = max(1, int(os.getenv("HTTP_POOL_SIZE")))
+    if os.getenv("HTTP_CONNECT_TIMEOUT"):
+        HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT"))
+    if os.getenv("HTTP_READ_TIMEOUT"):
+        HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT"))
+    if os.getenv("HTTP_KEEPALIVE_SEC"):
+        HTTP_KEEPALIVE_SEC = float(os.getenv("HTTP_KEEPALIVE_SEC"))
+except ValueError:
+    pass
+
+# Rate Limits (per model, shared process-wide by every agent and job)
+# rpm: requests per minute | tpm: tokens per minute (omit to skip) | burst: back-to-back requests allowed
 if DEPLOYMENT_TIER == "PAID":
-    QA_DELAY = 0.5
-    IMG_GEN_DELAY = 0.5
-    PROMPT_GEN_DELAY = 0.5
+    RATE_LIMITS = {
+        GEN_MODEL_ID: {"rpm": 20, "burst": 4},
+        QA_MODEL_NAME: {"rpm": 150, "tpm": 2000000, "burst": 10},
+        QA_FAST_MODEL_NAME: {"rpm": 1000, "tpm": 1000000, "burst": 20},
+    }
+    DEFAULT_RATE_LIMIT = {"rpm": 60, "burst": 4}
 else:
     # FREE Tier Limits
-    QA_DELAY = 35        # Gemini 1.5 Pro: 2 RPM limit -> 30s+ buffer
-    IMG_GEN_DELAY = 20   # Safe buffer for image generation
-    PROMPT_GEN_DELAY = 5 # Buffer for prompt generation
+    RATE_LIMITS = {
+        GEN_MODEL_ID: {"rpm": 3, "burst": 1},                    # Image generation: ~20s spacing
+        QA_MODEL_NAME: {"rpm": 5, "tpm": 250000, "burst": 1},    # Gemini 2.5 Pro: 5 RPM (QA + prompts)
+        QA_FAST_MODEL_NAME: {"rpm": 10, "tpm": 250000, "burst": 1}, # Gemini 2.5 Flash: 10 RPM (QA cascade)
+    }
+    DEFAULT_RATE_LIMIT = {"rpm": 5, "burst": 1}
+# The stub is local: pace it like a fast API so benchmarks measure the pipeline, not the quota
+RATE_LIMITS[IMAGE_MODEL_IDS["stub"]] = {"rpm": 600, "burst": 16}
+
+# Override/extend from Env (JSON), e.g. RATE_LIMITS='{"models/gemini-2.5-pro": {"rpm": 10}}'
+rate_limits_env = os.getenv("RATE_LIMITS")
+if rate_limits_env:
+    try:
+        for model_id, limits in json.loads(rate_limits_env).items():
+            RATE_LIMITS[model_id] = {**RATE_LIMITS.get(model_id, DEFAULT_RATE_LIMIT), **limits}
+    except (ValueError, AttributeError):
+        print(f"Warning: Invalid RATE_LIMITS format: {rate_limits_env}")
+
+# Multi-Candidate Generation (Images per page per QA round; Imagen returns them in one request)
+# QA_MAX_ROUNDS: generate -> QA rounds per page before it is skipped.
+CANDIDATES_PER_PAGE = 1
+QA_MAX_ROUNDS = 3
+try:
+    if os.getenv("CANDIDATES_PER_PAGE"):
+        CANDIDATES_PER_PAGE = min(4, max(1, int(os.getenv("CANDIDATES_PER_PAGE")))) # Imagen: max 4 samples
+    if os.getenv("QA_MAX_ROUNDS"):
+        QA_MAX_ROUNDS = max(1, int(os.getenv("QA_MAX_ROUNDS")))
+except ValueError:
+    pass
+
+# Job Scheduler (Admission Control & Fair Queuing)
+MAX_CONCURRENT_JOBS = 3 if DEPLOYMENT_TIER == "PAID" else 1     # Books generated at the same time
+MAX_INFLIGHT_PAGES = 8 if DEPLOYMENT_TIER == "PAID" else 1      # Pages in flight across ALL running books
+JOB_QUEUE_MAX = 20                                              # Waiting books before new ones are rejected
+JOB_QUEUE_PER_USER_MAX = 2                                      # Queued + running books per user
+try:
+    if os.getenv("MAX_CONCURRENT_JOBS"):
+        MAX_CONCURRENT_JOBS = max(1, int(os.getenv("MAX_CONCURRENT_JOBS")))
+    if os.getenv("MAX_INFLIGHT_PAGES"):
+        MAX_INFLIGHT_PAGES = max(1, int(os.getenv("MAX_INFLIGHT_PAGES")))
+    if os.getenv("JOB_QUEUE_MAX"):
+        JOB_QUEUE_MAX = max(1, int(os.getenv("JOB_QUEUE_MAX")))
+    if os.getenv("JOB_QUEUE_PER_USER_MAX"):
+        JOB_QUEUE_PER_USER_MAX = max(1, int(os.getenv("JOB_QUEUE_PER_USER_MAX")))
+except ValueError:
+    pass
+
+# Priority Users (Telegram user IDs, comma separated) -> queued ahead of everyone else
+PRIORITY_USER_IDS = []
+priority_users_env = os.getenv("PRIORITY_USER_IDS")
+if priority_users_env:
+    try:
+        PRIORITY_USER_IDS = [int(x) for x in priority_users_env.split(',') if x.strip()]
+    except ValueError:
+        print(f"Warning: Invalid PRIORITY_USER_IDS format: {priority_users_env}")
+
+# Adaptive Control (AIMD on 429 / Retry-After / latency feedback)
+# Tunes in-flight API calls and pace per model at runtime, starting from RATE_LIMITS.
+ADAPTIVE_CONTROL_ENABLED = os.getenv("ADAPTIVE_CONTROL_ENABLED", "true").lower() == "true"
+if DEPLOYMENT_TIER == "PAID":
+    ADAPTIVE_CONCURRENCY = {"initial": 4, "min": 1, "max": 16}
+else:
+    ADAPTIVE_CONCURRENCY = {"initial": 1, "min": 1, "max": 2}
+ADAPTIVE_INCREASE = 1.0            # Slots added per "window" of successes (additive increase)
+ADAPTIVE_DECREASE = 0.5            # Multiplier on 429 (multiplicative decrease)
+ADAPTIVE_RATE_STEP = 0.02          # Pace gained per success (fraction of configured RPM)
+ADAPTIVE_RATE_SCALE_MIN = 0.25     # Never slower than 1/4 of configured RPM
+ADAPTIVE_RATE_SCALE_MAX = 2.0      # Probe up to 2x configured RPM if the real quota allows
+ADAPTIVE_LATENCY_TOLERANCE = 2.0   # Latency above 2x baseline counts as congestion
+ADAPTIVE_LATENCY_DECREASE = 0.9    # Mild slot decrease on congestion
+ADAPTIVE_DEFAULT_BACKOFF = 30.0    # Pause (s) after a 429 without Retry-After
+ADAPTIVE_MAX_THROTTLE_RETRIES = 3  # 429 retries per call before giving up
 
 def get_status_message():
     if DEPLOYMENT_TIER == "PAID":
@@ -10,8 +10,10 @@ import os
 # Add project root to sys.path to allow 'from src...' imports
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+from src import config
 from src.modules.orchestrator import AgentOmega
 from src.modules.bot_interface import AgentFoxtrot
+from src.modules.scheduler import JobScheduler
 
 # Configure logging
 logging.basicConfig(
@@ -33,7 +35,10 @@ def main():
     
     # Initialize Agents
     omega = AgentOmega()
-    foxtrot = AgentFoxtrot(omega)
+    if config.DNA_WARM_ON_STARTUP:
+        omega.bravo.warm_dna()
+    scheduler = JobScheduler(omega)
+    foxtrot = AgentFoxtrot(omega, scheduler)
     
     # Start the Bot
     foxtrot.start()
@@ -0,0 +1,186 @@
+"""
+Adaptive Control: AIMD Concurrency & Pacing (Infrastructure)
+Mission: Find the real quota ceiling per model at runtime.
+
+Every model call reports its outcome here (via KeyPool.call / call_async):
+- success (with latency)   -> additive increase of in-flight slots and pace
+- 429 / Retry-After         -> multiplicative decrease + pause the model's limiter
+- latency far above normal  -> hold back (mild decrease of in-flight slots)
+"""
+
+import asyncio
+import logging
+import re
+import threading
+from collections import deque
+from contextlib import asynccontextmanager
+from src import config
+from src.modules.rate_limiter import get_limiter
+
+logger = logging.getLogger("AdaptiveControl")
+
+
+def retry_after_seconds(source):
+    """
+    Extracts a Retry-After hint (seconds) from an HTTP response or an SDK error.
+    Returns None if no hint is present.
+    """
+    headers = getattr(source, "headers", None)
+    if headers is None and getattr(source, "response", None) is not None:
+        headers = getattr(source.response, "headers", None)
+    if headers:
+        value = headers.get("Retry-After")
+        if value:
+            try:
+                return float(value)
+            except ValueError:
+                pass # HTTP-date form; fall through to the default backoff
+
+    # Gemini errors: "Please retry in 23.4s." / "retry_delay { seconds: 23 }"
+    match = re.search(r"retry in ([\d.]+)s|retry_delay \{\s*seconds: (\d+)", str(source))
+    if match:
+        return float(match.group(1) or match.group(2))
+    return None
+
+
+def is_throttle_error(error):
+    """True if the error is a 429 / quota exhaustion from the REST API or the Gemini SDK."""
+    status = getattr(getattr(error, "response", None), "status_code", None)
+    if status == 429 or getattr(error, "code", None) == 429:
+        return True
+    return type(error).__name__ in ("ResourceExhausted", "TooManyRequests")
+
+
+class AdaptiveController:
+    """
+    AIMD controller for one model.
+    Owns a dynamic in-flight limit (async slots) and the pace of the model's RateLimiter.
+    """
+
+    def __init__(self, model_id, limiter, initial, minimum, maximum, enabled=True):
+        self.model_id = model_id
+        self.limiter = limiter
+        self.enabled = enabled
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.rate_scale = 1.0
+        self.in_flight = 0
+        self.latency_baseline = None
+        self.waiters = deque()
+        self.lock = threading.Lock()
+
+    # --- Slots (dynamic semaphore, safe across threads and event loops) ---
+
+    def _capacity(self):
+        return max(1, int(self.limit))
+
+    def _wake_waiters(self):
+        # Caller holds self.lock
+        while self.waiters and self.in_flight < self._capacity():
+            fut = self.waiters.popleft()
+            if fut.done():
+                continue
+            self.in_flight += 1
+            fut.get_loop().call_soon_threadsafe(self._grant, fut)
+
+    def _grant(self, fut):
+        if fut.cancelled():
+            self.release()
+        else:
+            fut.set_result(None)
+
+    async def acquire(self):
+        with self.lock:
+            if self.in_flight < self._capacity():
+                self.in_flight += 1
+                return
+            fut = asyncio.get_running_loop().create_future()
+            self.waiters.append(fut)
+        try:
+            await fut
+        except asyncio.CancelledError:
+            with self.lock:
+                if fut in self.waiters:
+                    self.waiters.remove(fut)
+                    fut = None
+            # Slot already granted to us: hand it back (a cancelled future is released by _grant)
+            if fut is not None and not fut.cancelled():
+                self.release()
+            raise
+
+    def release(self):
+        with self.lock:
+            self.in_flight -= 1
+            self._wake_waiters()
+
+    @asynccontextmanager
+    async def slot(self):
+        """Holds one in-flight slot for the duration of an API call."""
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    # --- Feedback signals ---
+
+    def on_success(self, latency):
+        """Additive increase (unless latency says the backend is already saturated)."""
+        if not self.enabled:
+            return
+        with self.lock:
+            if self.latency_baseline is None:
+                self.latency_baseline = latency
+            else:
+                # Slowly tracking baseline (EWMA), biased towards the fastest observed calls
+                self.latency_baseline = min(latency, 0.9 * self.latency_baseline + 0.1 * latency)
+
+            if latency > self.latency_baseline * config.ADAPTIVE_LATENCY_TOLERANCE:
+                self.limit = max(self.minimum, self.limit * config.ADAPTIVE_LATENCY_DECREASE)
+                logger.info(f"{self.model_id}: latency {latency:.1f}s above baseline, in-flight limit -> {self.limit:.2f}")
+                return
+
+            self.limit = min(self.maximum, self.limit + config.ADAPTIVE_INCREASE / max(1.0, self.limit))
+            self.rate_scale = min(config.ADAPTIVE_RATE_SCALE_MAX, self.rate_scale + config.ADAPTIVE_RATE_STEP)
+            self._wake_waiters()
+        self.limiter.set_rate_scale(self.rate_scale)
+
+    def on_throttle(self, retry_after=None):
+        """Multiplicative decrease of slots and pace; honours Retry-After."""
+        pause = retry_after if retry_after is not None else config.ADAPTIVE_DEFAULT_BACKOFF
+        self.limiter.pause(pause)
+        if not self.enabled:
+            logger.warning(f"{self.model_id}: throttled (429), pausing {pause:.1f}s.")
+            return
+        with self.lock:
+            self.limit = max(self.minimum, self.limit * config.ADAPTIVE_DECREASE)
+            self.rate_scale = max(config.ADAPTIVE_RATE_SCALE_MIN, self.rate_scale * config.ADAPTIVE_DECREASE)
+        self.limiter.set_rate_scale(self.rate_scale)
+        logger.warning(
+            f"{self.model_id}: throttled (429). In-flight limit -> {self.limit:.2f}, "
+            f"pace -> {self.rate_scale:.2f}x, pausing {pause:.1f}s."
+        )
+
+
+_controllers = {}
+_controllers_lock = threading.Lock()
+
+
+def get_controller(model_id, key_id=None):
+    """Returns the process-wide adaptive controller for a model (and pooled API key), created on first use."""
+    name = model_id if key_id is None else f"{model_id} [{key_id}]"
+    with _controllers_lock:
+        controller = _controllers.get(name)
+        if controller is None:
+            bounds = config.ADAPTIVE_CONCURRENCY
+            controller = AdaptiveController(
+                name,
+                get_limiter(model_id, key_id),
+                initial=bounds["initial"],
+                minimum=bounds["min"],
+                maximum=bounds["max"],
+                enabled=config.ADAPTIVE_CONTROL_ENABLED
+            )
+            _controllers[name] = controller
+        return controller
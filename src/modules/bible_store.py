@@ -0,0 +1,119 @@
+"""
+Bible Store: Indexed Series Master Bible (Infrastructure)
+Mission: Parse the Bible once, serve every job from memory.
+
+Each "Series Master Bible v<version>.md" is parsed into an index of its
+bracketed sections ("#### [PAGE_04_KNOLLING] ..."). A section starts at its
+tag (the heading's "#"s are dropped, as the original in-place extractor did)
+and runs until the next heading of the same or a higher level. The file is re-checked on every
+lookup with a cheap stat(); it is only re-read when mtime/size change, and
+only re-indexed when its content hash changes.
+
+One store per version is shared process-wide (config.BIBLE_VERSION is the
+default; jobs may pick another version).
+"""
+
+import glob
+import hashlib
+import logging
+import os
+import re
+import threading
+from src import config
+
+logger = logging.getLogger("BibleStore")
+
+BIBLE_FILE_PATTERN = "Series Master Bible v{version}.md"
+
+# "#### [TAG] (Title)" -> level 4, tag "[TAG]"
+HEADING_RE = re.compile(r"^(#{1,6})\s+(\[[^\]]+\])?")
+
+# v5.12.1 predates the SSOT tags; its Master Prompts use lettered sections instead
+LEGACY_TAGS = {
+    "[PAGE_01_MISSION]": "[A]",
+    "[PAGE_02_PARENTS]": "[B]",
+    "[PAGE_03_START]": "[C]",
+    "[PAGE_04_KNOLLING]": "[D]",
+    "[PAGE_05_ACTION]": "[E]",
+    "[PAGE_50_CERTIFICATE]": "[F]",
+    "[COVER_SPREAD]": "[G]"
+}
+
+
+def parse_sections(content):
+    """Returns {"[TAG]": section text (from the tag on)} for every bracketed heading."""
+    lines = content.splitlines()
+    headings = []
+    for idx, line in enumerate(lines):
+        match = HEADING_RE.match(line)
+        if match:
+            headings.append((idx, len(match.group(1)), match.group(2), match.start(2)))
+
+    sections = {}
+    for pos, (start, level, tag, column) in enumerate(headings):
+        if not tag or tag in sections: # First definition wins
+            continue
+        end = len(lines)
+        for next_start, next_level, _, _ in headings[pos + 1:]:
+            if next_level <= level:
+                end = next_start
+                break
+        sections[tag] = "\n".join([lines[start][column:]] + lines[start + 1:end]).strip()
+    return sections
+
+
+def bible_path(version=None):
+    return BIBLE_FILE_PATTERN.format(version=version or config.BIBLE_VERSION)
+
+
+def available_versions():
+    """Bible versions present in the working directory (e.g. ["5.12.1", "5.21", "5.22"])."""
+    prefix, suffix = BIBLE_FILE_PATTERN.split("{version}")
+    return sorted(path[len(prefix):-len(suffix)] for path in glob.glob(BIBLE_FILE_PATTERN.format(version="*")))
+
+
+class BibleStore:
+    def __init__(self, path):
+        self.path = path
+        self.sections = {}
+        self.stamp = None # (mtime, size) of the indexed file
+        self.digest = None
+        self.lock = threading.Lock()
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def _refresh(self):
+        stat = os.stat(self.path)
+        stamp = (stat.st_mtime, stat.st_size)
+        with self.lock:
+            if stamp == self.stamp:
+                return
+            with open(self.path, "r") as f:
+                content = f.read()
+            digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+            if digest != self.digest:
+                self.sections = parse_sections(content)
+                self.digest = digest
+                logger.info(f"Indexed {len(self.sections)} sections from {self.path}")
+            self.stamp = stamp
+
+    def section(self, tag):
+        """Text of a [TAG] section ("" if the Bible or the section is missing)."""
+        self._refresh()
+        return self.sections.get(tag) or self.sections.get(LEGACY_TAGS.get(tag), "")
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_bible(version=None):
+    """Returns the process-wide store for a Bible version (default: config.BIBLE_VERSION)."""
+    path = bible_path(version)
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = BibleStore(path)
+            _stores[path] = store
+        return store
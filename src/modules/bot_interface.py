@@ -9,6 +9,8 @@ import asyncio
 from dotenv import load_dotenv
 from telegram import Update
 from telegram.ext import ApplicationBuilder, CommandHandler, ContextTypes
+from src.modules.scheduler import JobScheduler, QueueFullError, PRIORITY_HIGH, PRIORITY_NORMAL
+from src.modules.job_manifest import JobManifest
 
 # Load environment variables
 load_dotenv()
@@ -16,8 +18,10 @@ load_dotenv()
 logger = logging.getLogger("AgentFoxtrot")
 
 class AgentFoxtrot:
-    def __init__(self, orchestrator):
+    def __init__(self, orchestrator, scheduler=None):
         self.orchestrator = orchestrator
+        # All /generate requests go through the scheduler (queueing, fairness, caps)
+        self.scheduler = scheduler or JobScheduler(orchestrator)
         self.token = os.getenv("TELEGRAM_TOKEN")
         if not self.token:
             logger.error("TELEGRAM_TOKEN not found in .env file.")
@@ -31,7 +35,8 @@ class AgentFoxtrot:
         await update.message.reply_text(
             "🤖 Agent Foxtrot online.\n"
             "Use /generate [Theme] to start the factory.\n"
-            "Example: /generate Firefighter\n\n"
+            "Example: /generate Firefighter\n"
+            "Use /resume [RunID] to finish a failed run without redoing passed pages.\n\n"
             f"📊 Mission Control: {config.MISSION_CONTROL_SHEET_URL}"
         )
 
@@ -41,6 +46,30 @@ class AgentFoxtrot:
             return
 
         theme = " ".join(context.args)
+        await self._run_job(update, theme)
+
+    async def resume_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        if not context.args:
+            await update.message.reply_text("⚠️ Please provide a run ID.\nUsage: /resume [RunID]")
+            return
+
+        run_id = context.args[0]
+        try:
+            manifest = JobManifest.load(run_id)
+        except ValueError as e:
+            await update.message.reply_text(f"⚠️ {e}")
+            return
+
+        # Only the user who submitted a run may resume it (and receive its PDF)
+        user_id = update.effective_user.id if update.effective_user else None
+        if user_id is None or manifest.user_id != user_id:
+            logger.warning(f"User {user_id} tried to resume run {run_id} of user {manifest.user_id}.")
+            await update.message.reply_text(f"⚠️ No manifest found for run {run_id}.")
+            return
+
+        await self._run_job(update, manifest.theme, resume_run_id=run_id)
+
+    async def _run_job(self, update: Update, theme, resume_run_id=None):
         from src import config
         
         # Initial Dashboard Message
@@ -65,9 +94,23 @@ class AgentFoxtrot:
             except Exception as e:
                 logger.warning(f"Failed to update dashboard: {e}")
 
+        # Queue Position Callback
+        async def position_callback(position):
+            await progress_callback(
+                f"⏳ <b>Queued</b>\n"
+                f"Theme: {theme}\n"
+                f"📊 Position in queue: {position}\n"
+                f"📝 Status: Waiting for a free production slot..."
+            )
+
+        user_id = update.effective_user.id if update.effective_user else None
+        priority = PRIORITY_HIGH if user_id in config.PRIORITY_USER_IDS else PRIORITY_NORMAL
+
         try:
-            # Start Job (Async)
-            result = await self.orchestrator.start_job(theme, progress_callback)
+            # Submit Job (Queued; resolves when the book is done)
+            result = await self.scheduler.submit(
+                user_id, theme, progress_callback, position_callback, priority, resume_run_id=resume_run_id
+            )
             
             # Final Status Update
             await dashboard_msg.edit_text(
@@ -108,11 +151,27 @@ class AgentFoxtrot:
             # Send PDF Link
             await update.message.reply_text(f"📕 <b>Download PDF:</b> {result['drive_link']}", parse_mode='HTML')
             
+        except QueueFullError as e:
+            logger.warning(f"Job rejected for user {user_id}: {e}")
+            await dashboard_msg.edit_text(
+                f"🚦 <b>Factory at Capacity</b>\n"
+                f"{e}\n\n"
+                f"📊 <a href='{config.MISSION_CONTROL_SHEET_URL}'>Mission Control</a>",
+                parse_mode='HTML'
+            )
+
         except Exception as e:
             logger.error(f"Failed to start job: {e}")
+            # start_job attaches the run ID once the run has a manifest (Mission Control may be unavailable)
+            run_id = getattr(e, "run_id", None) or resume_run_id
+            if run_id:
+                retry_hint = f"Use /resume {run_id} to retry only the missing work."
+            else:
+                retry_hint = "Use /generate [Theme] to try again."
             await dashboard_msg.edit_text(
                 f"❌ <b>Mission Failed</b>\n"
-                f"Error: {e}\n\n"
+                f"Error: {e}\n"
+                f"{retry_hint}\n\n"
                 f"📊 <a href='{config.MISSION_CONTROL_SHEET_URL}'>Mission Control</a>",
                 parse_mode='HTML'
             )
@@ -123,10 +182,12 @@ class AgentFoxtrot:
         """
         logger.info("Starting Telegram Bot...")
         
-        self.application = ApplicationBuilder().token(self.token).build()
+        # concurrent_updates: one user's running job must not block replies to others
+        self.application = ApplicationBuilder().token(self.token).concurrent_updates(True).build()
         
         self.application.add_handler(CommandHandler("start", self.start_command))
         self.application.add_handler(CommandHandler("generate", self.generate_command))
+        self.application.add_handler(CommandHandler("resume", self.resume_command))
         
         # Run the bot
         self.application.run_polling()
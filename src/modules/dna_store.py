@@ -0,0 +1,105 @@
+"""
+DNA Store: Persistent Visual DNA Cache (Infrastructure)
+Mission: Analyze each reference asset once, not once per book.
+
+Agent Bravo's extracted DNA strings live in one JSON file (config.DNA_STORE_PATH).
+Each entry is keyed by the SHA-256 of the asset type, QA_MODEL_NAME, the
+analysis prompt and the bytes of the reference files, so an entry goes stale
+only when an asset (or the model/prompt) changes. Stale entries of the same
+asset type are dropped when a new one is stored.
+Set DNA_STORE_ENABLED=false to opt out.
+
+Layout:
+{
+  "<key>": {"asset_type": "cover", "model": "...", "files": [...], "dna": "...", "created_at": "..."}
+}
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from src import config
+from src.modules.reference_registry import get_reference_registry
+
+logger = logging.getLogger("DNAStore")
+
+
+class DNAStore:
+    def __init__(self, path=None, enabled=None):
+        self.path = path or config.DNA_STORE_PATH
+        self.enabled = config.DNA_STORE_ENABLED if enabled is None else enabled
+        self.lock = threading.Lock()
+        self.entries = self._load() if self.enabled else {}
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable DNA store {self.path}: {e}")
+            return {}
+
+    def make_key(self, asset_type, files, prompt):
+        """Content hash of one analysis (asset type, model, prompt, reference file bytes)."""
+        digest = hashlib.sha256()
+        for part in (asset_type, config.QA_MODEL_NAME, prompt):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        references = get_reference_registry()
+        for path in sorted(files):
+            digest.update((references.digest(path) or "missing").encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Returns the stored DNA string, or None on a miss."""
+        if not self.enabled:
+            return None
+        with self.lock:
+            entry = self.entries.get(key)
+        return entry["dna"] if entry else None
+
+    def put(self, key, asset_type, files, dna):
+        """Stores a DNA string (replacing older entries of the same asset type)."""
+        if not self.enabled:
+            return
+        with self.lock:
+            self.entries = {k: v for k, v in self.entries.items() if v["asset_type"] != asset_type}
+            self.entries[key] = {
+                "asset_type": asset_type,
+                "model": config.QA_MODEL_NAME,
+                "files": sorted(files),
+                "dna": dna,
+                "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            }
+            self._save()
+
+    def _save(self):
+        # Caller holds self.lock. Atomic write (temp file + rename).
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self.entries, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Failed to save DNA store {self.path}: {e}")
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_dna_store():
+    """Returns the process-wide DNA store."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = DNAStore()
+        return _store
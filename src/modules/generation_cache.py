@@ -0,0 +1,102 @@
+"""
+Generation Cache: Content-Addressed Image Store (Infrastructure)
+Mission: Never pay the image API twice for the same request.
+
+Images are stored on disk under the SHA-256 of everything that determines the
+output: prompt, GEN_MODEL_ID, DEPLOYMENT_TIER and the bytes of any
+wireframe/reference images. The cache is bounded by size (GEN_CACHE_MAX_MB)
+with least-recently-used eviction (file mtime is bumped on every hit).
+Set GEN_CACHE_ENABLED=false to opt out.
+"""
+
+import hashlib
+import logging
+import os
+import shutil
+import threading
+from src import config
+from src.modules.reference_registry import get_reference_registry
+
+logger = logging.getLogger("GenerationCache")
+
+
+class GenerationCache:
+    def __init__(self, cache_dir=None, max_bytes=None, enabled=None):
+        self.cache_dir = cache_dir or config.GEN_CACHE_DIR
+        self.max_bytes = max_bytes if max_bytes is not None else config.GEN_CACHE_MAX_MB * 1024 * 1024
+        self.enabled = config.GEN_CACHE_ENABLED if enabled is None else enabled
+        self.lock = threading.Lock()
+
+    def make_key(self, prompt, reference_paths=()):
+        """Content hash of the request (prompt, model, tier, reference image bytes)."""
+        digest = hashlib.sha256()
+        for part in (prompt, config.GEN_MODEL_ID, config.DEPLOYMENT_TIER):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        references = get_reference_registry() # File digests are computed once per file version
+        for path in reference_paths:
+            if path:
+                file_digest = references.digest(path)
+                if file_digest:
+                    digest.update(file_digest.encode("utf-8"))
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.png")
+
+    def get(self, key, dest_path):
+        """Copies a cached image to dest_path and returns it, or returns None on a miss."""
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            shutil.copyfile(path, dest_path)
+            os.utime(path) # LRU: mark as recently used
+        except FileNotFoundError:
+            return None
+        logger.info(f"Generation cache hit ({key[:12]}) -> {dest_path}")
+        return dest_path
+
+    def put(self, key, image_path):
+        """Stores a generated image under its key (replacing any previous entry)."""
+        if not self.enabled:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{self._path(key)}.{threading.get_ident()}.tmp"
+            shutil.copyfile(image_path, tmp_path)
+            os.replace(tmp_path, self._path(key))
+            self._evict()
+        except OSError as e:
+            logger.warning(f"Failed to cache image {image_path}: {e}")
+
+    def _evict(self):
+        """Removes least-recently-used entries until the cache fits in max_bytes."""
+        with self.lock:
+            entries = []
+            for name in os.listdir(self.cache_dir):
+                if not name.endswith(".png"):
+                    continue
+                stat = os.stat(os.path.join(self.cache_dir, name))
+                entries.append((stat.st_mtime, stat.st_size, name))
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, name in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                os.remove(os.path.join(self.cache_dir, name))
+                total -= size
+                logger.info(f"Generation cache evicted {name}")
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_generation_cache():
+    """Returns the process-wide generation cache."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = GenerationCache()
+        return _cache
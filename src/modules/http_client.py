@@ -0,0 +1,87 @@
+"""
+HTTP Client: Pooled Connections (Infrastructure)
+Mission: One TLS handshake per connection, not per image.
+
+Agent Charlie's REST calls share:
+- one requests.Session (sync path), pooled via HTTPAdapter
+- one httpx.AsyncClient per event loop (async path)
+Both keep connections alive, cap the pool at HTTP_POOL_SIZE and apply
+HTTP_CONNECT_TIMEOUT / HTTP_READ_TIMEOUT. HTTP/2 is used by the async client
+when HTTP2_ENABLED and the `h2` package is installed (httpx[http2] in the
+Pipfile; installs without it fall back to HTTP/1.1).
+"""
+
+import asyncio
+import logging
+import threading
+import weakref
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from src import config
+
+logger = logging.getLogger("HttpClient")
+
+_session = None
+_session_lock = threading.Lock()
+_async_clients = weakref.WeakKeyDictionary() # event loop -> httpx.AsyncClient
+
+
+def request_timeout():
+    """(connect, read) timeout tuple for requests."""
+    return (config.HTTP_CONNECT_TIMEOUT, config.HTTP_READ_TIMEOUT)
+
+
+def get_session():
+    """Returns the process-wide pooled requests.Session."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=config.HTTP_POOL_SIZE)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+            logger.info(f"HTTP session pool: {config.HTTP_POOL_SIZE} connections per host.")
+        return _session
+
+
+def _http2_available():
+    if not config.HTTP2_ENABLED:
+        return False
+    try:
+        import h2 # noqa: F401 (optional dependency of httpx[http2])
+        return True
+    except ImportError:
+        logger.info("HTTP/2 requested but the 'h2' package is not installed; using HTTP/1.1.")
+        return False
+
+
+def get_async_client():
+    """
+    Returns the pooled httpx.AsyncClient of the running event loop.
+    httpx connections belong to one loop, so each loop gets its own client
+    (dropped together with the loop).
+    """
+    loop = asyncio.get_running_loop()
+    with _session_lock:
+        client = _async_clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                http2=_http2_available(),
+                timeout=httpx.Timeout(config.HTTP_READ_TIMEOUT, connect=config.HTTP_CONNECT_TIMEOUT),
+                limits=httpx.Limits(
+                    max_connections=config.HTTP_POOL_SIZE,
+                    max_keepalive_connections=config.HTTP_POOL_SIZE,
+                    keepalive_expiry=config.HTTP_KEEPALIVE_SEC
+                )
+            )
+            _async_clients[loop] = client
+        return client
+
+
+async def close_async_client():
+    """Closes the running loop's client (e.g. on shutdown)."""
+    with _session_lock:
+        client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
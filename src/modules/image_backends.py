@@ -0,0 +1,140 @@
+"""
+Image Backends: Pluggable Image APIs (Infrastructure)
+Mission: One request/response contract for every image model Agent Charlie can call.
+
+A backend turns (prompt, sample count, optional wireframe/reference images)
+into an HTTP request and names the JSON field that carries the base64 images
+in the response (streamed to disk by the stream decoder). Agent Charlie owns
+everything else: rate limits, retries, caching and file naming.
+
+    imagen        Imagen 4.0 :predict (several samples per request, text only)
+    gemini_flash  Gemini Flash :generateContent (one image per request, accepts reference images)
+    stub          Local synthetic line art server (see stub_image_server)
+
+config.IMAGE_BACKEND selects the backend. New backends subclass ImageBackend
+and register in BACKENDS.
+"""
+
+import logging
+import os
+from src import config
+from src.modules.reference_registry import get_reference_registry
+
+logger = logging.getLogger("ImageBackends")
+
+API_BASE_URL = "https://generativelanguage.googleapis.com/v1beta"
+
+
+class ImageBackend:
+    name = None
+    label = None                          # Used in log and error messages
+    image_field = "bytesBase64Encoded"    # Response JSON key holding base64 image data
+    multi_sample = False                  # True: all candidates come from one request (sampleCount)
+    requires_api_key = True
+
+    def __init__(self, model_id=None):
+        self.model_id = model_id or config.IMAGE_MODEL_IDS[self.name]
+
+    def headers(self, api_key):
+        return {
+            'Content-Type': 'application/json',
+            'x-goog-api-key': api_key
+        }
+
+    def build_request(self, prompt, sample_count=1, wireframe_path=None, reference_images=None):
+        """Returns (url, payload); headers() adds the credentials of the key each attempt is sent with."""
+        raise NotImplementedError
+
+
+class ImagenBackend(ImageBackend):
+    name = "imagen"
+    label = "Imagen API"
+    multi_sample = True
+
+    def _url(self):
+        return f"{API_BASE_URL}/models/{self.model_id}:predict"
+
+    def build_request(self, prompt, sample_count=1, wireframe_path=None, reference_images=None):
+        if wireframe_path and os.path.exists(wireframe_path):
+            # Imagen 4.0 does not support image input; enforce the layout in the text prompt
+            logger.warning("Imagen does not support image input. Injecting STRICT LAYOUT ENFORCEMENT into text prompt.")
+            prompt = (
+                f"CRITICAL INSTRUCTION: Follow the structural layout EXACTLY as described. "
+                f"This is a wireframe-guided generation. Maintain precise zone positioning. "
+                f"{prompt}"
+            )
+        # v5.21 Payload Protocol
+        payload = {
+            "instances": [
+                { "prompt": prompt }
+            ],
+            "parameters": {
+                "sampleCount": sample_count,
+                "aspectRatio": "1:1"
+            }
+        }
+        return self._url(), payload
+
+
+class GeminiFlashBackend(ImageBackend):
+    name = "gemini_flash"
+    label = "Gemini Flash"
+    image_field = "data" # candidates[].content.parts[].inlineData.data
+
+    def _url(self):
+        # Handle 'models/' prefix if present in config
+        if self.model_id.startswith("models/"):
+            return f"{API_BASE_URL}/{self.model_id}:generateContent"
+        return f"{API_BASE_URL}/models/{self.model_id}:generateContent"
+
+    def _image_part(self, label, path):
+        """[text label, inline image] parts for a reference image, or [] if unavailable."""
+        if not path or not os.path.exists(path):
+            return []
+        encoded = get_reference_registry().base64(path)
+        if encoded is None:
+            logger.error(f"Failed to encode image {path}")
+            return []
+        return [{"text": label}, {"inline_data": {"mime_type": "image/png", "data": encoded}}]
+
+    def build_request(self, prompt, sample_count=1, wireframe_path=None, reference_images=None):
+        # Gemini Flash has no multi-sample image output: sample_count is always 1 per request
+        parts = []
+        for ref_path in reversed(reference_images or []):
+            parts += self._image_part("STYLE REFERENCE (Match this visual DNA):", ref_path)
+        parts += self._image_part("WIREFRAME REFERENCE (Follow this layout structure EXACTLY):", wireframe_path)
+        parts.append({"text": prompt})
+        payload = {
+            "contents": [{
+                "parts": parts
+            }]
+        }
+        return self._url(), payload
+
+
+class StubBackend(ImagenBackend):
+    name = "stub"
+    label = "Stub image server"
+    requires_api_key = False
+
+    def headers(self, api_key):
+        return {'Content-Type': 'application/json'}
+
+    def _url(self):
+        base_url = config.STUB_SERVER_URL
+        if not base_url:
+            # Imported here so the real backends never start a server thread
+            from src.modules.stub_image_server import get_stub_server
+            base_url = get_stub_server().url
+        return f"{base_url.rstrip('/')}/v1beta/models/{self.model_id}:predict"
+
+
+BACKENDS = {backend.name: backend for backend in (ImagenBackend, GeminiFlashBackend, StubBackend)}
+
+
+def get_backend(name=None):
+    """Backend instance for name (default: config.IMAGE_BACKEND)."""
+    name = (name or config.IMAGE_BACKEND).lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown IMAGE_BACKEND '{name}' (choose from {sorted(BACKENDS)})")
+    return BACKENDS[name]()
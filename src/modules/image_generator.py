@@ -1,121 +1,215 @@
 """
 Agent Charlie: Lead Technical Artist (Image Generation)
-Mission: Manage the "Artist" loop (Imagen 3 API).
+Mission: Manage the "Artist" loop (Imagen / Gemini Flash / stub, see image_backends).
 """
 
+import asyncio
 import logging
-import time
-import os
-import requests
-import json
-import base64
+import uuid
 from src import config
+from src.modules.rate_limiter import get_limiter
+from src.modules.adaptive_control import get_controller
+from src.modules.generation_cache import get_generation_cache
+from src.modules.http_client import get_session, get_async_client, request_timeout
+from src.modules.image_backends import get_backend
+from src.modules.key_pool import get_key_pool
+from src.modules.stream_decoder import Base64StreamDecoder, STREAM_CHUNK_SIZE
 
 logger = logging.getLogger("AgentCharlie")
 
 class AgentCharlie:
-    def __init__(self):
+    def __init__(self, backend=None):
         logger.info("Agent Charlie initialized.")
-        self.api_key = os.getenv("GOOGLE_API_KEY")
-        if not self.api_key:
+        self.backend = backend or get_backend()
+        self.keys = get_key_pool() # Calls are spread across every configured API key
+        if not self.keys.primary and self.backend.requires_api_key:
             logger.error("GOOGLE_API_KEY not found.")
         
-        logger.info(f"Using Image Model: {config.GEN_MODEL_ID}")
+        logger.info(f"Using Image Backend: {self.backend.name} ({self.backend.model_id})")
+        self.limiter = get_limiter(self.backend.model_id)
+        self.controller = get_controller(self.backend.model_id)
+        self.cache = get_generation_cache()
 
-    def generate_image(self, prompt, theme, page_number):
+    def _safe_theme(self, theme):
+        """Cleans the theme for use in filenames."""
+        return "".join(x for x in theme if x.isalnum() or x in " _-").strip().replace(" ", "_")
+
+    def _build_request(self, prompt, sample_count=1, wireframe_path=None, reference_images=None):
+        """
+        Builds the (url, payload) for the configured backend.
+        sample_count > 1 asks multi-sample backends (Imagen) for several candidates in one request.
+        """
+        return self.backend.build_request(prompt, sample_count, wireframe_path, reference_images)
+
+    def _output_path(self, theme, page_number, index=None, run_id=None):
+        """
+        temp/ filename for a generated page image (index distinguishes candidates).
+        Unique per call (run_id + random token): concurrent jobs, pages and rounds never share a file.
+        """
+        suffix = f"_c{index}" if index is not None else ""
+        run = f"{run_id}_" if run_id else ""
+        return f"temp/{self._safe_theme(theme)}_{run}Page{page_number}_{uuid.uuid4().hex}{suffix}.png"
+
+    def _stream_decoder(self, theme, page_number, sample_count=1, first_index=None, run_id=None):
+        """
+        Decoder that writes every image of a streamed response straight to temp/.
+        first_index numbers candidates that come from separate requests.
+        """
+        def open_output(index):
+            if first_index is not None:
+                index += first_index
+            elif sample_count == 1 and index == 0:
+                index = None
+            return self._output_path(theme, page_number, index, run_id=run_id)
+
+        return Base64StreamDecoder([self.backend.image_field], open_output)
+
+    def _finish_stream(self, decoder):
+        """Returns the saved filenames, or raises if the response held no image."""
+        filenames = decoder.close()
+        if not filenames:
+            raise ValueError(f"No image found in {self.backend.label} response: {decoder.preview_text()}")
+        for filename in filenames:
+            logger.info(f"Image saved to {filename}")
+        return filenames
+
+    def _post(self, url, payload):
+        """
+        Streaming POST under the shared rate limit, retrying on 429 (on another key when the pool has one).
+        Raises for an error status (its small body is read first, for the log); the caller closes the response.
+        """
+        def request(key):
+            response = get_session().post(
+                url, headers=self.backend.headers(key.key), json=payload, timeout=request_timeout(), stream=True
+            )
+            if response.status_code >= 400:
+                response.content # Small error body, read before the stream closes
+                response.close()
+                response.raise_for_status()
+            return response
+
+        return self.keys.call(self.backend.model_id, request, limits=(self.limiter, self.controller),
+                              label="Image generation")
+
+    async def _stream_async(self, url, payload, decoder):
+        """
+        Async streaming POST under the shared rate limit and adaptive in-flight cap, retrying on 429
+        (on another key when the pool has one). The body is fed to decoder chunk by chunk; returns the saved filenames.
+        """
+        async def request(key):
+            async with get_async_client().stream(
+                "POST", url, headers=self.backend.headers(key.key), json=payload
+            ) as response:
+                if response.status_code >= 400:
+                    await response.aread() # Small error body, needed for the log
+                    response.raise_for_status()
+                async for chunk in response.aiter_bytes(STREAM_CHUNK_SIZE):
+                    decoder.feed(chunk)
+
+        await self.keys.call_async(self.backend.model_id, request, limits=(self.limiter, self.controller),
+                                   label="Image generation")
+        return self._finish_stream(decoder)
+
+    def generate_image(self, prompt, theme, page_number, use_cache=True, wireframe_path=None, reference_images=None,
+                       run_id=None):
         """
         Generates an image based on the prompt using REST API.
+        use_cache=False skips the cache lookup (e.g. QA retries) but still stores the new image.
+        wireframe_path/reference_images guide the layout and style (sent as images where the backend accepts them).
+        run_id tags the output filename with the job it belongs to.
         """
         logger.info(f"Generating image for prompt: {prompt[:50]}...")
-        
-        # Rate Limiting Delay
-        logger.info(f"Sleeping for {config.IMG_GEN_DELAY}s (Rate Limit)...")
-        time.sleep(config.IMG_GEN_DELAY)
 
-        # Clean theme for filename
-        safe_theme = "".join(x for x in theme if x.isalnum() or x in " _-").strip().replace(" ", "_")
+        cache_key = self.cache.make_key(prompt, [wireframe_path, *(reference_images or [])])
+        if use_cache:
+            cached = self.cache.get(cache_key, self._output_path(theme, page_number, run_id=run_id))
+            if cached:
+                return cached
         
         try:
-            if config.DEPLOYMENT_TIER == "PAID":
-                # PAID Tier: Imagen 4.0 (:predict endpoint)
-                # Model ID is now config.GEN_MODEL_ID (e.g., imagen-4.0-generate-001)
-                url = f"https://generativelanguage.googleapis.com/v1beta/models/{config.GEN_MODEL_ID}:predict"
-                headers = {
-                    'Content-Type': 'application/json',
-                    'x-goog-api-key': self.api_key
-                }
-                # v5.21 Payload Protocol
-                payload = {
-                    "instances": [
-                        { "prompt": prompt }
-                    ],
-                    "parameters": {
-                        "sampleCount": 1,
-                        "aspectRatio": "1:1"
-                    }
-                }
-                
-                response = requests.post(url, headers=headers, json=payload)
-                response.raise_for_status()
-                result = response.json()
-                
-                # Parse Imagen Response
-                # Expected: {'predictions': [{'bytesBase64Encoded': '...', 'mimeType': 'image/png'}]}
-                if 'predictions' in result and len(result['predictions']) > 0:
-                    b64_data = result['predictions'][0]['bytesBase64Encoded']
-                    img_data = base64.b64decode(b64_data)
-                    
-                    filename = f"temp/{safe_theme}_Page{page_number}_{int(time.time())}.png"
-                    with open(filename, "wb") as f:
-                        f.write(img_data)
-                    logger.info(f"Image saved to {filename}")
-                    return filename
-                else:
-                    raise ValueError(f"Invalid response from Imagen API: {result}")
-
-            else:
-                # FREE Tier: Gemini 2.0 Flash Exp (:generateContent endpoint)
-                # Handle 'models/' prefix if present in config
-                model_id = config.GEN_MODEL_ID
-                if model_id.startswith("models/"):
-                    url = f"https://generativelanguage.googleapis.com/v1beta/{model_id}:generateContent"
-                else:
-                    url = f"https://generativelanguage.googleapis.com/v1beta/models/{model_id}:generateContent"
-
-                headers = {
-                    'Content-Type': 'application/json',
-                    'x-goog-api-key': self.api_key
-                }
-                payload = {
-                    "contents": [{
-                        "parts": [{"text": prompt}]
-                    }]
-                }
-                
-                response = requests.post(url, headers=headers, json=payload)
-                response.raise_for_status()
-                result = response.json()
-                
-                # Parse Gemini Response
-                # Look for inline data in candidates
-                if 'candidates' in result and result['candidates']:
-                    for candidate in result['candidates']:
-                        if 'content' in candidate and 'parts' in candidate['content']:
-                            for part in candidate['content']['parts']:
-                                if 'inlineData' in part:
-                                    b64_data = part['inlineData']['data']
-                                    img_data = base64.b64decode(b64_data)
-                                    
-                                    filename = f"temp/{safe_theme}_Page{page_number}_{int(time.time())}.png"
-                                    with open(filename, "wb") as f:
-                                        f.write(img_data)
-                                    logger.info(f"Image saved to {filename}")
-                                    return filename
-                            
-                raise ValueError(f"No image found in Gemini Flash response: {result}")
+            url, payload = self._build_request(prompt, wireframe_path=wireframe_path, reference_images=reference_images)
+            decoder = self._stream_decoder(theme, page_number, run_id=run_id)
+            with self._post(url, payload) as response:
+                try:
+                    for chunk in response.iter_content(STREAM_CHUNK_SIZE):
+                        decoder.feed(chunk)
+                    filename = self._finish_stream(decoder)[0]
+                except BaseException: # Interrupted too: never leave a half-written PNG in temp/
+                    decoder.abort()
+                    raise
+            self.cache.put(cache_key, filename)
+            return filename
 
         except Exception as e:
             logger.error(f"Image generation failed: {e}")
-            if 'response' in locals() and hasattr(response, 'text'):
+            self._log_error_body(e)
+            raise e
+
+    def _log_error_body(self, error):
+        """Logs the API error body of an HTTP error (image bodies are streamed, never logged)."""
+        response = getattr(error, "response", None)
+        if response is not None:
+            try:
                 logger.error(f"API Response: {response.text}")
+            except Exception:
+                pass
+
+    def cache_image(self, prompt, image_path):
+        """Stores an approved image in the generation cache (the async path caches only QA-passed images)."""
+        self.cache.put(self.cache.make_key(prompt), image_path)
+
+    async def _get_cached_async(self, prompt, theme, page_number, run_id=None):
+        return await asyncio.to_thread(
+            self.cache.get, self.cache.make_key(prompt), self._output_path(theme, page_number, run_id=run_id)
+        )
+
+    async def generate_image_async(self, prompt, theme, page_number, use_cache=True, run_id=None):
+        """
+        Async variant of generate_image for the orchestrator's event loop.
+        Uses non-blocking HTTP and pacing; the response is decoded to disk as it streams in.
+        Rate limiting and 429 handling live in _stream_async.
+        Results are not cached here; the orchestrator calls cache_image once QA approves one.
+        """
+        if use_cache:
+            cached = await self._get_cached_async(prompt, theme, page_number, run_id)
+            if cached:
+                return cached
+        return (await self._generate_async(prompt, theme, page_number, run_id=run_id))[0]
+
+    async def generate_candidates_async(self, prompt, theme, page_number, count, use_cache=True, run_id=None):
+        """
+        Generates `count` candidate images for one page.
+        Multi-sample backends (Imagen, stub) return all samples from a single request (sampleCount);
+        Gemini Flash has no multi-sample image output, so requests run concurrently.
+        Returns a list of image paths (a cache hit returns just the cached image).
+        """
+        if use_cache:
+            cached = await self._get_cached_async(prompt, theme, page_number, run_id)
+            if cached:
+                return [cached]
+
+        if self.backend.multi_sample:
+            return await self._generate_async(prompt, theme, page_number, sample_count=count, run_id=run_id)
+
+        results = await asyncio.gather(*(
+            self._generate_async(prompt, theme, page_number, first_index=i, run_id=run_id) for i in range(count)
+        ))
+        return [path for paths in results for path in paths]
+
+    async def _generate_async(self, prompt, theme, page_number, sample_count=1, first_index=None, run_id=None):
+        """One API request; returns the saved image paths."""
+        logger.info(f"Generating {sample_count} image(s) for prompt: {prompt[:50]}...")
+
+        try:
+            url, payload = self._build_request(prompt, sample_count)
+            decoder = self._stream_decoder(theme, page_number, sample_count, first_index, run_id)
+            try:
+                return await self._stream_async(url, payload, decoder)
+            except BaseException: # Cancelled too (a sibling page failed the gather): drop the partial PNG
+                decoder.abort()
+                raise
+
+        except Exception as e:
+            logger.error(f"Image generation failed: {e}")
+            self._log_error_body(e)
             raise e
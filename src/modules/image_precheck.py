@@ -0,0 +1,79 @@
+"""
+Image Pre-Check: Local Pre-QA Filter (Infrastructure)
+Mission: Never spend a vision model call on an obviously broken page.
+
+Agent Delta runs these vectorized NumPy checks before calling the QA model.
+The image is downscaled to PRECHECK_MAX_SIDE (nearest neighbour, so no gray
+levels are invented) and measured once:
+
+    color_ratio   pixels with HSV saturation above PRECHECK_SATURATION
+    gray_ratio    mid-gray pixels (histogram 25%-75% luminance): shading, gradients
+    ink           dark pixels (luminance below 50%): blank page / solid fills
+    edge_density  pixels with a strong luminance step to a neighbour: line work
+
+Thresholds are deliberately loose; anything plausible goes on to the model.
+Covers are full color, so they only get the blank-page and line-work checks.
+"""
+
+import logging
+import numpy as np
+from PIL import Image
+from src import config
+
+logger = logging.getLogger("ImagePreCheck")
+
+LUMA_WEIGHTS = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+EDGE_STEP = 0.25 # Luminance step (0-1) between neighbours that counts as an edge
+
+
+def measure(image_path, max_side=None):
+    """Returns the pre-check metrics of an image (fractions of its pixels)."""
+    max_side = max_side or config.PRECHECK_MAX_SIDE
+    with Image.open(image_path) as img:
+        img = img.convert("RGB")
+        scale = max_side / max(img.size)
+        if scale < 1:
+            img = img.resize((max(1, int(img.width * scale)), max(1, int(img.height * scale))), Image.NEAREST)
+        rgb = np.asarray(img, dtype=np.float32) / 255.0
+
+    high = rgb.max(axis=2)
+    low = rgb.min(axis=2)
+    # Saturation is meaningless for near-black pixels (sensor/JPEG noise), so they never count as colored
+    saturation = np.where(high > 0.15, (high - low) / np.maximum(high, 1e-6), 0.0)
+
+    luma = rgb @ LUMA_WEIGHTS
+    histogram = np.histogram(luma, bins=8, range=(0.0, 1.0))[0] / luma.size
+
+    step_x = np.abs(np.diff(luma, axis=1))[:-1, :] > EDGE_STEP
+    step_y = np.abs(np.diff(luma, axis=0))[:, :-1] > EDGE_STEP
+
+    return {
+        "color_ratio": float(np.mean(saturation > config.PRECHECK_SATURATION)),
+        "gray_ratio": float(histogram[2:6].sum()),
+        "ink": float(histogram[:4].sum()),
+        "edge_density": float(np.mean(step_x | step_y)) if step_x.size else 0.0
+    }
+
+
+def precheck(image_path, page_type=None):
+    """
+    Local verdict for one image: (passed, reason, metrics).
+    passed=False means the image is certainly unusable; True only means "worth a QA call".
+    """
+    metrics = measure(image_path)
+    checks = [
+        (metrics["ink"] < config.PRECHECK_MIN_INK, f"almost blank (ink {metrics['ink']:.2%})"),
+        (metrics["edge_density"] < config.PRECHECK_MIN_EDGE_DENSITY,
+         f"no line work (edge density {metrics['edge_density']:.2%})"),
+    ]
+    if page_type != "cover":
+        checks = [
+            (metrics["color_ratio"] > config.PRECHECK_MAX_COLOR_RATIO, f"colored ({metrics['color_ratio']:.1%} colored pixels)"),
+            (metrics["gray_ratio"] > config.PRECHECK_MAX_GRAY_RATIO, f"gray shading ({metrics['gray_ratio']:.1%} mid-gray pixels)"),
+            (metrics["ink"] > config.PRECHECK_MAX_INK, f"solid black fills (ink {metrics['ink']:.1%})"),
+            *checks
+        ]
+    for failed, reason in checks:
+        if failed:
+            return False, reason, metrics
+    return True, "", metrics
@@ -0,0 +1,162 @@
+"""
+Job Manifest: Durable Run Checkpoints (Infrastructure)
+Mission: Never pay twice for an image that already passed QA.
+
+One JSON file per run_id (config.MANIFEST_DIR) records the stage, the final
+prompt list, every generation attempt with its QA verdict, and the PDF path.
+A failed or crashed run can be resumed from its manifest; only missing work
+is redone.
+
+Layout:
+{
+  "run_id": "ab12cd34", "user_id": 123456, "theme": "Firefighter", "bible_version": "5.21",
+  "stage": "prompts" | "generation" | "assembly" | "completed" | "failed",
+  "prompts": [{"type", "page_number", "prompt"}, ...],
+  "pages": {"Cover": {"type", "status": "pending|passed|failed", "image_path", "attempts": [...]}},
+  "pdf_path": null, "error": null, "created_at": "...", "updated_at": "..."
+}
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+from datetime import datetime
+from src import config
+
+logger = logging.getLogger("JobManifest")
+
+# Run IDs are generated as str(uuid4())[:8]; anything else (e.g. "../x" from /resume) is rejected
+RUN_ID_PATTERN = re.compile(r"^[0-9a-f]{8}$")
+
+
+def is_valid_run_id(run_id):
+    return isinstance(run_id, str) and bool(RUN_ID_PATTERN.match(run_id))
+
+
+class JobManifest:
+    def __init__(self, data):
+        self.data = data
+        self.lock = threading.Lock()
+
+    @property
+    def run_id(self):
+        return self.data["run_id"]
+
+    @property
+    def user_id(self):
+        """Who submitted the run (None for runs without an owner, e.g. started from a script)."""
+        return self.data.get("user_id")
+
+    @property
+    def theme(self):
+        return self.data["theme"]
+
+    @property
+    def bible_version(self):
+        return self.data.get("bible_version") or config.BIBLE_VERSION
+
+    @property
+    def stage(self):
+        return self.data["stage"]
+
+    @property
+    def prompts(self):
+        return self.data["prompts"]
+
+    @staticmethod
+    def path_for(run_id):
+        """Manifest file of a run. Raises ValueError for a malformed run_id (never a path outside MANIFEST_DIR)."""
+        if not is_valid_run_id(run_id):
+            raise ValueError(f"Invalid run ID: {run_id!r}.")
+        return os.path.join(config.MANIFEST_DIR, f"{run_id}.json")
+
+    @classmethod
+    def create(cls, run_id, theme, bible_version=None, user_id=None):
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        manifest = cls({
+            "run_id": run_id,
+            "user_id": user_id,
+            "theme": theme,
+            "bible_version": bible_version or config.BIBLE_VERSION,
+            "stage": "prompts",
+            "prompts": [],
+            "pages": {},
+            "pdf_path": None,
+            "error": None,
+            "created_at": now,
+            "updated_at": now
+        })
+        manifest.save()
+        return manifest
+
+    @classmethod
+    def load(cls, run_id):
+        """Loads the manifest of a previous run. Raises ValueError if the run_id is malformed or has none."""
+        path = cls.path_for(run_id)
+        if not os.path.exists(path):
+            raise ValueError(f"No manifest found for run {run_id}.")
+        with open(path, "r") as f:
+            return cls(json.load(f))
+
+    def save(self):
+        """Atomic write (temp file + rename), so a crash never leaves a torn manifest."""
+        with self.lock:
+            self.data["updated_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            os.makedirs(config.MANIFEST_DIR, exist_ok=True)
+            path = self.path_for(self.run_id)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self.data, f, indent=2)
+            os.replace(tmp_path, path)
+
+    def set_stage(self, stage, error=None):
+        self.data["stage"] = stage
+        self.data["error"] = error
+        self.save()
+
+    def set_prompts(self, prompts):
+        self.data["prompts"] = prompts
+        self.data["stage"] = "generation"
+        self.save()
+
+    def set_pdf(self, pdf_path):
+        self.data["pdf_path"] = pdf_path
+        self.data["stage"] = "completed"
+        self.data["error"] = None
+        self.save()
+
+    def _page(self, page_key, page_type):
+        return self.data["pages"].setdefault(page_key, {
+            "type": page_type,
+            "status": "pending",
+            "image_path": None,
+            "attempts": []
+        })
+
+    def record_attempt(self, page_key, page_type, image_path, passed, reason=None):
+        """
+        Records one generated image and its QA verdict (reason: Agent Delta's explanation, if any).
+        The first passing image is the page's image; later passing candidates of the round are only logged.
+        """
+        page = self._page(page_key, page_type)
+        attempt = {"image_path": image_path, "qa": "PASS" if passed else "FAIL"}
+        if reason and not passed:
+            attempt["reason"] = reason
+        page["attempts"].append(attempt)
+        if passed and page["status"] != "passed":
+            page["status"] = "passed"
+            page["image_path"] = image_path
+        self.save()
+
+    def mark_failed(self, page_key, page_type):
+        self._page(page_key, page_type)["status"] = "failed"
+        self.save()
+
+    def completed_image(self, page_key):
+        """Image path of a page that already passed QA (and still exists on disk), else None."""
+        page = self.data["pages"].get(page_key)
+        if page and page["status"] == "passed" and page["image_path"] and os.path.exists(page["image_path"]):
+            return page["image_path"]
+        return None
@@ -0,0 +1,262 @@
+"""
+Key Pool: Sharded API Credentials (Infrastructure)
+Mission: Spread every model call across all provisioned API keys (projects).
+
+Each key in config.GOOGLE_API_KEYS has its own quota accounting (one rate
+limiter and adaptive controller per model and key, see get_limiter /
+get_controller), its own health state and its own cooldown:
+- 429             -> key benched for Retry-After (or KEY_COOLDOWN_SEC)
+- invalid/revoked -> key benched for KEY_DISABLE_SEC
+Calls go to the healthy key with the fewest calls in flight (least recently
+used on ties), so throughput grows with the number of keys. A 429 retry
+simply leases again and lands on another key.
+
+Every agent's model call goes through KeyPool.call / call_async: lease a key,
+wait for its limiter, run the request, report the outcome to the key's
+adaptive controller and the pool, retry on 429 (Retry-After honoured).
+
+With a single key everything behaves exactly as before: the key has no id and
+uses the model-wide limiter and controller.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from src import config
+from src.modules.rate_limiter import get_limiter
+from src.modules.adaptive_control import get_controller, retry_after_seconds, is_throttle_error
+
+logger = logging.getLogger("KeyPool")
+
+
+def key_limits(model_id, key, default=None):
+    """
+    Rate limiter and adaptive controller of one pooled key for a model.
+    A single-key pool uses the model-wide pair (default: the caller's own, else get_limiter/get_controller).
+    """
+    if key.id is None:
+        return default or (get_limiter(model_id), get_controller(model_id))
+    return get_limiter(model_id, key.id), get_controller(model_id, key.id)
+
+
+def is_auth_error(error):
+    """
+    True if the error means the key itself is unusable (invalid, revoked, API disabled).
+    error: an SDK/HTTP exception, or an HTTP error response whose body has been read.
+    """
+    response = error if hasattr(error, "status_code") else getattr(error, "response", None)
+    status = getattr(response, "status_code", None)
+    if status in (401, 403) or getattr(error, "code", None) in (401, 403):
+        return True
+    if type(error).__name__ in ("PermissionDenied", "Unauthenticated"):
+        return True
+    try:
+        text = response.text if response is error else str(error)
+    except Exception:
+        return False
+    return "API_KEY_INVALID" in text or "API key not valid" in text
+
+
+class PooledKey:
+    def __init__(self, key, key_id=None):
+        self.key = key
+        self.id = key_id # Log-safe name ("key2"); None for a single-key pool
+        self.cooldown_until = 0.0
+        self.in_flight = 0
+        self.last_used = 0.0
+        self.stats = {"success": 0, "throttled": 0, "failed": 0}
+        self.models = {} # model name -> GenerativeModel bound to this key
+        self.lock = threading.Lock()
+
+    def __repr__(self):
+        return self.id or "key"
+
+    def generative_model(self, model_name):
+        """
+        Gemini SDK model whose clients authenticate with this key (genai.configure is process-global).
+        The clients are the SDK's public low-level (GAPIC) clients; GenerativeModel only creates its
+        own default ones when _client/_async_client are unset (tested against the Pipfile's SDK pin).
+        The async client needs an event loop, so it is bound on the first call from one.
+        """
+        with self.lock:
+            model = self.models.get(model_name)
+            if model is None:
+                # Imported here so REST-only users (Agent Charlie) never load the SDK
+                import google.generativeai as genai
+                import google.ai.generativelanguage as glm
+                model = genai.GenerativeModel(model_name)
+                if not hasattr(model, "_client") or not hasattr(model, "_async_client"):
+                    # A newer SDK would silently fall back to the process-wide key
+                    raise RuntimeError("Unsupported google-generativeai version: cannot bind a model to a pooled key.")
+                model._client = glm.GenerativeServiceClient(client_options={"api_key": self.key})
+                self.models[model_name] = model
+            if model._async_client is None and _in_event_loop():
+                import google.ai.generativelanguage as glm
+                model._async_client = glm.GenerativeServiceAsyncClient(client_options={"api_key": self.key})
+            return model
+
+
+def _in_event_loop():
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+
+class KeyPool:
+    def __init__(self, keys=None):
+        keys = config.GOOGLE_API_KEYS if keys is None else keys
+        if len(keys) > 1:
+            self.keys = [PooledKey(key, f"key{i + 1}") for i, key in enumerate(keys)]
+        else:
+            self.keys = [PooledKey(keys[0] if keys else None)]
+        self.lock = threading.Lock()
+        if len(self.keys) > 1:
+            logger.info(f"API key pool: {len(self.keys)} keys.")
+
+    def __len__(self):
+        return len(self.keys)
+
+    @property
+    def primary(self):
+        """The first key (used for process-wide SDK configuration); None if no key is configured."""
+        return self.keys[0].key
+
+    def acquire(self):
+        """Picks the key for one call: healthy first, then fewest in flight, then least recently used."""
+        with self.lock:
+            now = time.monotonic()
+            ready = [key for key in self.keys if key.cooldown_until <= now]
+            # Every key benched: use the one that recovers first (its limiter holds the call back)
+            candidates = ready or [min(self.keys, key=lambda key: key.cooldown_until)]
+            key = min(candidates, key=lambda key: (key.in_flight, key.last_used))
+            key.in_flight += 1
+            key.last_used = now
+            return key
+
+    def release(self, key):
+        with self.lock:
+            key.in_flight -= 1
+
+    @contextmanager
+    def lease(self):
+        """Holds one key for the duration of a call."""
+        key = self.acquire()
+        try:
+            yield key
+        finally:
+            self.release(key)
+
+    # --- Model calls ---
+
+    def call(self, model_id, request, tokens=0, limits=None, label="Model call"):
+        """
+        Runs request(key) on a leased key under that key's rate limit, retrying on 429
+        (on another key when the pool has one). request raises on failure (SDK errors,
+        raise_for_status); its return value is returned.
+        limits: (limiter, controller) used with a single key (see key_limits).
+        """
+        retries = config.ADAPTIVE_MAX_THROTTLE_RETRIES
+        for attempt in range(retries + 1):
+            with self.lease() as key:
+                limiter, controller = key_limits(model_id, key, limits)
+                limiter.acquire(tokens)
+                start = time.monotonic()
+                try:
+                    result = request(key)
+                except Exception as e:
+                    if not self._on_failure(key, controller, e) or attempt == retries:
+                        raise
+                    logger.warning(f"{label} throttled (429). Retrying ({attempt+1}/{retries})...")
+                    continue
+                controller.on_success(time.monotonic() - start)
+                self.on_success(key)
+                return result
+
+    async def call_async(self, model_id, request, tokens=0, limits=None, label="Model call"):
+        """
+        Async variant of call: awaits request(key) inside the key's adaptive in-flight slot.
+        """
+        retries = config.ADAPTIVE_MAX_THROTTLE_RETRIES
+        for attempt in range(retries + 1):
+            with self.lease() as key:
+                limiter, controller = key_limits(model_id, key, limits)
+                async with controller.slot():
+                    await limiter.acquire_async(tokens)
+                    start = time.monotonic()
+                    try:
+                        result = await request(key)
+                    except Exception as e:
+                        if not self._on_failure(key, controller, e) or attempt == retries:
+                            raise
+                        logger.warning(f"{label} throttled (429). Retrying ({attempt+1}/{retries})...")
+                        continue
+                controller.on_success(time.monotonic() - start)
+                self.on_success(key)
+                return result
+
+    def _on_failure(self, key, controller, error):
+        """
+        Reports a failed call to adaptive control and the pool.
+        Returns True if it was a 429 (worth retrying, on another key when the pool has one).
+        """
+        if not is_throttle_error(error):
+            self.on_error(key, error)
+            return False
+        retry_after = retry_after_seconds(error)
+        controller.on_throttle(retry_after)
+        self.on_throttle(key, retry_after)
+        return True
+
+    # --- Health feedback ---
+
+    def on_success(self, key):
+        with self.lock:
+            key.stats["success"] += 1
+
+    def on_throttle(self, key, retry_after=None):
+        """Benches a key after a 429 so the next calls go to the others."""
+        pause = retry_after if retry_after is not None else config.KEY_COOLDOWN_SEC
+        with self.lock:
+            key.stats["throttled"] += 1
+            key.cooldown_until = max(key.cooldown_until, time.monotonic() + pause)
+        if len(self.keys) > 1:
+            logger.warning(f"API {key!r} throttled (429): cooling down {pause:.0f}s.")
+
+    def on_error(self, key, error):
+        """Records a failed call; an invalid or revoked key is benched for KEY_DISABLE_SEC."""
+        auth_error = is_auth_error(error)
+        with self.lock:
+            key.stats["failed"] += 1
+            if auth_error:
+                key.cooldown_until = time.monotonic() + config.KEY_DISABLE_SEC
+        if auth_error and len(self.keys) > 1:
+            logger.error(f"API {key!r} rejected ({error}). Disabled for {config.KEY_DISABLE_SEC:.0f}s.")
+
+    def status(self):
+        """Per-key health snapshot (no secrets), e.g. for logs and dashboards."""
+        now = time.monotonic()
+        with self.lock:
+            return [{
+                "id": key.id or "key1",
+                "healthy": key.cooldown_until <= now,
+                "cooldown_sec": round(max(0.0, key.cooldown_until - now), 1),
+                "in_flight": key.in_flight,
+                **key.stats
+            } for key in self.keys]
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_key_pool():
+    """Returns the process-wide API key pool."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = KeyPool()
+        return _pool
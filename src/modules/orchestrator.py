@@ -3,6 +3,8 @@ Agent Omega: Senior Project Manager (Orchestrator)
 Mission: Coordinate the entire lifecycle of a book generation.
 """
 
+import asyncio
+import contextlib
 import logging
 import uuid
 import time
@@ -12,6 +14,7 @@ from src.modules.prompt_generator import AgentBravo
 from src.modules.image_generator import AgentCharlie
 from src.modules.qa_agent import AgentDelta
 from src.modules.pdf_assembler import AgentEcho
+from src.modules.job_manifest import JobManifest
 
 logger = logging.getLogger("AgentOmega")
 
@@ -27,108 +30,161 @@ class AgentOmega:
         self.delta = AgentDelta()
         self.echo = AgentEcho()
         
-    async def start_job(self, theme, progress_callback=None):
+    def _page_label(self, p, i):
+        """Filename/manifest label for a page: 'Cover' or the zero-padded page number."""
+        if p['type'] == 'cover':
+            return "Cover"
+        # Use actual page number for naming
+        return str(p.get('page_number', i+1)).zfill(2)
+
+    async def _process_page(self, p, i, total_steps, theme, manifest):
+        """
+        Generates and QA-checks a single page (with retries).
+        Every attempt is checkpointed in the run manifest.
+        Returns the image path if it passed QA, None otherwise.
+        """
+        page_num_str = self._page_label(p, i)
+
+        # Resume: page already passed QA in an earlier attempt of this run
+        image_path = manifest.completed_image(page_num_str)
+        if image_path:
+            logger.info(f"Image {i+1}/{total_steps} ({p['type']}) restored from manifest: {image_path}")
+            return image_path
+
+        logger.info(f"Processing Image {i+1}/{total_steps} ({p['type']})...")
+        candidate_count = config.CANDIDATES_PER_PAGE
+        prompt = p['prompt']
+
+        # Generate -> QA rounds. Each round renders CANDIDATES_PER_PAGE images
+        # (one request on Imagen), QA-checks them together and keeps the first that passes.
+        # A failed round repairs the prompt from Delta's failed criteria before the next one.
+        for attempt in range(config.QA_MAX_ROUNDS):
+            # Retries always render fresh; a cached image would be the one that just failed
+            use_cache = attempt == 0
+            if candidate_count > 1:
+                candidates = await self.charlie.generate_candidates_async(
+                    prompt, theme, page_num_str, candidate_count, use_cache=use_cache, run_id=manifest.run_id
+                )
+            else:
+                candidates = [await self.charlie.generate_image_async(
+                    prompt, theme, page_num_str, use_cache=use_cache, run_id=manifest.run_id
+                )]
+
+            verdicts = await asyncio.gather(*(self.delta.review_async(c, p['type']) for c in candidates))
+            for candidate, verdict in zip(candidates, verdicts):
+                manifest.record_attempt(page_num_str, p['type'], candidate, verdict['passed'], verdict.get('reason'))
+
+            for candidate, verdict in zip(candidates, verdicts):
+                if verdict['passed']:
+                    # Cached under the page's original prompt: that is what the next run looks up
+                    await asyncio.to_thread(self.charlie.cache_image, p['prompt'], candidate)
+                    return candidate
+
+            if attempt + 1 < config.QA_MAX_ROUNDS:
+                failed_criteria = sorted({n for verdict in verdicts for n in verdict.get('failed_criteria', [])})
+                repaired = self.bravo.repair_prompt(prompt, verdicts, p['type'])
+                logger.warning(
+                    f"Image {i+1} failed QA ({len(candidates)} candidate(s), criteria {failed_criteria or 'unknown'}). "
+                    f"Retrying ({attempt+1}/{config.QA_MAX_ROUNDS - 1})"
+                    f"{' with a repaired prompt' if repaired != prompt else ''}..."
+                )
+                prompt = repaired
+
+        logger.error(f"Image {i+1} failed QA after retries. Skipping.")
+        manifest.mark_failed(page_num_str, p['type'])
+        return None
+
+    async def start_job(self, theme, progress_callback=None, page_slots=None, resume_run_id=None, bible_version=None,
+                        user_id=None):
         """
         Starts the book generation process for a given theme.
+        page_slots: optional semaphore shared across jobs (JobScheduler's global cap on in-flight pages).
+        resume_run_id: resume an earlier run from its manifest (theme is taken from the manifest).
+        bible_version: Series Master Bible to build prompts from (default: config.BIBLE_VERSION).
+        user_id: owner recorded in the manifest; a resume by anyone else raises PermissionError.
         """
-        run_id = str(uuid.uuid4())[:8]
-        logger.info(f"Starting job {run_id} for theme: {theme}")
-        
-        # 1. Initialize Tracking
-        self.golf.start_job(run_id, theme)
+        # Blocking calls (Sheets, Bravo's SDK calls, PDF assembly) run in worker threads
+        # so the bot's event loop keeps serving other users while a job runs.
+        if resume_run_id:
+            manifest = JobManifest.load(resume_run_id)
+            if user_id is not None and manifest.user_id != user_id:
+                raise PermissionError(f"Run {resume_run_id} belongs to another user.")
+            run_id = manifest.run_id
+            theme = manifest.theme
+            logger.info(f"Resuming job {run_id} for theme: {theme} (stage: {manifest.stage})")
+            await asyncio.to_thread(self.golf.update_progress, run_id, "RESUMED")
+        else:
+            run_id = str(uuid.uuid4())[:8]
+            logger.info(f"Starting job {run_id} for theme: {theme}")
+            manifest = JobManifest.create(run_id, theme, bible_version, user_id)
+
+            # 1. Initialize Tracking
+            await asyncio.to_thread(self.golf.start_job, run_id, theme)
         
         try:
-            if progress_callback:
-                await progress_callback(f"⚙️ Phase: Agent Bravo\n📊 Progress: 0/4\n📝 Status: Generating prompts...")
+            if manifest.prompts:
+                # 2. Prompts already checkpointed (resumed run)
+                logger.info(f"Reusing {len(manifest.prompts)} prompts from manifest.")
+                prompts = manifest.prompts
+            else:
+                prompts = await self._generate_prompts(theme, progress_callback, manifest.bible_version)
+                manifest.set_prompts(prompts)
 
-            # 2. Generate Prompts
-            logger.info("Agent Bravo: Generating prompts...")
-            
-            # Get Interior Prompts & Context
-            prompt_data = self.bravo.generate_prompts(theme)
-            prompts = prompt_data['prompts']
-            
-            # Generate Cover using the SAME context
-            cover_prompt = self.bravo.generate_cover(
-                theme, 
-                prompt_data['main_character'], 
-                prompt_data['gear_objects']
-            )
-            
-            # Insert Cover at the beginning
-            prompts.insert(0, {
-                "type": "cover",
-                "page_number": 1, # Cover is technically Page 1 in this context, or we can treat it as special. 
-                                  # If user says "1,50", they likely mean Cover (1) and Cert (50).
-                "prompt": cover_prompt
-            })
-            
             generated_images = []
             preview_images = {} # Store paths by type for preview
-            
-            # Limit prompts based on TARGET_PAGES or PAGE_COUNT
-            if config.TARGET_PAGES_LIST:
-                logger.info(f"Filtering generation to pages: {config.TARGET_PAGES_LIST}")
-                # Filter prompts where page_number is in TARGET_PAGES_LIST
-                filtered_prompts = []
-                for p in prompts:
-                    # Default to 0 if no page_number (shouldn't happen with new logic)
-                    pg = p.get('page_number', 0)
-                    if pg in config.TARGET_PAGES_LIST:
-                        filtered_prompts.append(p)
-                prompts = filtered_prompts
-            elif len(prompts) > config.PAGE_COUNT:
-                logger.info(f"Limiting generation to {config.PAGE_COUNT} pages (PAGE_COUNT).")
-                prompts = prompts[:config.PAGE_COUNT]
-
-            # 3. Generation Loop
+
+            # 3. Generation Pipeline
+            # Pages run through Charlie & Delta concurrently (bounded by PIPELINE_CONCURRENCY).
+            # Results are collected by index so Agent Echo still receives book order.
             total_steps = len(prompts)
-            for i, p in enumerate(prompts):
-                if progress_callback:
-                    await progress_callback(f"⚙️ Phase: Agent Charlie & Delta\n📊 Progress: {i}/{total_steps}\n📝 Status: Generating {p['type']} image...")
+            concurrency = config.PIPELINE_CONCURRENCY
+            logger.info(f"Generation pipeline: {total_steps} pages, {concurrency} in flight.")
+            semaphore = asyncio.Semaphore(concurrency)
+            passed_count = 0
 
-                logger.info(f"Processing Image {i+1}/{len(prompts)} ({p['type']})...")
-                
-                # Generate
-                # Use actual page number for naming
-                pg_num = p.get('page_number', i+1)
-                page_num_str = str(pg_num).zfill(2)
-                if p['type'] == 'cover':
-                    page_num_str = "Cover"
-                
-                image_path = self.charlie.generate_image(p['prompt'], theme, page_num_str)
-                
-                # QA Check (Retry Loop)
-                passed = False
-                retries = 0
-                while not passed and retries < 3:
-                    passed = self.delta.quality_check(image_path)
-                    if not passed:
-                        logger.warning(f"Image {i+1} failed QA. Retrying ({retries+1}/3)...")
-                        retries += 1
-                        # Retry generation
-                        image_path = self.charlie.generate_image(p['prompt'], theme, page_num_str)
-                
-                if passed:
+            async def run_page(i, p):
+                nonlocal passed_count
+                async with semaphore, (page_slots or contextlib.nullcontext()):
+                    if progress_callback:
+                        await progress_callback(f"⚙️ Phase: Agent Charlie & Delta\n📊 Progress: {passed_count}/{total_steps}\n📝 Status: Generating {p['type']} image...")
+                    image_path = await self._process_page(p, i, total_steps, theme, manifest)
+                if image_path:
+                    passed_count += 1
+                    await asyncio.to_thread(self.golf.update_progress, run_id, f"Image {i+1} Generated", passed_count)
+                return image_path
+
+            tasks = [asyncio.create_task(run_page(i, p)) for i, p in enumerate(prompts)]
+            try:
+                results = await asyncio.gather(*tasks)
+            except Exception:
+                # Stop the remaining pages; the job is failing anyway
+                for task in tasks:
+                    task.cancel()
+                raise
+
+            for p, image_path in zip(prompts, results):
+                if image_path:
                     generated_images.append(image_path)
                     preview_images[p['type']] = image_path
-                    self.golf.update_progress(run_id, f"Image {i+1} Generated", len(generated_images))
-                else:
-                    logger.error(f"Image {i+1} failed QA after retries. Skipping.")
             
             # 4. Assembly
             if generated_images:
+                manifest.set_stage("assembly")
                 if progress_callback:
                     await progress_callback(f"⚙️ Phase: Agent Echo\n📊 Progress: {len(generated_images)}/{total_steps}\n📝 Status: Assembling PDF...")
 
                 logger.info("Agent Echo: Assembling PDF...")
-                pdf_path = self.echo.assemble_pdf(generated_images)
+                pdf_path = await asyncio.to_thread(self.echo.assemble_pdf, generated_images)
+                if not pdf_path:
+                    raise Exception(f"PDF assembly failed. Resume with run ID {run_id}.")
+                manifest.set_pdf(pdf_path)
                 
                 # 5. Finish
                 # In real app, upload to Drive and get link
                 drive_link = f"file://{pdf_path}" 
-                self.golf.finish_job(run_id, drive_link)
+                await asyncio.to_thread(self.golf.finish_job, run_id, drive_link)
                 logger.info(f"Job {run_id} completed successfully.")
+                logger.info(f"QA stages so far: {self.delta.cascade_status()}")
                 
                 return {
                     "status": "SUCCESS",
@@ -140,10 +196,45 @@ class AgentOmega:
             else:
                 error_msg = "No images generated. Job failed."
                 logger.error(error_msg)
-                self.golf.log_error(run_id, error_msg)
+                await asyncio.to_thread(self.golf.log_error, run_id, error_msg)
                 raise Exception(error_msg)
                 
         except Exception as e:
             logger.error(f"Job {run_id} failed: {e}")
-            self.golf.log_error(run_id, str(e))
+            manifest.set_stage("failed", str(e))
+            await asyncio.to_thread(self.golf.log_error, run_id, str(e))
+            e.run_id = run_id # Lets callers (bot, batch runner) resume this run from its manifest
             raise e
+
+    async def _generate_prompts(self, theme, progress_callback=None, bible_version=None):
+        """
+        Runs Agent Bravo and returns the (filtered) page prompt list, Cover first.
+        """
+        if progress_callback:
+            await progress_callback(f"⚙️ Phase: Agent Bravo\n📊 Progress: 0/4\n📝 Status: Generating prompts...")
+
+        # 2. Generate Prompts
+        logger.info("Agent Bravo: Generating prompts...")
+
+        # Cover + Interior Prompts (same context), dispatched concurrently.
+        # Bravo only builds the targeted pages; the Cover is System Page 1 ("1,50" = Cover + Cert).
+        target_pages = config.TARGET_PAGES_LIST or None
+        prompt_data = await self.bravo.generate_prompts_async(theme, target_pages, bible_version)
+        prompts = prompt_data['prompts']
+
+        # Limit prompts based on TARGET_PAGES or PAGE_COUNT
+        if config.TARGET_PAGES_LIST:
+            logger.info(f"Filtering generation to pages: {config.TARGET_PAGES_LIST}")
+            # Filter prompts where page_number is in TARGET_PAGES_LIST
+            filtered_prompts = []
+            for p in prompts:
+                # Default to 0 if no page_number (shouldn't happen with new logic)
+                pg = p.get('page_number', 0)
+                if pg in config.TARGET_PAGES_LIST:
+                    filtered_prompts.append(p)
+            prompts = filtered_prompts
+        elif len(prompts) > config.PAGE_COUNT:
+            logger.info(f"Limiting generation to {config.PAGE_COUNT} pages (PAGE_COUNT).")
+            prompts = prompts[:config.PAGE_COUNT]
+
+        return prompts
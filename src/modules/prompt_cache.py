@@ -0,0 +1,88 @@
+"""
+Prompt Cache: Memoized Smart Prompts (Infrastructure)
+Mission: Don't ask the Art Director the same question twice.
+
+Agent Bravo's smart prompts are kept in memory, keyed by theme, page type, the
+hashes of the Bible spec and the Style DNA, the model and the wireframe/structure
+reference bytes. Entries expire after PROMPT_CACHE_TTL_SEC and the least recently
+used ones are dropped beyond PROMPT_CACHE_MAX_ENTRIES.
+PROMPT_CACHE_FORCE_FRESH=true (or force_fresh=True per call) bypasses lookups
+for creative variety; fresh prompts still replace the cached ones.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from src import config
+from src.modules.reference_registry import get_reference_registry
+
+logger = logging.getLogger("PromptCache")
+
+
+def _sha(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class PromptCache:
+    def __init__(self, ttl=None, max_entries=None, enabled=None):
+        self.ttl = ttl if ttl is not None else config.PROMPT_CACHE_TTL_SEC
+        self.max_entries = max_entries if max_entries is not None else config.PROMPT_CACHE_MAX_ENTRIES
+        self.enabled = config.PROMPT_CACHE_ENABLED if enabled is None else enabled
+        self.entries = OrderedDict() # key -> (expires_at, prompt), oldest first
+        self.lock = threading.Lock()
+
+    def make_key(self, theme, page_type, spec, dna, reference_paths=()):
+        """Hash of everything that shapes a smart prompt."""
+        digest = hashlib.sha256()
+        for part in (theme, page_type, _sha(spec), _sha(dna), config.QA_MODEL_NAME):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        references = get_reference_registry()
+        for path in reference_paths:
+            # Missing reference: prompt was built without it
+            digest.update((references.digest(path) or "missing").encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Returns the cached prompt, or None on a miss / expired entry."""
+        if not self.enabled:
+            return None
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires_at, prompt = entry
+            if expires_at < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key) # LRU: mark as recently used
+            return prompt
+
+    def put(self, key, prompt):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, prompt)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_prompt_cache():
+    """Returns the process-wide smart prompt cache."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = PromptCache()
+        return _cache
@@ -3,21 +3,49 @@ Agent Bravo: Executive Creative Director (Prompt Logic)
 Mission: Ensure the "Director" logic strictly adheres to the visual style guidelines.
 """
 
+import asyncio
+import json
 import logging
-import time
 import glob
 import os
 import google.generativeai as genai
-from PIL import Image
 from src import config
+from src.modules.rate_limiter import get_limiter, estimate_tokens
+from src.modules.adaptive_control import get_controller
+from src.modules.dna_store import get_dna_store
+from src.modules.bible_store import get_bible
+from src.modules.prompt_cache import get_prompt_cache
+from src.modules.reference_registry import get_reference_registry
+from src.modules.key_pool import get_key_pool
 
 logger = logging.getLogger("AgentBravo")
 
+# Cover is System Page 1 (see AgentOmega); TARGET_PAGES uses the same numbering
+COVER_PAGE_NUMBER = 1
+
 class AgentBravo:
+    # Reference asset types with a Master Style Reference (assets/ref_<type>_01.png)
+    DNA_ASSET_TYPES = [
+        "cover", "page_01", "page_02", "page_03",
+        "knolling", "action", "certificate"
+    ]
+
+    # Logical page type -> asset filename key
+    ASSET_MAP = {
+        "mission": "page1",
+        "parents": "page2",
+        "intro": "page3",
+        "knolling": "page4",
+        "action": "page5",
+        "certificate": "page50",
+        "cover": "cover"
+    }
+
     def __init__(self):
         logger.info("Agent Bravo initialized.")
         # Initialize Gemini Vision for analysis
-        api_key = os.getenv("GOOGLE_API_KEY")
+        self.keys = get_key_pool() # Calls are spread across every configured API key
+        api_key = self.keys.primary
         if api_key:
             genai.configure(api_key=api_key)
             self.vision_model = genai.GenerativeModel(config.QA_MODEL_NAME) # Use the smart model (Gemini 2.5 Pro)
@@ -25,6 +53,11 @@ class AgentBravo:
             logger.error("GOOGLE_API_KEY not found.")
             
         self.style_library = {} # Stores extracted DNA
+        self.limiter = get_limiter(config.QA_MODEL_NAME) # Shared with Agent Delta (same model)
+        self.controller = get_controller(config.QA_MODEL_NAME)
+        self.dna_store = get_dna_store() # DNA persisted across jobs and restarts
+        self.prompt_cache = get_prompt_cache() # Smart prompts memoized across jobs
+        self.references = get_reference_registry() # Reference images loaded once, preprocessed
 
         # 5.2 NEGATIVE DNA LIBRARY
         self.NEGATIVE_GLOBAL = "text, font, letters, words, watermark, signature, copyright info, barcode, qr code, shading, gradients, grayscale, colored, filled, 3d render, realistic photo, sketch lines, dithering, noise, blur, low quality, pixelated, jpeg artifacts, cropped, cut off, duplicate, deformed"
@@ -32,140 +65,179 @@ class AgentBravo:
         self.NEGATIVE_ACTION = "knolling grid, static pose, floating objects, multiple horizons, text bubbles, speech balloons, frame border, cut off limbs, babyish proportions, scary"
         self.NEGATIVE_COVER = "barcode placeholder, price tag, low resolution, dull colors, messy sketch, cutoff character, internal page guides"
 
-    def _rate_limit(self):
-        """Applies rate limiting delay."""
-        logger.info(f"Sleeping for {config.PROMPT_GEN_DELAY}s (Rate Limit)...")
-        time.sleep(config.PROMPT_GEN_DELAY)
+        # 5.3 QA REPAIR DNA (Agent Delta's criterion number -> positive fix, extra negative terms)
+        self.REPAIR_DNA = {
+            1: ("pure black ink outlines on a plain white background, line art only", "solid black fills, filled areas, realistic photo, painting"),
+            2: ("no shading at all, every area left white for coloring", "shading, grayscale, gradients, halftone, hatching, cross hatching, colored areas"),
+            3: ("bold, continuous, closed outlines of even width", "broken lines, gaps in outlines, faint lines, sketchy strokes, dotted lines"),
+            4: ("no text, letters or numbers anywhere in the image", "text, letters, numbers, captions, labels, signs, gibberish writing"),
+            5: ("depict exactly the subject described above, nothing else", "unrelated objects, empty scene, missing subject"),
+        }
+
+    def _model(self, key):
+        """Vision model authenticated with one pooled key (the process-wide model for a single key)."""
+        return self.vision_model if key.id is None else key.generative_model(config.QA_MODEL_NAME)
+
+    def _generate_content(self, inputs, tokens=0):
+        """Model call under the shared rate limit, retrying on 429."""
+        return self.keys.call(
+            config.QA_MODEL_NAME,
+            lambda key: self._model(key).generate_content(inputs),
+            tokens, (self.limiter, self.controller), "Prompt generation"
+        )
+
+    async def _generate_content_async(self, inputs, tokens=0, generation_config=None):
+        """Async model call under the shared rate limit and adaptive in-flight cap, retrying on 429."""
+        kwargs = {"generation_config": generation_config} if generation_config else {}
+        return await self.keys.call_async(
+            config.QA_MODEL_NAME,
+            lambda key: self._model(key).generate_content_async(inputs, **kwargs),
+            tokens, (self.limiter, self.controller), "Prompt generation"
+        )
+
+    def _dna_source(self, page_type):
+        """
+        Asset type whose DNA _generate_smart_prompt uses for a page type
+        (falls back to the Cover DNA when the page has no analyzable reference).
+        """
+        asset_key = self.ASSET_MAP.get(page_type, page_type)
+        return asset_key if asset_key in self.DNA_ASSET_TYPES else "cover"
 
-    def analyze_assets(self):
+    def _dna_asset_types(self, page_types):
+        """Asset types to analyze so every given page type finds its DNA."""
+        needed = {self._dna_source(page_type) for page_type in page_types}
+        return [asset_type for asset_type in self.DNA_ASSET_TYPES if asset_type in needed]
+
+    def analyze_assets(self, asset_types=None):
         """
         Analyzes reference assets to extract Shared Visual DNA.
+        asset_types limits the analysis (one vision call each); default is every type.
         """
         logger.info("Agent Bravo: Analyzing assets for Visual DNA...")
         
-        asset_types = [
-            "cover", "page_01", "page_02", "page_03", 
-            "knolling", "action", "certificate"
-        ]
+        if asset_types is None:
+            asset_types = self.DNA_ASSET_TYPES
         
         for asset_type in asset_types:
-            # Find all matching files
-            # Strict filtering: Only use *_01.png as the Master Style Reference
-            # This avoids picking up _wireframe or _structure files
-            files = glob.glob(f"assets/ref_{asset_type}_01.png")
-            
-            if not files:
-                # Fallback to broader search but exclude keywords
-                all_files = glob.glob(f"assets/ref_{asset_type}_*.png")
-                files = [f for f in all_files if "_wireframe" not in f and "_structure" not in f]
+            files = self._reference_files(asset_type)
             
             if not files:
                 logger.warning(f"No reference images found for {asset_type}. Using default style.")
                 self.style_library[f"dna_{asset_type}"] = "[Default Style: Black and white line art, coloring book style]"
                 continue
                 
+            prompt = (
+                f"Analyze these {len(files)} reference images collectively. "
+                "Ignore specific characters or objects. "
+                "Extract the 'Shared Visual DNA' (line weight, shading rules, composition layout, whitespace usage) "
+                "into a detailed, comma-separated style description string. "
+                "Focus on technical artistic attributes suitable for an image generation prompt."
+            )
+            
+            # Reference files unchanged since the last analysis: reuse the stored DNA
+            key = self.dna_store.make_key(asset_type, files, prompt)
+            dna = self.dna_store.get(key)
+            if dna:
+                self.style_library[f"dna_{asset_type}"] = dna
+                logger.info(f"Loaded stored DNA for {asset_type}: {dna[:50]}...")
+                continue
+                
             logger.info(f"Analyzing {len(files)} images for {asset_type}...")
             
             try:
-                # Load images
-                images = [Image.open(f) for f in files[:5]] # Limit to 5 max
-                
-                prompt = (
-                    f"Analyze these {len(images)} reference images collectively. "
-                    "Ignore specific characters or objects. "
-                    "Extract the 'Shared Visual DNA' (line weight, shading rules, composition layout, whitespace usage) "
-                    "into a detailed, comma-separated style description string. "
-                    "Focus on technical artistic attributes suitable for an image generation prompt."
-                )
+                # Preprocessed inline blobs from the registry (no file handles left open)
+                images = [part for part in (self.references.part(f) for f in files) if part]
                 
-                self._rate_limit()
-                response = self.vision_model.generate_content([prompt, *images])
+                response = self._generate_content([prompt, *images], estimate_tokens(prompt, len(images)))
                 dna = response.text.strip()
                 self.style_library[f"dna_{asset_type}"] = dna
+                self.dna_store.put(key, asset_type, files, dna)
                 logger.info(f"Extracted DNA for {asset_type}: {dna[:50]}...")
                 
             except Exception as e:
                 logger.error(f"Failed to analyze assets for {asset_type}: {e}")
                 self.style_library[f"dna_{asset_type}"] = "[Fallback Style: Black and white line art]"
 
-    def _extract_bible_specs(self, section_tag):
+    def _reference_files(self, asset_type):
+        """
+        Master Style Reference files for an asset type (max 5).
+        """
+        # Strict filtering: Only use *_01.png as the Master Style Reference
+        # This avoids picking up _wireframe or _structure files
+        files = glob.glob(f"assets/ref_{asset_type}_01.png")
+        
+        if not files:
+            # Fallback to broader search but exclude keywords
+            all_files = glob.glob(f"assets/ref_{asset_type}_*.png")
+            files = [f for f in all_files if "_wireframe" not in f and "_structure" not in f]
+        
+        return sorted(files)[:5] # Limit to 5 max
+
+    def warm_dna(self):
+        """
+        Pre-computes the DNA a full book uses (only missing or changed references cost an API call).
+        """
+        logger.info("Agent Bravo: Warming Visual DNA store...")
+        self.analyze_assets(self._dna_asset_types(self.ASSET_MAP))
+
+    def _extract_bible_specs(self, section_tag, bible_version=None):
         """
         Extracts the specific text block for a given tag from the Series Master Bible.
+        bible_version selects the Bible file (default: config.BIBLE_VERSION).
         """
-        bible_path = "Series Master Bible v5.21.md"
-        if not os.path.exists(bible_path):
-            logger.warning(f"Bible not found at {bible_path}")
+        bible = get_bible(bible_version)
+        if not bible.exists():
+            logger.warning(f"Bible not found at {bible.path}")
             return ""
             
         try:
-            with open(bible_path, "r") as f:
-                content = f.read()
-                
-            # Find the section
-            start_idx = content.find(section_tag)
-            if start_idx == -1:
-                logger.warning(f"Section {section_tag} not found in Bible.")
-                return ""
-                
-            # Find the next section (starts with #### [) or end of file
-            # We assume sections start with #### [TAG]
-            # We want to capture everything until the next ####
-            
-            # Start after the tag line
-            content_after_tag = content[start_idx:]
-            # Find next header
-            next_header_idx = content_after_tag.find("#### [", 1) 
-            
-            if next_header_idx != -1:
-                return content_after_tag[:next_header_idx].strip()
-            else:
-                return content_after_tag.strip()
-                
+            # Served from the in-memory section index (re-parsed only when the file changes)
+            spec = bible.section(section_tag)
         except Exception as e:
             logger.error(f"Failed to extract Bible specs: {e}")
             return ""
+            
+        if not spec:
+            logger.warning(f"Section {section_tag} not found in Bible.")
+        return spec
 
-    def _generate_smart_prompt(self, page_type, theme, specific_context):
+    def _smart_prompt_request(self, page_type, theme, specific_context, force_fresh=None):
         """
-        Generates a smart prompt using Wireframe + Structure + DNA.
+        Prepares a smart prompt call using Wireframe + Structure + DNA.
         Handles mapping from logical page type to asset filename.
+        Returns (request, cached_prompt): cached_prompt is set (and request is None) when an
+        identical prompt is in the prompt cache and force_fresh is off (default: config.PROMPT_CACHE_FORCE_FRESH).
         """
-        # Asset Mapping
-        asset_map = {
-            "mission": "page1",
-            "parents": "page2",
-            "intro": "page3",
-            "knolling": "page4",
-            "action": "page5",
-            "certificate": "page50",
-            "cover": "cover"
-        }
-        
-        asset_key = asset_map.get(page_type, page_type)
+        if force_fresh is None:
+            force_fresh = config.PROMPT_CACHE_FORCE_FRESH
+
+        asset_key = self.ASSET_MAP.get(page_type, page_type)
         logger.info(f"Generating Smart Prompt for {page_type} (Asset Key: {asset_key})...")
-        self._rate_limit()
 
-        # 1. Load Wireframe (Geometry)
         wireframe_path = f"assets/ref_{asset_key}_layout_wireframe_kdp.png"
-        wireframe_img = None
-        if os.path.exists(wireframe_path):
-            wireframe_img = Image.open(wireframe_path)
-        else:
-            logger.warning(f"Wireframe not found for {asset_key}: {wireframe_path}")
-
-        # 2. Load Structure Example (Context)
         structure_path = f"assets/ref_{asset_key}_structure_example.png"
-        structure_img = None
-        if os.path.exists(structure_path):
-            structure_img = Image.open(structure_path)
-        else:
-            logger.warning(f"Structure example not found for {asset_key}: {structure_path}")
 
-        # 3. Get DNA
+        # 0. Same theme, spec, DNA, model and references as an earlier run: reuse its prompt
         dna_key = f"dna_{asset_key}"
         dna = self.style_library.get(dna_key, self.style_library.get("dna_cover", "black and white line art"))
+        cache_key = self.prompt_cache.make_key(theme, page_type, specific_context, dna, (wireframe_path, structure_path))
+        if not force_fresh:
+            cached_prompt = self.prompt_cache.get(cache_key)
+            if cached_prompt:
+                logger.info(f"Smart Prompt cache hit for {page_type} ({theme}).")
+                return None, cached_prompt
+
+        # 1. Load Wireframe (Geometry)
+        wireframe_img = self.references.part(wireframe_path)
+        if not wireframe_img:
+            logger.warning(f"Wireframe not found for {asset_key}: {wireframe_path}")
+
+        # 2. Load Structure Example (Context)
+        structure_img = self.references.part(structure_path)
+        if not structure_img:
+            logger.warning(f"Structure example not found for {asset_key}: {structure_path}")
 
-        # 4. Construct Meta-Prompt
+        # 3. Construct Meta-Prompt
         # CRITICAL: Explicit instruction to ignore colored lines in output
         color_instruction = ""
         if page_type != "cover":
@@ -197,37 +269,113 @@ class AgentBravo:
             "Output ONLY the raw prompt string, no markdown."
         )
 
-        try:
-            inputs = [meta_prompt]
-            if wireframe_img:
-                inputs.append(wireframe_img)
-            if structure_img:
-                inputs.append(structure_img)
-                
-            response = self.vision_model.generate_content(inputs)
-            final_prompt = response.text.strip()
+        inputs = [meta_prompt]
+        if wireframe_img:
+            inputs.append(wireframe_img)
+        if structure_img:
+            inputs.append(structure_img)
+
+        return {
+            "inputs": inputs,
+            "tokens": estimate_tokens(meta_prompt, len(inputs) - 1),
+            "cache_key": cache_key,
+            "dna": dna,
+            # Pieces reused by the single-call book plan
+            "context": specific_context,
+            "color_instruction": color_instruction,
+            "images": [(label, img) for label, img in (("WIREFRAME", wireframe_img), ("STRUCTURE EXAMPLE", structure_img)) if img]
+        }, None
+
+    def _finish_smart_prompt(self, page_type, text, request):
+        """Appends the page's Negative DNA to the model's prompt text and caches the result."""
+        final_prompt = text.strip()
+        
+        # Append Negative DNA
+        negative_dna = self.NEGATIVE_GLOBAL
+        if page_type == "knolling":
+            negative_dna += f", {self.NEGATIVE_KNOLLING}"
+        elif page_type == "action":
+            negative_dna += f", {self.NEGATIVE_ACTION}"
+        elif page_type == "cover":
+            negative_dna += f", {self.NEGATIVE_COVER}"
             
-            # Append Negative DNA
-            negative_dna = self.NEGATIVE_GLOBAL
-            if page_type == "knolling":
-                negative_dna += f", {self.NEGATIVE_KNOLLING}"
-            elif page_type == "action":
-                negative_dna += f", {self.NEGATIVE_ACTION}"
-            elif page_type == "cover":
-                negative_dna += f", {self.NEGATIVE_COVER}"
-                
-            final_prompt += f" --negative_prompt: {negative_dna}"
+        final_prompt += f" --negative_prompt: {negative_dna}"
+        
+        self.prompt_cache.put(request["cache_key"], final_prompt)
+        return final_prompt
+
+    def repair_prompt(self, prompt, verdicts, page_type=None):
+        """
+        Amends an image prompt after a failed QA round instead of retrying it verbatim.
+        verdicts: Agent Delta's FAIL verdicts of the round. Each failed criterion adds its
+        QA REPAIR DNA fix to the prompt and its terms to the Negative DNA (once, however often it fails).
+        Covers skip config.QA_COVER_EXEMPT_CRITERIA: they stay full color.
+        Returns the prompt unchanged if no criterion is known.
+        """
+        exempt = config.QA_COVER_EXEMPT_CRITERIA if page_type == "cover" else []
+        failed = sorted({number for verdict in verdicts for number in verdict.get("failed_criteria", [])
+                         if number in self.REPAIR_DNA and number not in exempt})
+        if not failed:
+            return prompt
+
+        body, _, negative_dna = prompt.partition(" --negative_prompt: ")
+        negative_terms = [term.strip() for term in negative_dna.split(",") if term.strip()]
+        fixes = []
+        for number in failed:
+            fix, terms = self.REPAIR_DNA[number]
+            if fix not in body:
+                fixes.append(fix)
+            negative_terms.extend(term for term in terms.split(", ") if term not in negative_terms)
+
+        if fixes:
+            body = f"{body.rstrip().rstrip('.')}. QA FIX: {'; '.join(fixes)}."
+        return f"{body} --negative_prompt: {', '.join(negative_terms)}"
+
+    def _generate_smart_prompt(self, page_type, theme, specific_context, force_fresh=None):
+        """
+        Generates a smart prompt using Wireframe + Structure + DNA (served from the prompt cache when possible).
+        """
+        request, cached_prompt = self._smart_prompt_request(page_type, theme, specific_context, force_fresh)
+        if cached_prompt:
+            return cached_prompt
+
+        try:
+            response = self._generate_content(request["inputs"], request["tokens"])
+            return self._finish_smart_prompt(page_type, response.text, request)
             
-            return final_prompt
+        except Exception as e:
+            logger.error(f"Failed to generate smart prompt for {page_type}: {e}")
+            return f"{specific_context}, {request['dna']} --negative_prompt: {self.NEGATIVE_GLOBAL}"
+
+    async def _generate_smart_prompt_async(self, page_type, theme, specific_context, force_fresh=None):
+        """
+        Async variant of _generate_smart_prompt; many of these run concurrently under the shared limiter.
+        """
+        # Reference loading, hashing and the prompt cache lookup block: keep them off the event loop
+        request, cached_prompt = await asyncio.to_thread(
+            self._smart_prompt_request, page_type, theme, specific_context, force_fresh
+        )
+        if cached_prompt:
+            return cached_prompt
+
+        try:
+            response = await self._generate_content_async(request["inputs"], request["tokens"])
+            return self._finish_smart_prompt(page_type, response.text, request)
             
         except Exception as e:
             logger.error(f"Failed to generate smart prompt for {page_type}: {e}")
-            return f"{specific_context}, {dna} --negative_prompt: {self.NEGATIVE_GLOBAL}"
+            return f"{specific_context}, {request['dna']} --negative_prompt: {self.NEGATIVE_GLOBAL}"
 
-    def generate_cover(self, theme, main_character, gear_objects):
+    def generate_cover(self, theme, main_character, gear_objects, force_fresh=None):
         """
         Generates the prompt for the Cover Art using Blueprint + Wireframe + DNA.
         """
+        return self._generate_smart_prompt("cover", theme, self._cover_context(main_character, gear_objects), force_fresh)
+
+    def _cover_context(self, main_character, gear_objects):
+        """
+        Cover context: main character, gear and the Master Cover Blueprint.
+        """
         # Load Blueprint Text for Cover specifically
         blueprint_path = "docs/MASTER_COVER_BLUEPRINT_v1.0.md"
         blueprint_text = ""
@@ -241,72 +389,242 @@ class AgentBravo:
             f"BLUEPRINT: {blueprint_text}\n"
             "Explicitly instruct the generator to leave the 'Black Zone' (Zone 8) empty or reserved for the 'assets/logo.png' overlay."
         )
-        
-        return self._generate_smart_prompt("cover", theme, context)
+        return context
 
-    def generate_prompts(self, theme):
+    def _page_plan(self, theme, main_character, gear_objects):
         """
-        Generates all interior prompts using Multi-Shot DNA and Smart Prompt Logic.
+        Interior pages of the book: type, System Page number, Bible section and fallback context.
+        """
+        return [
+            # Page 1: Mission Briefing (System Page 2)
+            {"type": "mission", "page_number": 2, "tag": "[PAGE_01_MISSION]",
+             "fallback": "Title page design, magnifying glass outline."},
+            # Page 2: Note to Parents (System Page 3)
+            {"type": "parents", "page_number": 3, "tag": "[PAGE_02_PARENTS]",
+             "fallback": "Instructional page layout, cute border frame."},
+            # Page 3: Intro (System Page 4)
+            {"type": "intro", "page_number": 4, "tag": "[PAGE_03_START]",
+             "fallback": f"'Are you ready to explore?' theme, {main_character}."},
+            # Demo: Just 1 Spread (Page 4 & 5) -> System Page 5 & 6
+            {"type": "knolling", "page_number": 5, "tag": "[PAGE_04_KNOLLING]",
+             "fallback": f"Knolling photography layout, {gear_objects}."},
+            {"type": "action", "page_number": 6, "tag": "[PAGE_05_ACTION]",
+             "fallback": f"{theme} in action pose, wearing {gear_objects}."},
+            # Certificate (Page 50)
+            {"type": "certificate", "page_number": 50, "tag": "[PAGE_50_CERTIFICATE]",
+             "fallback": "Certificate of completion design."}
+        ]
+
+    def _book_context(self, theme):
+        """
+        Shared context of every page: (main_character, gear_objects).
         """
-        # 1. Analyze Assets first
-        self.analyze_assets()
-        
-        # Define Context
         items = ["Helmet", "Hose", "Ladder", "Axe", "Boots"] 
         main_character = f"Heroic {theme}"
         gear_objects = ", ".join(items)
+        return main_character, gear_objects
+
+    def _targeted_plan(self, theme, pages, main_character, gear_objects):
+        """
+        Interior page plan restricted to the targeted System Pages (all pages if pages is empty).
+        """
+        plan = self._page_plan(theme, main_character, gear_objects)
+        if pages:
+            plan = [page for page in plan if page["page_number"] in pages]
+            logger.info(f"Agent Bravo: Targeting pages {sorted(pages)} ({len(plan)} interior prompts).")
+        return plan
+
+    def generate_prompts(self, theme, pages=None, bible_version=None, force_fresh=None):
+        """
+        Generates interior prompts using Multi-Shot DNA and Smart Prompt Logic.
+        pages (System Page numbers, e.g. config.TARGET_PAGES_LIST) restricts the work to those
+        pages: only their prompts and the DNA they need are computed. If COVER_PAGE_NUMBER is
+        included, the Cover DNA is prepared as well so generate_cover can follow.
+        bible_version selects the Series Master Bible the page specs come from.
+        force_fresh bypasses the smart prompt cache (default: config.PROMPT_CACHE_FORCE_FRESH).
+        """
+        # Define Context
+        main_character, gear_objects = self._book_context(theme)
+        plan = self._targeted_plan(theme, pages, main_character, gear_objects)
         
+        # 1. Analyze only the DNA these pages (and the Cover, if requested) will use
+        page_types = [page["type"] for page in plan]
+        if not pages or COVER_PAGE_NUMBER in pages:
+            page_types.append("cover")
+        self.analyze_assets(self._dna_asset_types(page_types))
+        
+        # 2. Smart prompt per page
         prompts = []
+        for page in plan:
+            spec = self._extract_bible_specs(page["tag"], bible_version)
+            prompts.append({
+                "type": page["type"],
+                "page_number": page["page_number"],
+                "prompt": self._generate_smart_prompt(page["type"], theme, spec or page["fallback"], force_fresh)
+            })
         
-        # Page 1: Mission Briefing (System Page 2)
-        spec_mission = self._extract_bible_specs("[PAGE_01_MISSION]")
-        prompts.append({
-            "type": "mission",
-            "page_number": 2,
-            "prompt": self._generate_smart_prompt("mission", theme, spec_mission or "Title page design, magnifying glass outline.")
-        })
+        return {
+            "prompts": prompts,
+            "main_character": main_character,
+            "gear_objects": gear_objects
+        }
+
+    async def generate_prompts_async(self, theme, pages=None, bible_version=None, force_fresh=None):
+        """
+        Async fan-out of generate_prompts + generate_cover: every smart prompt is dispatched at
+        once (paced by the shared QA-model limiter) and gathered in book order.
+        Unlike generate_prompts, the Cover (COVER_PAGE_NUMBER) leads the prompt list whenever
+        pages allows it. Same arguments and result dict as generate_prompts.
+        """
+        main_character, gear_objects = self._book_context(theme)
+        plan = self._targeted_plan(theme, pages, main_character, gear_objects)
+        include_cover = not pages or COVER_PAGE_NUMBER in pages
         
-        # Page 2: Note to Parents (System Page 3)
-        spec_parents = self._extract_bible_specs("[PAGE_02_PARENTS]")
-        prompts.append({
-            "type": "parents",
-            "page_number": 3,
-            "prompt": self._generate_smart_prompt("parents", theme, spec_parents or "Instructional page layout, cute border frame.")
-        })
-
-        # Page 3: Intro (System Page 4)
-        spec_intro = self._extract_bible_specs("[PAGE_03_START]")
-        prompts.append({
-            "type": "intro",
-            "page_number": 4,
-            "prompt": self._generate_smart_prompt("intro", theme, spec_intro or f"'Are you ready to explore?' theme, {main_character}.")
-        })
+        # 1. DNA (store lookups, vision calls only on a miss) runs off the event loop
+        page_types = [page["type"] for page in plan] + (["cover"] if include_cover else [])
+        await asyncio.to_thread(self.analyze_assets, self._dna_asset_types(page_types))
         
-        # Demo: Just 1 Spread (Page 4 & 5) -> System Page 5 & 6
-        spec_knolling = self._extract_bible_specs("[PAGE_04_KNOLLING]")
-        prompts.append({
-            "type": "knolling",
-            "page_number": 5,
-            "prompt": self._generate_smart_prompt("knolling", theme, spec_knolling or f"Knolling photography layout, {gear_objects}.")
-        })
+        # 2. All smart prompts concurrently (page contexts read the Bible and blueprint off the event loop)
+        requests = await asyncio.to_thread(
+            self._page_contexts, plan, include_cover, main_character, gear_objects, bible_version
+        )
         
-        spec_action = self._extract_bible_specs("[PAGE_05_ACTION]")
-        prompts.append({
-            "type": "action",
-            "page_number": 6,
-            "prompt": self._generate_smart_prompt("action", theme, spec_action or f"{theme} in action pose, wearing {gear_objects}.")
-        })
+        # Book mode: one structured call plans every page; pages it misses fall back below
+        planned = {}
+        if config.PROMPT_PLANNING_MODE == "book" and len(requests) > 1:
+            planned = await self._plan_book_async(theme, requests, force_fresh)
         
-        # Certificate (Page 50)
-        spec_cert = self._extract_bible_specs("[PAGE_50_CERTIFICATE]")
-        prompts.append({
-            "type": "certificate",
-            "page_number": 50,
-            "prompt": self._generate_smart_prompt("certificate", theme, spec_cert or "Certificate of completion design.")
-        })
+        logger.info(f"Agent Bravo: Dispatching {len(requests) - len(planned)} smart prompts concurrently...")
+        fallback = await asyncio.gather(*(
+            self._generate_smart_prompt_async(page_type, theme, context, force_fresh)
+            for page_type, page_number, context in requests if page_number not in planned
+        ))
+        fallback = iter(fallback)
+        results = [planned[page_number] if page_number in planned else next(fallback) for _, page_number, _ in requests]
         
+        prompts = [
+            {"type": page_type, "page_number": page_number, "prompt": prompt}
+            for (page_type, page_number, _), prompt in zip(requests, results)
+        ]
         return {
             "prompts": prompts,
             "main_character": main_character,
             "gear_objects": gear_objects
         }
+
+    def _page_contexts(self, plan, include_cover, main_character, gear_objects, bible_version=None):
+        """
+        Smart prompt requests [(page_type, page_number, context)] of a page plan, Cover first.
+        Blocking (Bible and blueprint reads); the async path runs this in a worker thread.
+        """
+        requests = []
+        if include_cover:
+            requests.append(("cover", COVER_PAGE_NUMBER, self._cover_context(main_character, gear_objects)))
+        for page in plan:
+            spec = self._extract_bible_specs(page["tag"], bible_version)
+            requests.append((page["type"], page["page_number"], spec or page["fallback"]))
+        return requests
+
+    async def _plan_book_async(self, theme, requests, force_fresh=None):
+        """
+        Plans the smart prompts of several pages in ONE structured (JSON) model call.
+        requests: [(page_type, page_number, context)]. Cached pages are served from the prompt cache.
+        Returns {page_number: final prompt} for every page that was cached or validly planned;
+        missing or invalid pages are left to the per-page fallback.
+        """
+        planned = {}
+        pages = {} # page_number -> (page_type, request)
+        prepared = await asyncio.gather(*(
+            asyncio.to_thread(self._smart_prompt_request, page_type, theme, context, force_fresh)
+            for page_type, _, context in requests
+        ))
+        for (page_type, page_number, _), (request, cached_prompt) in zip(requests, prepared):
+            if cached_prompt:
+                planned[page_number] = cached_prompt
+            else:
+                pages[page_number] = (page_type, request)
+        if not pages:
+            return planned
+
+        sections = []
+        contents = [None] # Meta-prompt goes first; labelled reference images follow
+        for page_number, (page_type, request) in pages.items():
+            for label, img in request["images"]:
+                contents.append(f"PAGE {page_number} {label}:")
+                contents.append(img)
+            sections.append(
+                f"PAGE {page_number} ({page_type}):\n"
+                f"CONTEXT (BIBLE SPECS): {request['context']}\n"
+                f"STYLE DNA: {request['dna']}\n"
+                f"{request['color_instruction']}"
+            )
+        meta_prompt = (
+            "Act as an Expert Art Director. Construct a highly detailed image generation prompt for Imagen 4.0 "
+            "for EACH of the following pages of one book.\n\n"
+            f"THEME: {theme}\n\n"
+            + "\n\n".join(sections) +
+            "\n\nREFERENCE DOCUMENTS (labelled per page below):\n"
+            "WIREFRAME IMAGE: defines the STRICT GEOMETRY (X/Y Coordinates). Follow the layout lines exactly.\n"
+            "STRUCTURE EXAMPLE: defines the CONTEXT (Layering & Density).\n\n"
+            "INSTRUCTION:\n"
+            "Write a single, detailed image prompt per page.\n"
+            "1. GEOMETRY: Follow the page's Wireframe for placement.\n"
+            "2. CONTEXT: Follow the page's Structure Example for layering/density.\n"
+            "3. STYLE: Follow the page's Style DNA for rendering.\n"
+            'Reply with JSON only: {"pages": [{"page_number": <int>, "prompt": "<raw prompt string>"}]}, '
+            "exactly one entry per page."
+        )
+        contents[0] = meta_prompt
+
+        logger.info(f"Agent Bravo: Planning {len(pages)} pages in one structured call...")
+        try:
+            response = await self._generate_content_async(
+                contents,
+                estimate_tokens(meta_prompt, len(contents) // 2),
+                generation_config={"response_mime_type": "application/json"}
+            )
+            plan = validate_book_plan(response.text, pages)
+        except Exception as e:
+            logger.error(f"Book plan failed, falling back to per-page prompts: {e}")
+            return planned
+
+        for page_number, text in plan.items():
+            page_type, request = pages[page_number]
+            planned[page_number] = self._finish_smart_prompt(page_type, text, request)
+        missing = sorted(set(pages) - set(plan))
+        if missing:
+            logger.warning(f"Book plan missed pages {missing}; generating them individually.")
+        return planned
+
+
+# Expected book plan reply (PROMPT_PLANNING_MODE=book):
+# {"pages": [{"page_number": <int, one of the requested pages>, "prompt": <non-empty string>}, ...]}
+def validate_book_plan(text, page_numbers):
+    """
+    Parses and validates a book plan reply against the schema above.
+    Returns {page_number: prompt text} for the valid entries (first entry per page wins).
+    Raises ValueError if the reply is not a JSON object with a "pages" list.
+    """
+    text = text.strip()
+    if text.startswith("```"):
+        # Tolerate a fenced reply (```json ... ```)
+        text = text.strip("`")
+        text = text[text.find("{"):]
+    data = json.loads(text)
+    if not isinstance(data, dict) or not isinstance(data.get("pages"), list):
+        raise ValueError('Book plan must be an object with a "pages" list.')
+
+    plan = {}
+    for entry in data["pages"]:
+        if not isinstance(entry, dict):
+            continue
+        page_number = entry.get("page_number")
+        prompt = entry.get("prompt")
+        if isinstance(page_number, bool) or not isinstance(page_number, int):
+            continue
+        if page_number not in page_numbers or page_number in plan:
+            continue
+        if not isinstance(prompt, str) or not prompt.strip():
+            continue
+        plan[page_number] = prompt.strip()
+    return plan
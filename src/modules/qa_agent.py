@@ -1,74 +1,535 @@
 """
 Agent Delta: Senior Pre-Press Quality Manager (QA Guard)
 Mission: Build the "Guard" logic (Gemini 1.5 Pro Vision).
+
+QA Cascade (QA_CASCADE_ENABLED): every check climbs the cheapest stage that can decide it.
+    local  NumPy pre-check rejects obviously broken pages (no model call)
+    cache  verdict already known for these image bytes
+    fast   QA_FAST_MODEL_NAME judges with a confidence score
+    pro    QA_MODEL_NAME, only when the fast verdict is unclear, below its confidence
+           threshold, or disagrees with the local metrics
+cascade_status() reports how many checks each stage decided.
 """
 
+import asyncio
+import json
 import logging
-import time
+import re
+import threading
 import os
 import google.generativeai as genai
 from PIL import Image
 from src import config
+from src.modules.rate_limiter import get_limiter, estimate_tokens
+from src.modules.adaptive_control import get_controller
+from src.modules.key_pool import get_key_pool
+from src.modules.image_precheck import precheck
+from src.modules.qa_cache import get_qa_cache, prompt_version
 
 logger = logging.getLogger("AgentDelta")
 
 class AgentDelta:
+    # QA Prompt
+    QA_CRITERIA = (
+        "Strict Criteria:\n"
+        "1. Must be black and white line art ONLY.\n"
+        "2. No grayscale shading or colors.\n"
+        "3. Lines must be unbroken and clear.\n"
+        "4. No distorted text or gibberish.\n"
+        "5. Must match the requested subject.\n"
+    )
+    QA_PROMPT = (
+        "Act as a Senior Pre-Press Quality Manager. "
+        "Analyze this image for a children's coloring book. "
+        + QA_CRITERIA +
+        "Reply with 'PASS' if it meets all criteria. "
+        "Reply with 'FAIL [<numbers of the failed criteria>]: [Reason]' if it fails, "
+        "e.g. 'FAIL [2]: gray shading on the backpack'."
+    )
+    # Batched QA Prompt (several images, one structured reply; see validate_batch_verdicts)
+    QA_BATCH_PROMPT = (
+        "Act as a Senior Pre-Press Quality Manager. "
+        "Analyze EACH of the {count} images below (IMAGE 1 to IMAGE {count}) for a children's coloring book. "
+        "Judge every image on its own; the images are unrelated.\n"
+        + QA_CRITERIA +
+        'Reply with JSON only: {{"images": [{{"image": <int>, "verdict": "PASS" or "FAIL", '
+        '"failed_criteria": [<numbers of the failed criteria>], "reason": "<why it fails, empty if PASS>", '
+        '"confidence": <0.0 to 1.0, how sure you are of the verdict>}}]}}, '
+        "exactly one entry per image."
+    )
+
     def __init__(self):
         logger.info("AgentDelta initialized.")
+        self.limiter = get_limiter(config.QA_MODEL_NAME) # Shared with Agent Bravo (same model)
+        self.controller = get_controller(config.QA_MODEL_NAME)
+        self.qa_cache = get_qa_cache() # Verdicts persisted by image content
+        self.prompt_version = prompt_version(self.QA_PROMPT, self.QA_BATCH_PROMPT)
+        self._batches = {} # Model name -> pending (image_part, future) pairs of its next batched QA request
+        self._batch_tasks = set()
+        self.stats_lock = threading.Lock()
+        self.stage_stats = {"local": 0, "cache": 0, "fast": 0, "pro": 0}
+        self.escalation_stats = {"fast_unclear": 0, "low_confidence": 0, "disagreement": 0}
         # Configure API
-        api_key = os.getenv("GOOGLE_API_KEY")
+        self.keys = get_key_pool() # Calls are spread across every configured API key
+        api_key = self.keys.primary
         if not api_key:
             logger.error("GOOGLE_API_KEY not found.")
         else:
             genai.configure(api_key=api_key)
             # Using Gemini 2.5 Pro for strict visual reasoning
             self.model = genai.GenerativeModel(config.QA_MODEL_NAME)
+            # Fast first opinion of the QA cascade
+            self.fast_model = genai.GenerativeModel(config.QA_FAST_MODEL_NAME)
+
+    def _load_image_part(self, image_path):
+        """
+        Reads the image file as an inline blob (no PIL re-encode).
+        Blocking; the async path runs this in a worker thread.
+        """
+        with Image.open(image_path) as img:
+            mime_type = Image.MIME.get(img.format, "image/png")
+        with open(image_path, "rb") as f:
+            return {"mime_type": mime_type, "data": f.read()}
+
+    def _parse_result(self, response):
+        """
+        Interprets the model reply as a verdict {"passed", "reason", "failed_criteria"}.
+        failed_criteria: numbers of QA_CRITERIA from 'FAIL [2, 3]: ...', else inferred from the reason.
+        """
+        result = response.text.strip()
+        logger.info(f"QA Result: {result}")
+        if result.startswith("PASS"):
+            return make_verdict(True, result)
+        match = re.match(r"FAIL\W*[\[(]([\d,\s]+)[\])]", result)
+        return make_verdict(False, result, (match and parse_criteria(match.group(1).split(","))) or None)
+
+    def _verdict_source(self):
+        """
+        Cache label of whatever produces the final verdicts: QA_MODEL_NAME alone, or the cascade's
+        models plus the thresholds that decide when a fast verdict stands (see escalation_reason).
+        """
+        if config.QA_CASCADE_ENABLED:
+            return (
+                f"{config.QA_FAST_MODEL_NAME}>{config.QA_MODEL_NAME}"
+                f"@{config.QA_FAST_PASS_CONFIDENCE}/{config.QA_FAST_FAIL_CONFIDENCE}"
+                f"/{config.QA_LOCAL_BORDERLINE}:{config.PRECHECK_MAX_COLOR_RATIO},"
+                f"{config.PRECHECK_MAX_GRAY_RATIO},{config.PRECHECK_MAX_INK}"
+            )
+        return config.QA_MODEL_NAME
+
+    def _cached_verdict(self, image_part):
+        """(cache key, stored verdict or None) for an image blob."""
+        key = self.qa_cache.make_key(image_part["data"], self.prompt_version, self._verdict_source())
+        verdict = self.qa_cache.get(key)
+        if verdict:
+            logger.info(f"QA Result (cached): {verdict['reason'] or ('PASS' if verdict['passed'] else 'FAIL')}")
+        return key, verdict
+
+    def _model(self, key, model_name=None):
+        """QA model authenticated with one pooled key (the process-wide model for a single key)."""
+        model_name = model_name or config.QA_MODEL_NAME
+        if key.id is not None:
+            return key.generative_model(model_name)
+        return self.model if model_name == config.QA_MODEL_NAME else self.fast_model
+
+    def _default_limits(self, model_name):
+        """Model-wide (limiter, controller) of a single-key pool (QA_MODEL_NAME's is shared with Agent Bravo)."""
+        return (self.limiter, self.controller) if model_name == config.QA_MODEL_NAME else None
+
+    def _generate(self, contents, tokens=None, generation_config=None, model_name=None):
+        """Calls a QA model (default QA_MODEL_NAME) under the shared rate limit, retrying on 429."""
+        kwargs = {"generation_config": generation_config} if generation_config else {}
+        model_name = model_name or config.QA_MODEL_NAME
+        if tokens is None:
+            tokens = estimate_tokens(self.QA_PROMPT, len(contents) - 1)
+        return self.keys.call(
+            model_name,
+            lambda key: self._model(key, model_name).generate_content(contents, **kwargs),
+            tokens, self._default_limits(model_name), "QA"
+        )
+
+    async def _generate_async(self, contents, tokens=None, generation_config=None, model_name=None):
+        """Async QA model call (default QA_MODEL_NAME) under the shared rate limit and adaptive in-flight cap, retrying on 429."""
+        kwargs = {"generation_config": generation_config} if generation_config else {}
+        model_name = model_name or config.QA_MODEL_NAME
+        if tokens is None:
+            tokens = estimate_tokens(self.QA_PROMPT, len(contents) - 1)
+        return await self.keys.call_async(
+            model_name,
+            lambda key: self._model(key, model_name).generate_content_async(contents, **kwargs),
+            tokens, self._default_limits(model_name), "QA"
+        )
+
+    def _batch_contents(self, image_parts):
+        """Structured (JSON) QA request for one or more images: (contents, estimated tokens)."""
+        prompt = self.QA_BATCH_PROMPT.format(count=len(image_parts))
+        contents = [prompt]
+        for index, image_part in enumerate(image_parts, start=1):
+            contents.append(f"IMAGE {index}:")
+            contents.append(image_part)
+        return contents, estimate_tokens(prompt, len(image_parts))
+
+    def _fast_verdict(self, image_part):
+        """Sync fast-stage verdict for one image blob (None if the reply is unusable)."""
+        contents, tokens = self._batch_contents([image_part])
+        try:
+            response = self._generate(contents, tokens, {"response_mime_type": "application/json"},
+                                      config.QA_FAST_MODEL_NAME)
+            return validate_batch_verdicts(response.text, 1).get(1)
+        except Exception as e:
+            logger.warning(f"Fast QA failed: {e}")
+            return None
 
-    def quality_check(self, image_path):
+    async def _judge_async(self, image_part, fast=False):
         """
-        Checks the quality of the generated image using Gemini 1.5 Pro Vision.
-        Returns True if passed, False otherwise.
+        Model verdict for one image blob (fast=True: the cascade's fast stage, which may return None).
+        With QA_BATCH_SIZE > 1, checks that arrive within QA_BATCH_WINDOW_SEC of each other
+        (candidates of one page, pages in flight) share one batched request per model.
+        """
+        model_name = config.QA_FAST_MODEL_NAME if fast else config.QA_MODEL_NAME
+        if config.QA_BATCH_SIZE <= 1 and not fast:
+            return self._parse_result(await self._generate_async([self.QA_PROMPT, image_part]))
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        batch = self._batches.setdefault(model_name, [])
+        batch.append((image_part, future))
+        if len(batch) >= config.QA_BATCH_SIZE:
+            self._flush_batch(model_name)
+        elif len(batch) == 1:
+            loop.call_later(config.QA_BATCH_WINDOW_SEC, self._flush_batch, model_name, batch)
+        return await future
+
+    def _flush_batch(self, model_name, batch=None):
+        """Sends a model's pending checks as one request (a timer for an already flushed batch is a no-op)."""
+        if batch is not None and batch is not self._batches.get(model_name):
+            return
+        batch = self._batches.pop(model_name, [])
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._run_batch(batch, model_name))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+
+    async def _run_batch(self, batch, model_name):
+        """
+        Judges a batch in one structured request. Ambiguous or missing verdicts fall back to
+        single checks on QA_MODEL_NAME, or resolve to None on the fast stage (the cascade escalates them).
+        """
+        fast = model_name != config.QA_MODEL_NAME
+        verdicts = {}
+        if len(batch) > 1 or fast:
+            contents, tokens = self._batch_contents([image_part for image_part, _ in batch])
+            logger.info(f"QA: Checking {len(batch)} image(s) in one structured request ({model_name})...")
+            try:
+                response = await self._generate_async(
+                    contents,
+                    tokens,
+                    generation_config={"response_mime_type": "application/json"},
+                    model_name=model_name
+                )
+                verdicts = validate_batch_verdicts(response.text, len(batch))
+            except Exception as e:
+                logger.error(f"Batched QA failed, falling back to {'escalation' if fast else 'single-image checks'}: {e}")
+            missing = len(batch) - len(verdicts)
+            if missing and not fast:
+                logger.warning(f"Batched QA: {missing}/{len(batch)} verdict(s) missing or ambiguous; checking them individually.")
+
+        async def settle(index, image_part, future):
+            try:
+                verdict = verdicts.get(index)
+                if verdict is None and not fast:
+                    verdict = self._parse_result(await self._generate_async([self.QA_PROMPT, image_part]))
+                elif verdict is not None:
+                    logger.info(f"QA Result ({'fast' if fast else 'batched'}): {verdict['reason']}")
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+                return
+            if not future.done():
+                future.set_result(verdict)
+
+        await asyncio.gather(*(settle(index, image_part, future)
+                               for index, (image_part, future) in enumerate(batch, start=1)))
+
+    def _escalation(self, fast_verdict, metrics, page_type):
+        """
+        Why a fast-stage verdict needs QA_MODEL_NAME (None: the fast verdict stands).
+        Counted in cascade_status()["escalations"].
+        """
+        reason = escalation_reason(fast_verdict, local_opinion(metrics, page_type))
+        if reason:
+            with self.stats_lock:
+                self.escalation_stats[reason] += 1
+            logger.info(f"QA: escalating to {config.QA_MODEL_NAME} ({reason}).")
+        return reason
+
+    def _decided(self, stage, verdict, page_type=None):
+        """Counts the cascade stage that produced a final verdict and returns it (adjusted for the page type)."""
+        with self.stats_lock:
+            self.stage_stats[stage] += 1
+        return for_page_type(verdict, page_type)
+
+    def cascade_status(self):
+        """
+        Per-stage QA hit rates: {"checks": n, "stages": {stage: {"decided": k, "rate": k / n}},
+        "escalations": {reason: count}}, e.g. for logs and dashboards.
+        """
+        with self.stats_lock:
+            stages = dict(self.stage_stats)
+            escalations = dict(self.escalation_stats)
+        checks = sum(stages.values())
+        return {
+            "checks": checks,
+            "stages": {stage: {"decided": count, "rate": round(count / checks, 3) if checks else 0.0}
+                       for stage, count in stages.items()},
+            "escalations": escalations
+        }
+
+    def _precheck(self, image_path, page_type=None):
+        """
+        Local NumPy pre-QA filter (see image_precheck).
+        Returns (FAIL verdict or None, metrics or None): a verdict for an obviously broken image
+        (so the QA model call can be skipped); the metrics feed the cascade's disagreement check.
+        """
+        if not config.PRECHECK_ENABLED:
+            return None, None
+        try:
+            passed, reason, metrics = precheck(image_path, page_type)
+        except Exception as e:
+            logger.warning(f"Pre-check skipped for {image_path}: {e}")
+            return None, None
+        if passed:
+            logger.debug(f"Pre-check metrics for {image_path}: {metrics}")
+            return None, metrics
+        logger.info(f"QA Result: FAIL: {reason} (local pre-check, no model call)")
+        return make_verdict(False, f"FAIL: {reason}"), metrics
+
+    def review(self, image_path, page_type=None):
+        """
+        Checks the quality of the generated image through the QA cascade (see module docstring).
+        page_type "cover" relaxes the local pre-check and ignores QA_COVER_EXEMPT_CRITERIA (covers are full color).
+        Returns the verdict {"passed", "reason", "failed_criteria"} (numbers of QA_CRITERIA).
         """
         logger.info(f"Performing QA check on {image_path}...")
         
         try:
-            # Rate Limiting Delay (Before API call)
-            logger.info(f"Sleeping for {config.QA_DELAY}s (Rate Limit)...")
-            time.sleep(config.QA_DELAY)
-
             # Load Image
             if not os.path.exists(image_path):
                 logger.error(f"Image file not found: {image_path}")
-                return False
-                
-            img = Image.open(image_path)
-            
-            # QA Prompt
-            prompt = (
-                "Act as a Senior Pre-Press Quality Manager. "
-                "Analyze this image for a children's coloring book. "
-                "Strict Criteria:\n"
-                "1. Must be black and white line art ONLY.\n"
-                "2. No grayscale shading or colors.\n"
-                "3. Lines must be unbroken and clear.\n"
-                "4. No distorted text or gibberish.\n"
-                "5. Must match the requested subject.\n"
-                "Reply with 'PASS' if it meets all criteria. "
-                "Reply with 'FAIL: [Reason]' if it fails."
-            )
-            
-            response = self.model.generate_content([prompt, img])
-            result = response.text.strip()
-            
-            logger.info(f"QA Result: {result}")
-            
-            if result.startswith("PASS"):
-                return True
-            else:
-                return False
+                return make_verdict(False, "FAIL: image file not found", [])
+
+            verdict, metrics = self._precheck(image_path, page_type)
+            if verdict:
+                return self._decided("local", verdict, page_type)
+
+            image_part = self._load_image_part(image_path)
+            key, verdict = self._cached_verdict(image_part)
+            if verdict:
+                return self._decided("cache", verdict, page_type)
+
+            stage = "pro"
+            if config.QA_CASCADE_ENABLED:
+                verdict = self._fast_verdict(image_part)
+                if self._escalation(verdict, metrics, page_type):
+                    verdict = None
+                else:
+                    stage = "fast"
+            if verdict is None:
+                verdict = self._parse_result(self._generate([self.QA_PROMPT, image_part]))
+            self.qa_cache.put(key, verdict, self._verdict_source())
+            return self._decided(stage, verdict, page_type)
 
         except Exception as e:
             logger.error(f"QA check failed: {e}")
             # Fail safe: If QA fails technically, we might want to flag it for human review
-            # For now, return False to trigger retry
-            return False
+            # For now, fail the image (no criteria, so the retry keeps the prompt as is)
+            return make_verdict(False, f"FAIL: QA error ({e})", [])
+
+    async def review_async(self, image_path, page_type=None):
+        """
+        Async variant of review for the orchestrator's event loop.
+        Returns the verdict {"passed", "reason", "failed_criteria"}.
+        """
+        logger.info(f"Performing QA check on {image_path}...")
+
+        try:
+            # Load Image
+            if not os.path.exists(image_path):
+                logger.error(f"Image file not found: {image_path}")
+                return make_verdict(False, "FAIL: image file not found", [])
+
+            verdict, metrics = await asyncio.to_thread(self._precheck, image_path, page_type)
+            if verdict:
+                return self._decided("local", verdict, page_type)
+
+            image_part = await asyncio.to_thread(self._load_image_part, image_path)
+            key, verdict = await asyncio.to_thread(self._cached_verdict, image_part)
+            if verdict:
+                return self._decided("cache", verdict, page_type)
+
+            stage = "pro"
+            if config.QA_CASCADE_ENABLED:
+                verdict = await self._judge_async(image_part, fast=True)
+                if self._escalation(verdict, metrics, page_type):
+                    verdict = None
+                else:
+                    stage = "fast"
+            if verdict is None:
+                verdict = await self._judge_async(image_part)
+            await asyncio.to_thread(self.qa_cache.put, key, verdict, self._verdict_source())
+            return self._decided(stage, verdict, page_type)
+
+        except Exception as e:
+            logger.error(f"QA check failed: {e}")
+            # Fail safe: fail the image to trigger a retry
+            return make_verdict(False, f"FAIL: QA error ({e})", [])
+
+    def quality_check(self, image_path, page_type=None):
+        """Returns True if the image passed QA (see review), False otherwise."""
+        return self.review(image_path, page_type)["passed"]
+
+    async def quality_check_async(self, image_path, page_type=None):
+        """Returns True if the image passed QA (see review_async), False otherwise."""
+        return (await self.review_async(image_path, page_type))["passed"]
+
+
+def for_page_type(verdict, page_type=None):
+    """
+    Drops config.QA_COVER_EXEMPT_CRITERIA (black and white / no colors) from a cover's FAIL verdict:
+    covers are full color by design. A cover failed on nothing else passes.
+    The raw verdict stays in the QA cache; this runs on every read.
+    """
+    if page_type != "cover" or verdict["passed"]:
+        return verdict
+    failed = verdict.get("failed_criteria", [])
+    remaining = [number for number in failed if number not in config.QA_COVER_EXEMPT_CRITERIA]
+    if len(remaining) == len(failed):
+        return verdict
+    if remaining:
+        return {**verdict, "failed_criteria": remaining}
+    logger.info(f"QA Result: PASS (cover; color criteria ignored: {verdict['reason']})")
+    return make_verdict(True, f"PASS (cover; color criteria ignored: {verdict['reason']})")
+
+
+def local_opinion(metrics, page_type=None):
+    """
+    The pre-check's view on criteria 1-2 of an image it let through: "borderline" if a color, gray or
+    ink metric is above QA_LOCAL_BORDERLINE of its limit, else "clean". None if it has no view
+    (pre-check off, or a cover: covers are full color).
+    """
+    if not metrics or page_type == "cover":
+        return None
+    margin = config.QA_LOCAL_BORDERLINE
+    borderline = (
+        metrics["color_ratio"] > margin * config.PRECHECK_MAX_COLOR_RATIO
+        or metrics["gray_ratio"] > margin * config.PRECHECK_MAX_GRAY_RATIO
+        or metrics["ink"] > margin * config.PRECHECK_MAX_INK
+    )
+    return "borderline" if borderline else "clean"
+
+
+def escalation_reason(fast_verdict, opinion):
+    """
+    Why a fast-stage verdict must be confirmed by QA_MODEL_NAME, or None if it stands:
+        fast_unclear    no usable fast verdict
+        disagreement    fast PASS on a borderline image, or a fast FAIL only on
+                        criteria 1-2 (color/shading) for an image the local metrics call clean
+        low_confidence  confidence below QA_FAST_PASS_CONFIDENCE / QA_FAST_FAIL_CONFIDENCE
+    """
+    if fast_verdict is None:
+        return "fast_unclear"
+    failed = set(fast_verdict.get("failed_criteria", []))
+    if fast_verdict["passed"] and opinion == "borderline":
+        return "disagreement"
+    if not fast_verdict["passed"] and opinion == "clean" and failed and failed <= {1, 2}:
+        return "disagreement"
+    threshold = config.QA_FAST_PASS_CONFIDENCE if fast_verdict["passed"] else config.QA_FAST_FAIL_CONFIDENCE
+    confidence = fast_verdict.get("confidence")
+    if confidence is None or confidence < threshold:
+        return "low_confidence"
+    return None
+
+
+# QA_CRITERIA numbers, inferred from a FAIL reason when the reply does not list them
+CRITERIA_KEYWORDS = {
+    1: ("black and white", "line art", "solid black", "filled", "fill", "photo", "realistic"),
+    2: ("gray", "grey", "shading", "shaded", "gradient", "color", "colour"),
+    3: ("broken", "unclear", "faint", "blur", "sketch", "messy", "line work", "lines"),
+    4: ("text", "letter", "word", "gibberish", "font", "writing"),
+    5: ("subject", "blank", "missing", "wrong", "match"),
+}
+
+
+def parse_criteria(values):
+    """Valid QA_CRITERIA numbers (1-5) from a list of ints / digit strings, sorted and de-duplicated."""
+    numbers = set()
+    for value in values:
+        if isinstance(value, str) and value.strip().isdigit():
+            value = int(value)
+        if isinstance(value, int) and not isinstance(value, bool) and value in CRITERIA_KEYWORDS:
+            numbers.add(value)
+    return sorted(numbers)
+
+
+def infer_criteria(reason):
+    """Best-effort QA_CRITERIA numbers for a FAIL reason that does not list them."""
+    reason = reason.lower()
+    return [number for number, keywords in CRITERIA_KEYWORDS.items() if any(word in reason for word in keywords)]
+
+
+def make_verdict(passed, reason, failed_criteria=None):
+    """QA verdict {"passed", "reason", "failed_criteria"}; failed_criteria=None infers them from the reason."""
+    if passed:
+        failed_criteria = []
+    elif failed_criteria is None:
+        failed_criteria = infer_criteria(reason)
+    return {"passed": passed, "reason": reason, "failed_criteria": failed_criteria}
+
+# Expected batched QA reply (QA_BATCH_SIZE > 1):
+# {"images": [{"image": <int, 1..count>, "verdict": "PASS" | "FAIL", "failed_criteria": [<int 1-5>], "reason": <string>,
+#              "confidence": <float 0-1>}, ...]}
+def validate_batch_verdicts(text, count):
+    """
+    Parses and validates a batched QA reply against the schema above.
+    Returns {image number: verdict (+ "confidence" when valid)} for the unambiguous entries only:
+    unknown verdicts, out-of-range numbers and images judged more than once are left out
+    (they get a single-image check instead).
+    Raises ValueError if the reply is not a JSON object with an "images" list.
+    """
+    text = text.strip()
+    if text.startswith("```"):
+        # Tolerate a fenced reply (```json ... ```)
+        text = text.strip("`")
+        text = text[text.find("{"):]
+    data = json.loads(text)
+    if not isinstance(data, dict) or not isinstance(data.get("images"), list):
+        raise ValueError('Batched QA reply must be an object with an "images" list.')
+
+    verdicts = {}
+    ambiguous = set()
+    for entry in data["images"]:
+        if not isinstance(entry, dict):
+            continue
+        index = entry.get("image")
+        verdict = entry.get("verdict")
+        reason = entry.get("reason")
+        if isinstance(index, bool) or not isinstance(index, int) or not 1 <= index <= count:
+            continue
+        if not isinstance(verdict, str) or verdict.strip().upper() not in ("PASS", "FAIL"):
+            ambiguous.add(index)
+            continue
+        if index in verdicts:
+            ambiguous.add(index)
+            continue
+        passed = verdict.strip().upper() == "PASS"
+        reason = reason.strip() if isinstance(reason, str) else ""
+        criteria = entry.get("failed_criteria")
+        verdicts[index] = make_verdict(
+            passed,
+            "PASS" if passed else f"FAIL: {reason or 'unspecified'}",
+            (isinstance(criteria, list) and parse_criteria(criteria)) or None
+        )
+        confidence = entry.get("confidence")
+        if isinstance(confidence, (int, float)) and not isinstance(confidence, bool) and 0 <= confidence <= 1:
+            verdicts[index]["confidence"] = float(confidence)
+    return {index: verdict for index, verdict in verdicts.items() if index not in ambiguous}
@@ -0,0 +1,117 @@
+"""
+QA Cache: Persistent QA Verdicts (Infrastructure)
+Mission: Judge each image once, not once per run.
+
+Agent Delta's model verdicts live in one JSON file (config.QA_CACHE_PATH),
+keyed by the SHA-256 of the image bytes, the QA prompt version (single and
+batched prompts) and the verdict source (QA_MODEL_NAME, or the cascade's
+models and thresholds). Resumed runs, PDF-only reruns and debug scripts
+pointing at the same temp/*.png get the verdict back without a model call;
+editing a QA prompt, switching models or retuning the cascade invalidates
+every entry automatically.
+The oldest entries are dropped beyond QA_CACHE_MAX_ENTRIES.
+Set QA_CACHE_ENABLED=false to opt out.
+
+Layout:
+{
+  "<key>": {"passed": false, "reason": "FAIL [2]: ...", "failed_criteria": [2], "model": "...", "created_at": "..."}
+}
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from src import config
+
+logger = logging.getLogger("QACache")
+
+
+def prompt_version(*prompts):
+    """Short content hash of the QA prompts (changes whenever any prompt text does)."""
+    return hashlib.sha256("\0".join(prompts).encode("utf-8")).hexdigest()[:12]
+
+
+class QAVerdictCache:
+    def __init__(self, path=None, enabled=None, max_entries=None):
+        self.path = path or config.QA_CACHE_PATH
+        self.enabled = config.QA_CACHE_ENABLED if enabled is None else enabled
+        self.max_entries = max_entries or config.QA_CACHE_MAX_ENTRIES
+        self.lock = threading.Lock()
+        self.entries = self._load() if self.enabled else {}
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable QA cache {self.path}: {e}")
+            return {}
+
+    def make_key(self, image_bytes, prompt_version, model=None):
+        """Content hash of one QA request (image bytes, QA prompt version, QA model or cascade label)."""
+        digest = hashlib.sha256(image_bytes).hexdigest()
+        return hashlib.sha256(f"{digest}\0{prompt_version}\0{model or config.QA_MODEL_NAME}".encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Returns the stored verdict {"passed", "reason", "failed_criteria"}, or None on a miss."""
+        if not self.enabled:
+            return None
+        with self.lock:
+            entry = self.entries.get(key)
+        if entry is None:
+            return None
+        return {"passed": entry["passed"], "reason": entry["reason"], "failed_criteria": entry.get("failed_criteria", [])}
+
+    def put(self, key, verdict, model=None):
+        """Stores a verdict {"passed", "reason", "failed_criteria"} (dropping the oldest entries beyond max_entries)."""
+        if not self.enabled:
+            return
+        with self.lock:
+            self.entries.pop(key, None)
+            self.entries[key] = {
+                "passed": bool(verdict["passed"]),
+                "reason": verdict.get("reason", ""),
+                "failed_criteria": list(verdict.get("failed_criteria", [])),
+                "model": model or config.QA_MODEL_NAME,
+                "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            }
+            # dicts keep insertion order: the first keys are the oldest
+            for old_key in list(self.entries)[:max(0, len(self.entries) - self.max_entries)]:
+                del self.entries[old_key]
+            self._save()
+
+    def clear(self):
+        with self.lock:
+            self.entries = {}
+            self._save()
+
+    def _save(self):
+        # Caller holds self.lock. Atomic write (temp file + rename).
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self.entries, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Failed to save QA cache {self.path}: {e}")
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_qa_cache():
+    """Returns the process-wide QA verdict cache."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = QAVerdictCache()
+        return _cache
@@ -0,0 +1,123 @@
+"""
+Rate Limiter: Shared Token Buckets (Infrastructure)
+Mission: Pace every model call against the real per-model RPM/TPM budget.
+
+One limiter exists per model for the whole process, so Agent Bravo, Charlie
+and Delta (and every concurrent job) draw from the same budget.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from src import config
+
+logger = logging.getLogger("RateLimiter")
+
+# Rough Gemini token cost of one inline image
+IMAGE_TOKEN_ESTIMATE = 258
+
+
+def estimate_tokens(text, image_count=0):
+    """Cheap token estimate for TPM accounting (~4 characters per token)."""
+    return len(text) // 4 + image_count * IMAGE_TOKEN_ESTIMATE
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+    Callers reserve tokens up front (the balance may go negative), so waiters
+    are served in arrival order and both sync and async callers just sleep
+    for the returned delay.
+    """
+
+    def __init__(self, rate_per_sec, capacity):
+        self.rate = rate_per_sec
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount=1):
+        """Takes `amount` tokens and returns how long the caller must wait (seconds)."""
+        with self.lock:
+            self._refill(time.monotonic())
+            self.tokens -= amount
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+
+class RateLimiter:
+    """
+    Per-model limiter: a request bucket (RPM) plus an optional token bucket (TPM).
+    """
+
+    def __init__(self, model_id, rpm, tpm=None, burst=1):
+        self.model_id = model_id
+        self.base_rate = rpm / 60.0
+        self.requests = TokenBucket(self.base_rate, max(1, burst))
+        # TPM bucket holds one minute of budget
+        self.tokens = TokenBucket(tpm / 60.0, tpm) if tpm else None
+        self.paused_until = 0.0
+
+    def set_rate_scale(self, scale):
+        """Scales the request rate relative to the configured RPM (used by adaptive control)."""
+        with self.requests.lock:
+            self.requests._refill(time.monotonic())
+            self.requests.rate = self.base_rate * scale
+
+    def pause(self, seconds):
+        """Holds every new request for `seconds` (e.g. after a 429 with Retry-After)."""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def _reserve(self, tokens):
+        wait = self.requests.reserve(1)
+        if self.tokens and tokens:
+            wait = max(wait, self.tokens.reserve(tokens))
+        # A pause shifts the whole queue back, so waiters keep their spacing afterwards
+        wait += max(0.0, self.paused_until - time.monotonic())
+        if wait > 0:
+            logger.info(f"Rate limit: waiting {wait:.1f}s for {self.model_id}...")
+        return wait
+
+    def acquire(self, tokens=0):
+        """Blocks until one request (and `tokens` TPM budget) is available."""
+        wait = self._reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens=0):
+        """Async variant of acquire; never blocks the event loop."""
+        wait = self._reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(model_id, key_id=None):
+    """
+    Returns the process-wide limiter for a model (created on first use).
+    key_id selects the budget of one pooled API key (quotas are per project).
+    """
+    name = model_id if key_id is None else f"{model_id} [{key_id}]"
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            limits = config.RATE_LIMITS.get(model_id, config.DEFAULT_RATE_LIMIT)
+            limiter = RateLimiter(
+                name,
+                rpm=limits["rpm"],
+                tpm=limits.get("tpm"),
+                burst=limits.get("burst", 1)
+            )
+            _limiters[name] = limiter
+            logger.info(f"Rate limiter for {name}: {limits}")
+        return limiter
@@ -0,0 +1,144 @@
+"""
+Reference Registry: Preprocessed Reference Images (Infrastructure)
+Mission: Load every assets/ref_* file once and serve it ready to send.
+
+Wireframes, structure examples and style references are read once, downscaled
+to REF_IMAGE_MAX_SIDE and recompressed as optimized PNG. Wireframes and
+structure examples (flat zones, line art) are downscaled with NEAREST, so
+they keep their exact zone colors and pure black lines (no blended gray or
+mixed-color edge pixels); style references, full-color covers included, use
+LANCZOS. The registry keeps the processed bytes, their
+base64 payload and the SHA-256 of the original file in memory, bounded by
+REF_REGISTRY_MAX_MB with least-recently-used eviction. A file is reloaded only
+when its mtime or size change.
+
+Agent Bravo sends the processed bytes as inline blobs (no PIL re-encode per
+call); the Gemini Flash image backend sends the cached base64 payload; the prompt, DNA and
+generation caches key on the digest instead of re-hashing the file.
+"""
+
+import base64
+import hashlib
+import io
+import logging
+import os
+import threading
+from collections import OrderedDict
+from PIL import Image
+from src import config
+
+logger = logging.getLogger("ReferenceRegistry")
+
+# File name markers of flat/line-art references (downscaled with NEAREST)
+NEAREST_MARKERS = ("_layout_wireframe", "_structure_example")
+
+
+def resample_filter(path):
+    """PIL resampling filter for downscaling a reference image."""
+    name = os.path.basename(path)
+    return Image.NEAREST if any(marker in name for marker in NEAREST_MARKERS) else Image.LANCZOS
+
+
+class ReferenceRegistry:
+    def __init__(self, max_side=None, max_bytes=None):
+        self.max_side = max_side or config.REF_IMAGE_MAX_SIDE
+        self.max_bytes = max_bytes if max_bytes is not None else config.REF_REGISTRY_MAX_MB * 1024 * 1024
+        self.entries = OrderedDict() # path -> entry, least recently used first
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+
+    def _process(self, path, raw):
+        """Downscales and recompresses one reference image; keeps the original if that is smaller."""
+        with Image.open(io.BytesIO(raw)) as img:
+            img.load()
+            original_format = img.format
+            resized = max(img.size) > self.max_side
+            if resized:
+                img.thumbnail((self.max_side, self.max_side), resample_filter(path))
+            if original_format == "PNG" and not resized:
+                data = raw
+            else:
+                if img.mode not in ("RGB", "RGBA", "L", "LA", "P"):
+                    img = img.convert("RGB")
+                buffer = io.BytesIO()
+                img.save(buffer, format="PNG", optimize=True)
+                data = buffer.getvalue()
+                if original_format == "PNG" and len(data) >= len(raw):
+                    data = raw
+        if len(data) < len(raw):
+            logger.info(f"Reference {path}: {len(raw) // 1024} KB -> {len(data) // 1024} KB")
+        return data
+
+    def _entry(self, path):
+        """Loads (or returns the cached) entry for path; None if the file is missing or unreadable."""
+        try:
+            stat = os.stat(path)
+        except (OSError, TypeError):
+            return None
+        stamp = (stat.st_mtime, stat.st_size)
+
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry and entry["stamp"] == stamp:
+                self.entries.move_to_end(path) # LRU: mark as recently used
+                return entry
+
+        try:
+            with open(path, "rb") as f:
+                raw = f.read()
+        except OSError as e:
+            logger.error(f"Failed to read reference image {path}: {e}")
+            return None
+        try:
+            data = self._process(path, raw)
+        except Exception as e:
+            # Not a decodable image: still hashable for cache keys, but never sent
+            logger.error(f"Failed to process reference image {path}: {e}")
+            data = None
+
+        entry = {
+            "stamp": stamp,
+            "digest": hashlib.sha256(raw).hexdigest(),
+            "data": data,
+            "base64": base64.b64encode(data).decode("utf-8") if data else None,
+        }
+        entry["size"] = len(data or b"") + len(entry["base64"] or "")
+
+        with self.lock:
+            old = self.entries.pop(path, None)
+            if old:
+                self.total_bytes -= old["size"]
+            self.entries[path] = entry
+            self.total_bytes += entry["size"]
+            while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+                _, evicted = self.entries.popitem(last=False)
+                self.total_bytes -= evicted["size"]
+        return entry
+
+    def part(self, path):
+        """Inline image blob for Gemini ({"mime_type", "data"}), or None if missing."""
+        entry = self._entry(path)
+        return {"mime_type": "image/png", "data": entry["data"]} if entry and entry["data"] else None
+
+    def base64(self, path):
+        """Base64 payload of the processed PNG (REST inline_data), or None if missing."""
+        entry = self._entry(path)
+        return entry["base64"] if entry else None # None as well if the file could not be decoded
+
+    def digest(self, path):
+        """SHA-256 of the original file bytes (cache keys), or None if missing."""
+        entry = self._entry(path)
+        return entry["digest"] if entry else None
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_reference_registry():
+    """Returns the process-wide reference registry."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ReferenceRegistry()
+        return _registry
@@ -0,0 +1,169 @@
+"""
+Job Scheduler: Admission Control & Fair Queuing (Infrastructure)
+Mission: Keep latency predictable under bursty /generate traffic.
+
+Sits in front of Agent Omega:
+- Bounded queue (JOB_QUEUE_MAX) and per-user cap (JOB_QUEUE_PER_USER_MAX)
+- Priorities first, then round-robin across users within a priority
+- At most MAX_CONCURRENT_JOBS books running, MAX_INFLIGHT_PAGES pages in flight overall
+- Queue position pushed back to the caller whenever it changes
+"""
+
+import asyncio
+import logging
+from collections import OrderedDict, deque
+from itertools import zip_longest
+from src import config
+
+logger = logging.getLogger("JobScheduler")
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+
+class QueueFullError(Exception):
+    """Raised when a job is rejected by admission control."""
+
+
+class JobScheduler:
+    def __init__(self, orchestrator, max_running=None, max_per_user=None):
+        """max_running / max_per_user override the config limits (e.g. a single batch client)."""
+        self.orchestrator = orchestrator
+        self.max_running = max_running or config.MAX_CONCURRENT_JOBS
+        self.max_queue = config.JOB_QUEUE_MAX
+        self.max_per_user = max_per_user or config.JOB_QUEUE_PER_USER_MAX
+        # Global cap on pages in flight, shared by every running job
+        self.page_slots = asyncio.Semaphore(config.MAX_INFLIGHT_PAGES)
+
+        self.queues = {} # priority -> OrderedDict(user_id -> deque of jobs), rotated for round-robin
+        self.running = 0
+        self.jobs_per_user = {} # user_id -> queued + running
+        self.notifications = set() # Keeps position-update tasks alive until they finish
+        logger.info(
+            f"Job Scheduler initialized ({self.max_running} concurrent jobs, "
+            f"{config.MAX_INFLIGHT_PAGES} pages in flight, queue {self.max_queue})."
+        )
+
+    def queued_count(self):
+        return sum(len(jobs) for users in self.queues.values() for jobs in users.values())
+
+    def _ordered_jobs(self):
+        """Queued jobs in the exact order they will be dispatched."""
+        order = []
+        for priority in sorted(self.queues):
+            for batch in zip_longest(*self.queues[priority].values()):
+                order.extend(job for job in batch if job is not None)
+        return order
+
+    def _pop_next(self):
+        for priority in sorted(self.queues):
+            users = self.queues[priority]
+            if not users:
+                continue
+            user_id, jobs = next(iter(users.items()))
+            job = jobs.popleft()
+            if jobs:
+                users.move_to_end(user_id) # Next user's turn
+            else:
+                del users[user_id]
+            return job
+        return None
+
+    def _remove(self, job):
+        users = self.queues.get(job["priority"], {})
+        jobs = users.get(job["user_id"])
+        if jobs and job in jobs:
+            jobs.remove(job)
+            if not jobs:
+                del users[job["user_id"]]
+            return True
+        return False
+
+    def _release_user(self, user_id):
+        self.jobs_per_user[user_id] -= 1
+        if not self.jobs_per_user[user_id]:
+            del self.jobs_per_user[user_id]
+
+    async def _notify(self, callback, position):
+        try:
+            await callback(position)
+        except Exception as e:
+            logger.warning(f"Failed to report queue position: {e}")
+
+    def _report_positions(self):
+        for position, job in enumerate(self._ordered_jobs(), start=1):
+            if job["position"] != position:
+                job["position"] = position
+                if job["position_callback"]:
+                    task = asyncio.create_task(self._notify(job["position_callback"], position))
+                    self.notifications.add(task)
+                    task.add_done_callback(self.notifications.discard)
+
+    def _dispatch(self):
+        while self.running < self.max_running:
+            job = self._pop_next()
+            if job is None:
+                break
+            self.running += 1
+            logger.info(f"Dispatching job for user {job['user_id']}: {job['theme']}")
+            job["task"] = asyncio.create_task(self._run(job))
+        self._report_positions()
+
+    async def _run(self, job):
+        try:
+            result = await self.orchestrator.start_job(
+                job["theme"], job["progress_callback"], page_slots=self.page_slots,
+                resume_run_id=job["resume_run_id"], bible_version=job["bible_version"], user_id=job["user_id"]
+            )
+            if not job["future"].done():
+                job["future"].set_result(result)
+        except Exception as e:
+            if not job["future"].done():
+                job["future"].set_exception(e)
+        finally:
+            self.running -= 1
+            self._release_user(job["user_id"])
+            self._dispatch()
+
+    async def submit(self, user_id, theme, progress_callback=None, position_callback=None, priority=PRIORITY_NORMAL,
+                     resume_run_id=None, bible_version=None):
+        """
+        Queues a book and waits for its result (same dict as AgentOmega.start_job).
+        resume_run_id resumes an earlier run from its manifest instead of starting fresh.
+        bible_version selects the Series Master Bible (default: config.BIBLE_VERSION).
+        position_callback(position) is awaited whenever the queue position changes.
+        Raises QueueFullError if admission control rejects the job.
+        """
+        if self.queued_count() >= self.max_queue:
+            raise QueueFullError(f"Queue is full ({self.max_queue} books waiting). Please try again later.")
+        if self.jobs_per_user.get(user_id, 0) >= self.max_per_user:
+            raise QueueFullError(f"You already have {self.max_per_user} books in progress. Please wait for one to finish.")
+
+        job = {
+            "user_id": user_id,
+            "theme": theme,
+            "priority": priority,
+            "resume_run_id": resume_run_id,
+            "bible_version": bible_version,
+            "progress_callback": progress_callback,
+            "position_callback": position_callback,
+            "position": None,
+            "future": asyncio.get_running_loop().create_future(),
+            "task": None
+        }
+        self.jobs_per_user[user_id] = self.jobs_per_user.get(user_id, 0) + 1
+        self.queues.setdefault(priority, OrderedDict()).setdefault(user_id, deque()).append(job)
+        logger.info(f"Queued job for user {user_id} (priority {priority}): {theme}")
+        self._dispatch()
+
+        try:
+            return await job["future"]
+        except asyncio.CancelledError:
+            # Caller went away: drop the job if still queued, otherwise stop it
+            if self._remove(job):
+                self._release_user(user_id)
+                self._report_positions()
+            elif job["task"]:
+                job["task"].cancel()
+            raise
@@ -0,0 +1,119 @@
+"""
+Stream Decoder: Incremental Base64 Image Extraction (Infrastructure)
+Mission: Never hold a whole image response in memory.
+
+Image API responses are JSON documents whose bulk is one or more base64 strings
+(Imagen: "bytesBase64Encoded", Gemini: inlineData "data"). The decoder scans
+the response bytes chunk by chunk, and every time one of those fields starts it
+opens an output file and base64-decodes the value straight into it. Only the
+current chunk, a few bytes of carry-over and a short preview (for error
+messages) are kept, so peak memory does not grow with image size.
+"""
+
+import base64
+import logging
+import os
+import re
+
+logger = logging.getLogger("StreamDecoder")
+
+STREAM_CHUNK_SIZE = 64 * 1024
+PREVIEW_BYTES = 2048 # Start of the response, kept for error messages
+_SEEK_TAIL = 128 # Bytes kept between chunks so a field name split across chunks is still found
+
+
+class Base64StreamDecoder:
+    def __init__(self, fields, open_output):
+        """
+        fields: JSON keys whose string values are base64 images.
+        open_output(index) -> file path for the index-th image found.
+        """
+        names = b"|".join(re.escape(field.encode("utf-8")) for field in fields)
+        self.pattern = re.compile(rb'"(?:' + names + rb')"\s*:\s*"')
+        self.open_output = open_output
+        self.tail = b""      # Unmatched bytes while seeking the next field
+        self.pending = b""   # base64 characters not yet decoded (< 4) or a split escape
+        self.file = None
+        self.path = None
+        self.paths = []
+        self.preview = bytearray()
+
+    def feed(self, chunk):
+        if len(self.preview) < PREVIEW_BYTES:
+            self.preview += chunk[:PREVIEW_BYTES - len(self.preview)]
+        data = chunk
+        while data:
+            data = self._read_value(data) if self.file else self._seek(data)
+
+    def _seek(self, data):
+        buf = self.tail + data
+        match = self.pattern.search(buf)
+        if not match:
+            self.tail = buf[-_SEEK_TAIL:]
+            return b""
+        self.tail = b""
+        self.path = self.open_output(len(self.paths))
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.file = open(self.path, "wb")
+        return buf[match.end():]
+
+    def _read_value(self, data):
+        end = data.find(b'"')
+        segment = data if end == -1 else data[:end]
+        self._write(segment)
+        if end == -1:
+            return b""
+        self._finish_value()
+        return data[end + 1:]
+
+    def _write(self, segment):
+        buf = self.pending + segment
+        if b"\\" in buf:
+            # JSON escapes that may appear in base64 strings: "\/" and line breaks
+            if buf.endswith(b"\\"):
+                buf, carry = buf[:-1], b"\\"
+            else:
+                carry = b""
+            buf = buf.replace(b"\\/", b"/").replace(b"\\n", b"").replace(b"\\r", b"")
+        else:
+            carry = b""
+        usable = len(buf) // 4 * 4
+        if usable:
+            self.file.write(base64.b64decode(buf[:usable]))
+        self.pending = buf[usable:] + carry
+
+    def _finish_value(self):
+        if self.pending:
+            self.file.write(base64.b64decode(self.pending + b"=" * (-len(self.pending) % 4)))
+            self.pending = b""
+        self.file.close()
+        self.file = None
+        self.paths.append(self.path)
+
+    def preview_text(self):
+        return self.preview.decode("utf-8", errors="replace")
+
+    def close(self):
+        """
+        Ends the stream and returns the written image paths.
+        Raises ValueError if the stream stopped in the middle of an image.
+        """
+        if self.file:
+            self.abort()
+            raise ValueError("Response ended in the middle of an image.")
+        return list(self.paths)
+
+    def abort(self):
+        """Discards everything written so far (failed or truncated response)."""
+        if self.file:
+            self.file.close()
+            self.file = None
+            self.paths.append(self.path)
+        for path in self.paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self.paths = []
@@ -0,0 +1,188 @@
+"""
+Stub Image Server: Offline Image API (Infrastructure)
+Mission: Run the whole pipeline without the image API (load tests, benchmarks, CI).
+
+A small localhost HTTP server that speaks the Imagen :predict protocol
+({"instances": [{"prompt"}], "parameters": {"sampleCount"}} ->
+{"predictions": [{"bytesBase64Encoded", "mimeType"}]}). Images are synthetic
+black-on-white line art drawn from a hash of the prompt, so the same prompt
+always yields the same picture. Latency, HTTP 500 rate and HTTP 429 rate are
+configurable (STUB_* in config) to exercise retries and adaptive control.
+
+Agent Charlie starts one in-process when IMAGE_BACKEND=stub, or points at an
+external one via STUB_SERVER_URL:
+    python -m src.modules.stub_image_server --port 8765
+"""
+
+import argparse
+import base64
+import hashlib
+import io
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from PIL import Image, ImageDraw
+
+# Add project root to sys.path to allow 'from src...' imports when run as a script
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src import config
+
+logger = logging.getLogger("StubImageServer")
+
+
+def render_line_art(prompt, index=0, size=None):
+    """Deterministic synthetic line art (PNG bytes) for a prompt and sample index."""
+    size = size or config.STUB_IMAGE_SIZE
+    seed = int.from_bytes(hashlib.sha256(f"{prompt}\0{index}".encode("utf-8")).digest()[:8], "big")
+    rng = random.Random(seed)
+    img = Image.new("L", (size, size), 255)
+    draw = ImageDraw.Draw(img)
+    width = max(2, size // 256)
+    margin = size // 16
+    draw.rectangle([margin, margin, size - margin, size - margin], outline=0, width=width)
+    for _ in range(rng.randint(6, 14)):
+        x0, y0 = rng.randint(margin * 2, size // 2), rng.randint(margin * 2, size // 2)
+        x1, y1 = x0 + rng.randint(size // 16, size // 3), y0 + rng.randint(size // 16, size // 3)
+        shape = rng.choice(("rectangle", "ellipse", "line"))
+        if shape == "rectangle":
+            draw.rectangle([x0, y0, x1, y1], outline=0, width=width)
+        elif shape == "ellipse":
+            draw.ellipse([x0, y0, x1, y1], outline=0, width=width)
+        else:
+            draw.line([x0, y0, x1, y1], fill=0, width=width)
+    buffer = io.BytesIO()
+    img.save(buffer, format="PNG", optimize=True)
+    return buffer.getvalue()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # Keep-alive, like the real API
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+    def _reply(self, status, body, headers=None):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        stub = self.server.stub
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            return self._reply(400, {"error": {"code": 400, "message": "Invalid JSON"}})
+        if not self.path.endswith(":predict"):
+            return self._reply(404, {"error": {"code": 404, "message": f"Unknown endpoint {self.path}"}})
+
+        if stub.latency:
+            time.sleep(stub.latency)
+        outcome = stub.roll()
+        if outcome == 429:
+            return self._reply(429, {"error": {"code": 429, "message": "Stub quota exceeded"}}, {"Retry-After": "1"})
+        if outcome == 500:
+            return self._reply(500, {"error": {"code": 500, "message": "Stub internal error"}})
+
+        try:
+            prompt = request["instances"][0]["prompt"]
+        except (KeyError, IndexError, TypeError):
+            return self._reply(400, {"error": {"code": 400, "message": "Missing instances[0].prompt"}})
+        count = int((request.get("parameters") or {}).get("sampleCount") or 1)
+        predictions = [
+            {"mimeType": "image/png", "bytesBase64Encoded": base64.b64encode(render_line_art(prompt, i, stub.size)).decode("utf-8")}
+            for i in range(max(1, min(count, 4)))
+        ]
+        with stub.lock:
+            stub.served += 1
+        self._reply(200, {"predictions": predictions})
+
+
+class StubImageServer:
+    def __init__(self, host="127.0.0.1", port=0, latency=None, error_rate=None, throttle_rate=None, size=None, seed=None):
+        self.latency = config.STUB_LATENCY_SEC if latency is None else latency
+        self.error_rate = config.STUB_ERROR_RATE if error_rate is None else error_rate
+        self.throttle_rate = config.STUB_THROTTLE_RATE if throttle_rate is None else throttle_rate
+        self.size = size or config.STUB_IMAGE_SIZE
+        self.rng = random.Random(config.STUB_SEED if seed is None else seed) # Seeded: reproducible failure pattern
+        self.lock = threading.Lock()
+        self.served = 0
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.stub = self
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def roll(self):
+        """Decides the outcome of one request: 429, 500 or 200."""
+        with self.lock:
+            draw = self.rng.random()
+        if draw < self.throttle_rate:
+            return 429
+        if draw < self.throttle_rate + self.error_rate:
+            return 500
+        return 200
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="StubImageServer", daemon=True)
+        self.thread.start()
+        logger.info(f"Stub image server listening on {self.url} "
+                    f"(latency {self.latency}s, errors {self.error_rate:.0%}, throttles {self.throttle_rate:.0%})")
+        return self
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def get_stub_server():
+    """Returns the process-wide in-process stub server (started on first use)."""
+    global _server
+    with _server_lock:
+        if _server is None:
+            _server = StubImageServer().start()
+        return _server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local stub of the Imagen :predict API (synthetic line art).")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=None, help="Seconds per request (default: STUB_LATENCY_SEC)")
+    parser.add_argument("--error-rate", type=float, default=None, help="Fraction answered with 500 (default: STUB_ERROR_RATE)")
+    parser.add_argument("--throttle-rate", type=float, default=None, help="Fraction answered with 429 (default: STUB_THROTTLE_RATE)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    server = StubImageServer(args.host, args.port, args.latency, args.error_rate, args.throttle_rate)
+    logger.info(f"Serving on {server.url} (set IMAGE_BACKEND=stub STUB_SERVER_URL={server.url})")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
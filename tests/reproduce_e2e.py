@@ -3,7 +3,7 @@ import os
 import sys
 import asyncio
 import logging
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, AsyncMock
 
 # Add project root to sys.path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -32,12 +32,13 @@ async def run_test():
     omega = AgentOmega()
     
     # Mock Agent Charlie (Image Generator)
-    omega.charlie.generate_image = MagicMock(side_effect=lambda prompt, theme, page_num: f"temp/test_{page_num}.png")
+    omega.charlie.generate_image_async = AsyncMock(side_effect=lambda prompt, theme, page_num, use_cache=True, run_id=None: f"temp/test_{page_num}.png")
     
     # Mock Agent Bravo (Prompt Generator)
     # We need to return the structure expected by AgentOmega
-    omega.bravo.generate_prompts = MagicMock(return_value={
+    omega.bravo.generate_prompts_async = AsyncMock(return_value={
         "prompts": [
+            {"type": "cover", "page_number": 1, "prompt": "cover_prompt"},
             {"type": "mission", "page_number": 2, "prompt": "p1"},
             {"type": "parents", "page_number": 3, "prompt": "p2"},
             {"type": "intro", "page_number": 4, "prompt": "p3"},
@@ -48,10 +49,9 @@ async def run_test():
         "main_character": "Hero",
         "gear_objects": "Gear"
     })
-    omega.bravo.generate_cover = MagicMock(return_value="cover_prompt")
     
     # Mock Agent Delta (QA)
-    omega.delta.quality_check = MagicMock(return_value=True)
+    omega.delta.review_async = AsyncMock(return_value={"passed": True, "reason": "PASS", "failed_criteria": []})
     
     # Mock Agent Echo (PDF Assembler)
     omega.echo.assemble_pdf = MagicMock(return_value="temp/test_output.pdf")
@@ -83,7 +83,7 @@ async def run_test():
     # call_args_list is a list of calls. Each call is (args, kwargs).
     # args: (prompt, theme, page_num_str)
     
-    calls = omega.charlie.generate_image.call_args_list
+    calls = omega.charlie.generate_image_async.call_args_list
     logger.info(f"Agent Charlie called {len(calls)} times.")
     
     if len(calls) != 2:
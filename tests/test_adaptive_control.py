@@ -0,0 +1,72 @@
+import unittest
+import asyncio
+import os
+import sys
+from unittest.mock import MagicMock
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.modules.adaptive_control import AdaptiveController, retry_after_seconds, is_throttle_error
+
+class TestAdaptiveControl(unittest.TestCase):
+    def setUp(self):
+        self.limiter = MagicMock()
+        self.controller = AdaptiveController("test-model", self.limiter, initial=4, minimum=1, maximum=8)
+
+    def test_throttle_halves_and_pauses(self):
+        print("\nTesting Multiplicative Decrease...")
+        self.controller.on_throttle(retry_after=12)
+        self.assertEqual(self.controller.limit, 2)
+        self.limiter.pause.assert_called_with(12)
+        self.limiter.set_rate_scale.assert_called_with(0.5)
+
+    def test_success_increases_additively(self):
+        print("\nTesting Additive Increase...")
+        for _ in range(4):
+            self.controller.on_success(1.0)
+        # +1/limit per success: one full window of 4 successes adds ~1 slot
+        self.assertAlmostEqual(self.controller.limit, 5.0, delta=0.2)
+        self.assertGreater(self.controller.rate_scale, 1.0)
+
+    def test_slow_latency_backs_off(self):
+        print("\nTesting Latency Signal...")
+        self.controller.on_success(1.0)
+        limit = self.controller.limit
+        self.controller.on_success(10.0)
+        self.assertLess(self.controller.limit, limit)
+
+    def test_slots_follow_limit(self):
+        print("\nTesting Dynamic Slots...")
+        controller = AdaptiveController("test-model", self.limiter, initial=2, minimum=1, maximum=8)
+        peak = 0
+
+        async def call():
+            nonlocal peak
+            async with controller.slot():
+                peak = max(peak, controller.in_flight)
+                await asyncio.sleep(0.02)
+
+        async def run():
+            await asyncio.gather(*(call() for _ in range(6)))
+
+        asyncio.run(run())
+        self.assertEqual(peak, 2)
+        self.assertEqual(controller.in_flight, 0)
+
+    def test_retry_after_parsing(self):
+        print("\nTesting Retry-After Parsing...")
+        response = MagicMock(headers={"Retry-After": "7"})
+        self.assertEqual(retry_after_seconds(response), 7.0)
+        self.assertEqual(retry_after_seconds(Exception("429 Quota exceeded. Please retry in 23.5s.")), 23.5)
+        self.assertIsNone(retry_after_seconds(Exception("boom")))
+
+    def test_throttle_error_detection(self):
+        print("\nTesting Throttle Detection...")
+        error = Exception("quota")
+        error.code = 429
+        self.assertTrue(is_throttle_error(error))
+        self.assertFalse(is_throttle_error(ValueError("bad")))
+
+if __name__ == '__main__':
+    unittest.main()
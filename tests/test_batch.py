@@ -0,0 +1,111 @@
+import unittest
+import asyncio
+import json
+import os
+import sys
+import shutil
+import tempfile
+from unittest.mock import patch
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src import config
+from src.batch import read_jobs, run_batch
+from src.modules.job_manifest import JobManifest
+
+class FakeOrchestrator:
+    def __init__(self):
+        self.started = []
+        self.resumed = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def start_job(self, theme, progress_callback=None, page_slots=None, resume_run_id=None, bible_version=None,
+                        user_id=None):
+        self.started.append(theme)
+        self.resumed.append(resume_run_id)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        if theme == "Broken":
+            error = Exception("No images generated. Job failed.")
+            error.run_id = resume_run_id or "ab12cd34" # As AgentOmega.start_job attaches it
+            raise error
+        return {"status": "SUCCESS", "run_id": f"run-{theme}", "pdf_path": f"output/{theme}.pdf", "previews": {}}
+
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.input_path = os.path.join(self.tmp, "themes.jsonl")
+        self.output_path = os.path.join(self.tmp, "results.jsonl")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def _write_input(self, lines):
+        with open(self.input_path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+
+    def _read_output(self):
+        with open(self.output_path) as f:
+            return [json.loads(line) for line in f]
+
+    def test_read_jobs(self):
+        print("\nTesting Batch Input Parsing...")
+        self._write_input([
+            '"Firefighter"',
+            '# comment',
+            '',
+            '{"id": "astro", "theme": "Astronaut"}',
+            '{"id": "old", "resume_run_id": "ab12cd34"}'
+        ])
+        jobs = read_jobs(self.input_path)
+        self.assertEqual([j["id"] for j in jobs], ["line-1", "astro", "old"])
+        self.assertEqual(jobs[0]["theme"], "Firefighter")
+        self.assertEqual(jobs[2]["resume_run_id"], "ab12cd34")
+
+        self._write_input(['{"id": "x"}'])
+        with self.assertRaises(ValueError):
+            read_jobs(self.input_path)
+
+    def test_results_streamed_and_failures_recorded(self):
+        print("\nTesting Batch Run...")
+        self._write_input([json.dumps({"id": f"job{i}", "theme": t}) for i, t in enumerate(["A", "Broken", "B", "C"])])
+        omega = FakeOrchestrator()
+
+        results = asyncio.run(run_batch(omega, read_jobs(self.input_path), self.output_path, max_jobs=2))
+
+        self.assertEqual(len(results), 4)
+        self.assertLessEqual(omega.max_in_flight, 2)
+        self.assertGreater(omega.max_in_flight, 1)
+        by_id = {r["id"]: r for r in self._read_output()}
+        self.assertEqual(by_id["job1"]["status"], "FAILED")
+        self.assertEqual(by_id["job1"]["run_id"], "ab12cd34")
+        self.assertIn("No images generated", by_id["job1"]["error"])
+        self.assertEqual(by_id["job0"]["pdf_path"], "output/A.pdf")
+
+    def test_rerun_skips_completed_jobs(self):
+        print("\nTesting Batch Re-run...")
+        self._write_input(['{"id": "a", "theme": "A"}', '{"id": "b", "theme": "Broken"}'])
+        jobs = read_jobs(self.input_path)
+        with patch.object(config, "MANIFEST_DIR", self.tmp):
+            asyncio.run(run_batch(FakeOrchestrator(), jobs, self.output_path, max_jobs=1))
+
+            # Without its manifest the failed job starts over
+            omega = FakeOrchestrator()
+            asyncio.run(run_batch(omega, jobs, self.output_path, max_jobs=1))
+            # Only the failed job is retried
+            self.assertEqual(omega.started, ["Broken"])
+            self.assertEqual(omega.resumed, [None])
+            self.assertEqual(len(self._read_output()), 3)
+
+            # With its manifest it is resumed, not regenerated from scratch
+            JobManifest.create("ab12cd34", "Broken")
+            omega = FakeOrchestrator()
+            asyncio.run(run_batch(omega, jobs, self.output_path, max_jobs=1))
+            self.assertEqual(omega.resumed, ["ab12cd34"])
+
+if __name__ == '__main__':
+    unittest.main()
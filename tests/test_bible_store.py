@@ -0,0 +1,93 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+from unittest.mock import patch
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.modules.bible_store import BibleStore, parse_sections, get_bible, available_versions
+
+SAMPLE_BIBLE = """# BIBLE
+### 1.6 GLOBAL_BLUEPRINT_SPECS
+#### [PAGE_04_KNOLLING] (Miniature Gear Box)
+* **Structure:** "Visual Island" (60% Scale).
+
+#### [PAGE_05_ACTION] (Action Scene)
+* **Structure:** Full Bleed.
+
+## 2. MASTER COVER BLUEPRINT
+Unrelated chapter.
+### [TECH_ENVELOPE_INTERNAL]
+Canvas: 8.625x8.75 inches.
+"""
+
+PAGE_TAGS = ["[PAGE_01_MISSION]", "[PAGE_02_PARENTS]", "[PAGE_03_START]", "[PAGE_04_KNOLLING]",
+             "[PAGE_05_ACTION]", "[PAGE_50_CERTIFICATE]"]
+
+def baseline_extract(content, section_tag):
+    """The original in-place extractor (prompt_generator._extract_bible_specs before the store)."""
+    start_idx = content.find(section_tag)
+    if start_idx == -1:
+        return ""
+    content_after_tag = content[start_idx:]
+    next_header_idx = content_after_tag.find("#### [", 1)
+    if next_header_idx != -1:
+        return content_after_tag[:next_header_idx].strip()
+    return content_after_tag.strip()
+
+class TestBibleStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, "bible.md")
+        with open(self.path, "w") as f:
+            f.write(SAMPLE_BIBLE)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_section_index(self):
+        print("\nTesting Bible Section Index...")
+        sections = parse_sections(SAMPLE_BIBLE)
+        self.assertEqual(set(sections), {"[PAGE_04_KNOLLING]", "[PAGE_05_ACTION]", "[TECH_ENVELOPE_INTERNAL]"})
+        self.assertIn("Visual Island", sections["[PAGE_04_KNOLLING]"])
+        self.assertNotIn("PAGE_05_ACTION", sections["[PAGE_04_KNOLLING]"])
+        # A section stops at the next heading of the same or a higher level
+        self.assertNotIn("Unrelated chapter", sections["[PAGE_05_ACTION]"])
+        self.assertTrue(sections["[PAGE_04_KNOLLING]"].startswith("[PAGE_04_KNOLLING] (Miniature Gear Box)"))
+
+    def test_matches_baseline_extractor(self):
+        print("\nTesting Bible Sections vs Baseline Extractor...")
+        for version in ["5.21", "5.22"]:
+            with open(f"Series Master Bible v{version}.md", "r") as f:
+                content = f.read()
+            sections = parse_sections(content)
+            for tag in PAGE_TAGS:
+                self.assertEqual(sections[tag], baseline_extract(content, tag), f"{tag} (v{version})")
+
+    def test_reindexed_only_when_file_changes(self):
+        print("\nTesting Bible Reload...")
+        store = BibleStore(self.path)
+        self.assertIn("Full Bleed", store.section("[PAGE_05_ACTION]"))
+
+        # Unchanged file: no re-read
+        with patch("builtins.open") as mock_open:
+            store.section("[PAGE_05_ACTION]")
+            mock_open.assert_not_called()
+
+        with open(self.path, "w") as f:
+            f.write(SAMPLE_BIBLE.replace("Full Bleed", "Center Safe Zone"))
+        os.utime(self.path, (0, 12345)) # Force a new mtime even on coarse filesystems
+        self.assertIn("Center Safe Zone", store.section("[PAGE_05_ACTION]"))
+
+    def test_repo_versions(self):
+        print("\nTesting Bible Versions...")
+        self.assertTrue({"5.12.1", "5.21", "5.22"} <= set(available_versions()))
+        self.assertIn("Visual Island", get_bible("5.22").section("[PAGE_04_KNOLLING]"))
+        # v5.12.1 has no SSOT tags; its lettered Master Prompt sections are used instead
+        self.assertIn("Knolling Page", get_bible("5.12.1").section("[PAGE_04_KNOLLING]"))
+
+if __name__ == '__main__':
+    unittest.main()
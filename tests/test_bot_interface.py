@@ -0,0 +1,40 @@
+import unittest
+import asyncio
+import os
+import sys
+from unittest.mock import MagicMock, AsyncMock, patch
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.modules.bot_interface import AgentFoxtrot
+
+class TestBotInterface(unittest.TestCase):
+    def setUp(self):
+        with patch.dict(os.environ, {"TELEGRAM_TOKEN": "test-token"}):
+            self.bot = AgentFoxtrot(MagicMock(), scheduler=MagicMock())
+        self.dashboard = MagicMock(text="", edit_text=AsyncMock())
+        self.update = MagicMock()
+        self.update.effective_user.id = 42
+        self.update.message.reply_text = AsyncMock(return_value=self.dashboard)
+
+    def _failure_message(self, error):
+        self.bot.scheduler.submit = AsyncMock(side_effect=error)
+        asyncio.run(self.bot._run_job(self.update, "Firefighter"))
+        return self.dashboard.edit_text.call_args[0][0]
+
+    def test_failure_shows_run_id(self):
+        print("\nTesting Bot Failure Message...")
+        error = RuntimeError("PDF assembly failed")
+        error.run_id = "ab12cd34"
+        message = self._failure_message(error)
+        self.assertIn("Mission Failed", message)
+        self.assertIn("/resume ab12cd34", message) # Usable without Mission Control
+
+        # Failed before a run existed: nothing to resume
+        message = self._failure_message(RuntimeError("Sheets unavailable"))
+        self.assertNotIn("/resume", message)
+        self.assertIn("/generate", message)
+
+if __name__ == '__main__':
+    unittest.main()
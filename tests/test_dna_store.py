@@ -0,0 +1,60 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+from unittest.mock import MagicMock, patch
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from PIL import Image
+from src.modules.dna_store import DNAStore
+from src.modules.prompt_generator import AgentBravo
+
+class TestDNAStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.store_path = os.path.join(self.tmp, "visual_dna.json")
+        self.ref = os.path.join(self.tmp, "ref_cover_01.png")
+        Image.new("RGB", (16, 16), "white").save(self.ref)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_key_follows_file_content(self):
+        print("\nTesting DNA Store Invalidation...")
+        store = DNAStore(self.store_path, enabled=True)
+        key = store.make_key("cover", [self.ref], "prompt")
+        store.put(key, "cover", [self.ref], "thick outlines")
+
+        # Survives a restart
+        self.assertEqual(DNAStore(self.store_path, enabled=True).get(key), "thick outlines")
+
+        # Changed reference -> new key -> miss; storing it replaces the stale entry
+        Image.new("RGB", (16, 16), "black").save(self.ref)
+        new_key = store.make_key("cover", [self.ref], "prompt")
+        self.assertNotEqual(key, new_key)
+        self.assertIsNone(store.get(new_key))
+        store.put(new_key, "cover", [self.ref], "thin outlines")
+        self.assertEqual(list(store.entries), [new_key])
+
+    def test_bravo_analyzes_once(self):
+        print("\nTesting Bravo DNA Reuse...")
+        store = DNAStore(self.store_path, enabled=True)
+        with patch("src.modules.prompt_generator.get_dna_store", return_value=store):
+            bravo = AgentBravo()
+        bravo.vision_model = MagicMock()
+        bravo.vision_model.generate_content.return_value.text = "Extracted DNA"
+        bravo.limiter = MagicMock()
+        bravo._reference_files = MagicMock(return_value=[self.ref])
+
+        bravo.analyze_assets(["cover"])
+        bravo.style_library.clear()
+        bravo.analyze_assets(["cover"])
+
+        self.assertEqual(bravo.vision_model.generate_content.call_count, 1)
+        self.assertEqual(bravo.style_library["dna_cover"], "Extracted DNA")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.modules.generation_cache import GenerationCache
+
+class TestGenerationCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.cache = GenerationCache(cache_dir=os.path.join(self.tmp, "cache"), max_bytes=250, enabled=True)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def _file(self, name, size=100):
+        path = os.path.join(self.tmp, name)
+        with open(path, "wb") as f:
+            f.write(os.urandom(size))
+        return path
+
+    def test_key_covers_prompt_and_references(self):
+        print("\nTesting Cache Key...")
+        ref = self._file("ref.png")
+        base = self.cache.make_key("a knight")
+        self.assertEqual(base, self.cache.make_key("a knight"))
+        self.assertNotEqual(base, self.cache.make_key("a dragon"))
+
+        with_ref = self.cache.make_key("a knight", [ref])
+        self.assertNotEqual(base, with_ref)
+        # Same path, different bytes -> different key
+        self._file("ref.png")
+        self.assertNotEqual(with_ref, self.cache.make_key("a knight", [ref]))
+
+    def test_hit_and_miss(self):
+        print("\nTesting Cache Hit/Miss...")
+        dest = os.path.join(self.tmp, "out.png")
+        self.assertIsNone(self.cache.get("k1", dest))
+
+        image = self._file("gen.png")
+        self.cache.put("k1", image)
+        self.assertEqual(self.cache.get("k1", dest), dest)
+        with open(image, "rb") as a, open(dest, "rb") as b:
+            self.assertEqual(a.read(), b.read())
+
+    def test_lru_eviction_by_size(self):
+        print("\nTesting LRU Eviction...")
+        dest = os.path.join(self.tmp, "out.png")
+        self.cache.put("old", self._file("1.png"))
+        time.sleep(0.01)
+        self.cache.put("used", self._file("2.png"))
+        time.sleep(0.01)
+        self.cache.get("old", dest) # "old" becomes most recently used
+        time.sleep(0.01)
+        self.cache.put("new", self._file("3.png")) # 300 bytes > 250 -> evict LRU ("used")
+
+        self.assertIsNotNone(self.cache.get("old", dest))
+        self.assertIsNotNone(self.cache.get("new", dest))
+        self.assertIsNone(self.cache.get("used", dest))
+
+    def test_opt_out(self):
+        print("\nTesting Opt-Out...")
+        cache = GenerationCache(cache_dir=os.path.join(self.tmp, "off"), enabled=False)
+        cache.put("k1", self._file("gen.png"))
+        self.assertIsNone(cache.get("k1", os.path.join(self.tmp, "out.png")))
+        self.assertFalse(os.path.exists(os.path.join(self.tmp, "off")))
+
+if __name__ == '__main__':
+    unittest.main()
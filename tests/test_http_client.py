@@ -0,0 +1,73 @@
+import unittest
+import asyncio
+import os
+import sys
+import tempfile
+from unittest.mock import patch, MagicMock
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import httpx
+from src import config
+from src.modules.http_client import get_session, get_async_client, request_timeout
+from src.modules.image_generator import AgentCharlie
+from src.modules.image_backends import get_backend
+from src.modules.key_pool import KeyPool
+from src.modules.stream_decoder import Base64StreamDecoder
+
+class TestHttpClient(unittest.TestCase):
+    def test_shared_session(self):
+        print("\nTesting Pooled Session...")
+        session = get_session()
+        self.assertIs(session, get_session())
+        adapter = session.get_adapter("https://generativelanguage.googleapis.com")
+        self.assertEqual(adapter._pool_maxsize, config.HTTP_POOL_SIZE)
+        self.assertEqual(request_timeout(), (config.HTTP_CONNECT_TIMEOUT, config.HTTP_READ_TIMEOUT))
+
+    def test_async_client_per_loop(self):
+        print("\nTesting Pooled Async Client...")
+
+        async def clients():
+            first = get_async_client()
+            second = get_async_client()
+            await asyncio.sleep(0)
+            return first, second
+
+        first, second = asyncio.run(clients())
+        self.assertIs(first, second)
+        self.assertEqual(first.timeout.connect, config.HTTP_CONNECT_TIMEOUT)
+        self.assertEqual(first.timeout.read, config.HTTP_READ_TIMEOUT)
+        # A new event loop gets its own client (connections are bound to a loop)
+        other, _ = asyncio.run(clients())
+        self.assertIsNot(first, other)
+
+    def test_charlie_reuses_client(self):
+        print("\nTesting Charlie Connection Reuse...")
+        calls = []
+
+        def handler(request):
+            calls.append(request.url.path)
+            return httpx.Response(200, json={"predictions": [{"bytesBase64Encoded": "iVBORw0KGgo="}]})
+
+        async def run():
+            client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            charlie = AgentCharlie(get_backend("imagen"))
+            charlie.keys = KeyPool(["test-key"])
+            charlie.limiter = MagicMock()
+            charlie.limiter.acquire_async = MagicMock(side_effect=lambda *a: asyncio.sleep(0))
+            with tempfile.TemporaryDirectory() as tmp, \
+                 patch("src.modules.image_generator.get_async_client", return_value=client) as factory:
+                for i in range(3):
+                    decoder = Base64StreamDecoder(["bytesBase64Encoded"], lambda index: os.path.join(tmp, f"{i}_{index}.png"))
+                    paths = await charlie._stream_async("https://example.test/v1/predict", {}, decoder)
+                    self.assertEqual(len(paths), 1)
+            self.assertFalse(client.is_closed) # Not torn down after each request
+            await client.aclose()
+            return factory.call_count
+
+        self.assertEqual(asyncio.run(run()), 3)
+        self.assertEqual(len(calls), 3)
+
+if __name__ == '__main__':
+    unittest.main()
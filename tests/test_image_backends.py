@@ -0,0 +1,86 @@
+import unittest
+import asyncio
+import os
+import sys
+import shutil
+import tempfile
+from unittest.mock import patch
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from PIL import Image
+from src import config
+from src.modules.image_backends import get_backend
+from src.modules.image_generator import AgentCharlie
+from src.modules.stub_image_server import StubImageServer, render_line_art
+
+class TestImageBackends(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.wireframe = os.path.join(self.tmp, "ref_wireframe.png")
+        Image.new("RGB", (64, 64), "white").save(self.wireframe)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_request_shapes(self):
+        print("\nTesting Backend Request Shapes...")
+        backend = get_backend("imagen")
+        url, payload = backend.build_request("A fox", 3, self.wireframe)
+        self.assertTrue(url.endswith("imagen-4.0-generate-001:predict"))
+        self.assertEqual(backend.headers("key")["x-goog-api-key"], "key")
+        self.assertEqual(payload["parameters"]["sampleCount"], 3)
+        self.assertIn("wireframe-guided", payload["instances"][0]["prompt"]) # Text-only layout enforcement
+
+        url, payload = get_backend("gemini_flash").build_request("A fox", 1, self.wireframe, [self.wireframe])
+        self.assertTrue(url.endswith("models/gemini-2.0-flash-exp-image-generation:generateContent"))
+        parts = payload["contents"][0]["parts"]
+        self.assertEqual([p.get("text", "IMAGE")[:5] for p in parts], ["STYLE", "IMAGE", "WIREF", "IMAGE", "A fox"])
+
+        with self.assertRaises(ValueError):
+            get_backend("dalle")
+
+    def test_output_paths_never_collide(self):
+        print("\nTesting Unique Output Paths...")
+        charlie = AgentCharlie(get_backend("stub"))
+        paths = {charlie._output_path("Fire Fighter", "05", run_id="ab12cd34") for _ in range(100)}
+        self.assertEqual(len(paths), 100) # Same theme, page and second
+        self.assertTrue(all(p.startswith("temp/Fire_Fighter_ab12cd34_Page05_") for p in paths))
+        self.assertNotEqual(charlie._output_path("T", "05", 1, "aaaaaaaa"), charlie._output_path("T", "05", 1, "bbbbbbbb"))
+
+    def test_stub_server_end_to_end(self):
+        print("\nTesting Charlie Against the Stub Server...")
+        server = StubImageServer(latency=0, size=128, seed=1).start()
+        try:
+            with patch.object(config, "STUB_SERVER_URL", server.url):
+                charlie = AgentCharlie(get_backend("stub"))
+                charlie.cache.enabled = False
+                charlie._output_path = lambda theme, page, index=None, run_id=None: os.path.join(self.tmp, f"{page}_{index}.png")
+
+                path = charlie.generate_image("A fox", "Theme", 4, use_cache=False)
+                with open(path, "rb") as f:
+                    self.assertEqual(f.read(), render_line_art("A fox", 0, 128)) # Deterministic per prompt
+                with Image.open(path) as img:
+                    self.assertEqual(img.size, (128, 128))
+
+                paths = asyncio.run(charlie.generate_candidates_async("A fox", "Theme", 5, 3, use_cache=False))
+                self.assertEqual(len(paths), 3) # One multi-sample request
+            self.assertEqual(server.served, 2)
+        finally:
+            server.close()
+
+    def test_stub_failures(self):
+        print("\nTesting Stub Error Injection...")
+        server = StubImageServer(latency=0, error_rate=1.0, size=64).start()
+        try:
+            with patch.object(config, "STUB_SERVER_URL", server.url):
+                charlie = AgentCharlie(get_backend("stub"))
+                with self.assertRaises(Exception):
+                    charlie.generate_image("A fox", "Theme", 4, use_cache=False)
+            self.assertEqual(server.served, 0)
+        finally:
+            server.close()
+
+if __name__ == '__main__':
+    unittest.main()
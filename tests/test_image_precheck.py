@@ -0,0 +1,85 @@
+import unittest
+import asyncio
+import os
+import sys
+import shutil
+import tempfile
+from unittest.mock import MagicMock, AsyncMock, patch
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from PIL import Image, ImageDraw
+from src import config
+from src.modules.image_precheck import precheck
+from src.modules.qa_agent import AgentDelta
+from src.modules.qa_cache import QAVerdictCache
+
+class TestImagePreCheck(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def _image(self, name, fill="white", draw=None, mode="RGB"):
+        # Drawn at 2x and downscaled, so line edges are anti-aliased like real renders
+        img = Image.new(mode, (1024, 1024), fill)
+        if draw:
+            draw(ImageDraw.Draw(img))
+        path = os.path.join(self.tmp, f"{name}.png")
+        img.resize((512, 512), Image.LANCZOS).save(path)
+        return path
+
+    def _line_art(self, canvas):
+        for offset in range(100, 900, 80):
+            canvas.ellipse([offset, offset // 2, offset + 120, offset // 2 + 200], outline="black", width=6)
+            canvas.line([100, offset, 900, offset + 40], fill="black", width=5)
+
+    def test_verdicts(self):
+        print("\nTesting Local Pre-QA Filter...")
+        line_art = self._image("line_art", draw=self._line_art)
+        self.assertTrue(precheck(line_art)[0])
+
+        def colored(canvas):
+            self._line_art(canvas)
+            canvas.rectangle([200, 200, 700, 700], fill=(220, 40, 40))
+        passed, reason, _ = precheck(self._image("colored", draw=colored))
+        self.assertFalse(passed)
+        self.assertIn("colored", reason)
+
+        def shaded(canvas):
+            self._line_art(canvas)
+            canvas.rectangle([100, 100, 900, 900], fill=(128, 128, 128))
+        passed, reason, _ = precheck(self._image("shaded", draw=shaded))
+        self.assertFalse(passed)
+        self.assertIn("gray", reason)
+
+        passed, reason, _ = precheck(self._image("blank"))
+        self.assertFalse(passed)
+        self.assertIn("blank", reason)
+
+        passed, reason, _ = precheck(self._image("black", fill="black"))
+        self.assertFalse(passed)
+
+        # Covers are full color: only blank / no-line-work images are rejected locally
+        self.assertTrue(precheck(self._image("cover", draw=colored), "cover")[0])
+        self.assertFalse(precheck(self._image("blank_cover"), "cover")[0])
+
+    def test_delta_skips_model_call(self):
+        print("\nTesting Pre-Check Saves the QA Call...")
+        delta = AgentDelta()
+        delta.qa_cache = QAVerdictCache(path=os.path.join(self.tmp, "qa.json"), enabled=False)
+        delta._generate_async = AsyncMock(return_value=MagicMock(text="PASS"))
+
+        blank = self._image("blank")
+        line_art = self._image("line_art", draw=self._line_art)
+        with patch.object(config, "QA_CASCADE_ENABLED", False):
+            self.assertFalse(asyncio.run(delta.quality_check_async(blank)))
+            delta._generate_async.assert_not_called()
+
+            self.assertTrue(asyncio.run(delta.quality_check_async(line_art, "knolling")))
+            delta._generate_async.assert_called_once()
+
+if __name__ == '__main__':
+    unittest.main()
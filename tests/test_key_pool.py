@@ -0,0 +1,159 @@
+import unittest
+import asyncio
+import os
+import sys
+import tempfile
+from unittest.mock import patch, MagicMock, AsyncMock
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import httpx
+from src import config
+from src.modules.key_pool import KeyPool, is_auth_error
+from src.modules.rate_limiter import get_limiter
+from src.modules.qa_agent import AgentDelta
+from src.modules.image_generator import AgentCharlie
+from src.modules.image_backends import get_backend
+from src.modules.stream_decoder import Base64StreamDecoder
+
+class ThrottleError(Exception):
+    code = 429
+
+class TestKeyPool(unittest.TestCase):
+    def test_spreads_calls(self):
+        print("\nTesting Key Rotation...")
+        pool = KeyPool(["a", "b", "c"])
+        with pool.lease() as first, pool.lease() as second, pool.lease() as third:
+            self.assertEqual({first.key, second.key, third.key}, {"a", "b", "c"}) # Fewest in flight first
+        used = [pool.acquire().key for _ in range(3)]
+        self.assertEqual(sorted(used), ["a", "b", "c"]) # Least recently used on ties
+
+        # Quota accounting is per key
+        self.assertIsNot(get_limiter("model-x", "key1"), get_limiter("model-x", "key2"))
+        self.assertIs(get_limiter("model-x", "key1"), get_limiter("model-x", "key1"))
+
+    def test_cooldown_and_disable(self):
+        print("\nTesting Key Health...")
+        pool = KeyPool(["a", "b"])
+        a, b = pool.keys
+        pool.on_throttle(a, retry_after=30)
+        self.assertEqual({pool.acquire().key for _ in range(3)}, {"b"})
+
+        error = MagicMock(status_code=403)
+        self.assertTrue(is_auth_error(error))
+        self.assertFalse(is_auth_error(ValueError("bad prompt")))
+        pool.on_error(b, error)
+        status = {entry["id"]: entry for entry in pool.status()}
+        self.assertFalse(status["key2"]["healthy"])
+        self.assertGreater(status["key2"]["cooldown_sec"], config.KEY_DISABLE_SEC - 5)
+        # Everything benched: the key that recovers first still gets the call
+        self.assertEqual(pool.acquire().key, "a")
+
+        single = KeyPool(["only"])
+        self.assertIsNone(single.keys[0].id) # Single key keeps the model-wide limiter
+
+    def test_throttled_call_moves_to_other_key(self):
+        print("\nTesting 429 Failover Across Keys...")
+        delta = AgentDelta()
+        delta.keys = KeyPool(["a", "b"])
+        models = {
+            "a": MagicMock(generate_content_async=AsyncMock(side_effect=ThrottleError("quota"))),
+            "b": MagicMock(generate_content_async=AsyncMock(return_value="PASS")),
+        }
+        for key in delta.keys.keys:
+            key.generative_model = MagicMock(return_value=models[key.key])
+
+        limiter = MagicMock(acquire_async=AsyncMock())
+        controller = MagicMock()
+        controller.slot = MagicMock(return_value=AsyncMock())
+        with patch("src.modules.key_pool.get_limiter", return_value=limiter), \
+             patch("src.modules.key_pool.get_controller", return_value=controller):
+            response = asyncio.run(delta._generate_async(["prompt", "image"]))
+
+        self.assertEqual(response, "PASS")
+        status = {entry["id"]: entry for entry in delta.keys.status()}
+        self.assertEqual(status["key1"]["throttled"], 1)
+        self.assertEqual(status["key2"]["success"], 1)
+        controller.on_throttle.assert_called_once()
+
+    def test_shared_call_helper(self):
+        print("\nTesting Shared Keyed Call Helper...")
+        pool = KeyPool(["a", "b"])
+        limiter, controller = MagicMock(), MagicMock()
+        seen = []
+
+        def request(key):
+            seen.append(key.key)
+            if len(seen) == 1:
+                raise ThrottleError("quota, please retry in 7s.")
+            return "ok"
+
+        with patch("src.modules.key_pool.get_limiter", return_value=limiter), \
+             patch("src.modules.key_pool.get_controller", return_value=controller):
+            self.assertEqual(pool.call("model-x", request, tokens=10), "ok")
+            with self.assertRaises(ValueError):
+                pool.call("model-x", MagicMock(side_effect=ValueError("bad prompt")))
+
+        self.assertEqual(len(set(seen)), 2) # Retried on the other key
+        limiter.acquire.assert_called_with(0)
+        controller.on_throttle.assert_called_once_with(7.0)
+        controller.on_success.assert_called_once()
+        status = {entry["id"]: entry for entry in pool.status()}
+        self.assertEqual(sum(entry["failed"] for entry in status.values()), 1) # Not retried
+
+    def test_charlie_http_429_moves_to_other_key(self):
+        print("\nTesting Charlie 429 Failover Across Keys...")
+        used = []
+
+        def handler(request):
+            used.append(request.headers["x-goog-api-key"])
+            if len(used) == 1:
+                return httpx.Response(429, headers={"Retry-After": "5"}, json={"error": "quota"})
+            return httpx.Response(200, json={"predictions": [{"bytesBase64Encoded": "iVBORw0KGgo="}]})
+
+        async def run(tmp):
+            client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            charlie = AgentCharlie(get_backend("imagen"))
+            charlie.keys = KeyPool(["a", "b"])
+            decoder = Base64StreamDecoder(["bytesBase64Encoded"], lambda index: os.path.join(tmp, f"{index}.png"))
+            with patch("src.modules.image_generator.get_async_client", return_value=client):
+                paths = await charlie._stream_async("https://example.test/v1/predict", {}, decoder)
+            await client.aclose()
+            return charlie.keys, paths
+
+        limiter = MagicMock(acquire_async=AsyncMock())
+        controller = MagicMock()
+        controller.slot = MagicMock(return_value=AsyncMock())
+        with tempfile.TemporaryDirectory() as tmp, \
+             patch("src.modules.key_pool.get_limiter", return_value=limiter), \
+             patch("src.modules.key_pool.get_controller", return_value=controller):
+            keys, paths = asyncio.run(run(tmp))
+            self.assertEqual(len(paths), 1)
+
+        self.assertEqual(len(used), 2)
+        self.assertNotEqual(used[0], used[1])
+        controller.on_throttle.assert_called_once_with(5.0)
+        status = {entry["id"]: entry for entry in keys.status()}
+        self.assertEqual(status["key1"]["throttled"], 1)
+        self.assertEqual(status["key2"]["success"], 1)
+
+    def test_models_use_their_own_key(self):
+        print("\nTesting Per-Key SDK Clients...")
+        pool = KeyPool(["key-a", "key-b"])
+        # Sync callers may run in worker threads (no event loop): only the sync client is bound
+        models = [key.generative_model("models/gemini-2.5-pro") for key in pool.keys]
+        self.assertIsNone(models[0]._async_client)
+
+        async def from_event_loop():
+            return [key.generative_model("models/gemini-2.5-pro") for key in pool.keys]
+
+        self.assertEqual(asyncio.run(from_event_loop()), models) # One model per key
+        self.assertIsNot(models[0]._client, models[1]._client)
+        for key, model in zip(pool.keys, models):
+            # Bound clients replace the SDK's process-wide defaults (genai.configure)
+            self.assertEqual(model._client._transport._credentials.token, key.key)
+            self.assertEqual(model._async_client._client._transport._credentials.token, key.key)
+
+if __name__ == '__main__':
+    unittest.main()
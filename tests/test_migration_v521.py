@@ -3,6 +3,7 @@ import os
 import sys
 from PIL import Image
 import shutil
+from unittest.mock import MagicMock
 
 # Add src to path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -40,6 +41,8 @@ class TestMigrationV521(unittest.TestCase):
                 return MockResponse()
                 
         self.bravo.vision_model = MockModel()
+        # Skip the shared rate limiter to keep the test fast
+        self.bravo.limiter = MagicMock()
         
         # Mock analyze_assets to populate style library without API calls
         self.bravo.style_library['dna_page_01'] = "test_dna"
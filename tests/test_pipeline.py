@@ -0,0 +1,239 @@
+import unittest
+import asyncio
+import os
+import sys
+import shutil
+import tempfile
+from unittest.mock import MagicMock, AsyncMock, patch
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src import config
+from src.modules.orchestrator import AgentOmega
+from src.modules.job_manifest import JobManifest
+
+PASS = {"passed": True, "reason": "PASS", "failed_criteria": []}
+
+class TestPipeline(unittest.TestCase):
+    def setUp(self):
+        self.manifest_dir = tempfile.mkdtemp()
+        self.manifest_patch = patch.object(config, "MANIFEST_DIR", self.manifest_dir)
+        self.manifest_patch.start()
+
+        self.omega = AgentOmega()
+        self.omega.bravo.generate_prompts_async = AsyncMock(return_value={
+            "prompts": [
+                {"type": "cover", "page_number": 1, "prompt": "cover_prompt"},
+                {"type": "mission", "page_number": 2, "prompt": "p2"},
+                {"type": "parents", "page_number": 3, "prompt": "p3"},
+                {"type": "intro", "page_number": 4, "prompt": "p4"},
+                {"type": "knolling", "page_number": 5, "prompt": "p5"},
+            ],
+            "main_character": "Hero",
+            "gear_objects": "Gear"
+        })
+        self.omega.delta.review_async = AsyncMock(return_value=PASS)
+        self.omega.echo.assemble_pdf = MagicMock(return_value="temp/test_output.pdf")
+        self.omega.golf = MagicMock()
+
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+        async def slow_generate(prompt, theme, page_num, use_cache=True, run_id=None):
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            # The cover finishes last to prove book order is preserved
+            await asyncio.sleep(0.2 if page_num == "Cover" else 0.05)
+            self.in_flight -= 1
+            return f"temp/test_{page_num}.png"
+
+        self.omega.charlie.generate_image_async = AsyncMock(side_effect=slow_generate)
+        self.omega.charlie.cache_image = MagicMock()
+
+    def tearDown(self):
+        self.manifest_patch.stop()
+        shutil.rmtree(self.manifest_dir)
+
+    def test_pages_run_concurrently_in_order(self):
+        print("\nTesting Concurrent Page Pipeline...")
+        with patch.object(config, "TARGET_PAGES_LIST", []), \
+             patch.object(config, "PIPELINE_CONCURRENCY", 3):
+            result = asyncio.run(self.omega.start_job("TestTheme"))
+
+        self.assertEqual(result["status"], "SUCCESS")
+        self.assertLessEqual(self.max_in_flight, 3)
+        self.assertGreater(self.max_in_flight, 1)
+
+        images = self.omega.echo.assemble_pdf.call_args[0][0]
+        self.assertEqual(images, [
+            "temp/test_Cover.png", "temp/test_02.png", "temp/test_03.png",
+            "temp/test_04.png", "temp/test_05.png"
+        ])
+
+    def test_event_loop_stays_responsive(self):
+        print("\nTesting Event Loop Responsiveness...")
+        ticks = []
+
+        async def run():
+            async def heartbeat():
+                while True:
+                    ticks.append(1)
+                    await asyncio.sleep(0.01)
+
+            beat = asyncio.create_task(heartbeat())
+            await self.omega.start_job("TestTheme")
+            beat.cancel()
+
+        with patch.object(config, "TARGET_PAGES_LIST", []), \
+             patch.object(config, "PIPELINE_CONCURRENCY", 1):
+            asyncio.run(run())
+
+        # Serial run takes ~0.4s; a blocked loop would record a single tick
+        self.assertGreater(len(ticks), 10)
+
+    def test_serial_when_concurrency_is_one(self):
+        print("\nTesting Serial Pipeline...")
+        with patch.object(config, "TARGET_PAGES_LIST", []), \
+             patch.object(config, "PIPELINE_CONCURRENCY", 1):
+            asyncio.run(self.omega.start_job("TestTheme"))
+
+        self.assertEqual(self.max_in_flight, 1)
+
+    def test_target_pages_pushed_to_bravo(self):
+        print("\nTesting Target-Aware Prompt Generation...")
+        with patch.object(config, "TARGET_PAGES_LIST", [5]):
+            asyncio.run(self.omega.start_job("TestTheme"))
+
+        self.omega.bravo.generate_prompts_async.assert_called_once_with("TestTheme", [5], config.BIBLE_VERSION)
+        images = self.omega.echo.assemble_pdf.call_args[0][0]
+        self.assertEqual(images, ["temp/test_05.png"])
+
+    def test_candidates_scored_together(self):
+        print("\nTesting Multi-Candidate Generation...")
+
+        async def candidates(prompt, theme, page_num, count, use_cache=True, run_id=None):
+            return [f"temp/test_{page_num}_c{n}.png" for n in range(count)]
+
+        async def qa(image_path, page_type=None):
+            passed = image_path.endswith("_c1.png") # Only the second candidate passes
+            return {"passed": passed, "reason": "PASS" if passed else "FAIL", "failed_criteria": []}
+
+        self.omega.charlie.generate_candidates_async = AsyncMock(side_effect=candidates)
+        self.omega.delta.review_async = AsyncMock(side_effect=qa)
+        with patch.object(config, "TARGET_PAGES_LIST", [1, 2]), \
+             patch.object(config, "CANDIDATES_PER_PAGE", 3):
+            asyncio.run(self.omega.start_job("TestTheme"))
+
+        # One generation round per page, all candidates QA-checked
+        self.assertEqual(self.omega.charlie.generate_candidates_async.call_count, 2)
+        self.assertEqual(self.omega.delta.review_async.call_count, 6)
+        self.assertEqual(self.omega.echo.assemble_pdf.call_args[0][0], ["temp/test_Cover_c1.png", "temp/test_02_c1.png"])
+        self.omega.charlie.cache_image.assert_any_call("cover_prompt", "temp/test_Cover_c1.png")
+
+    def test_manifest_keeps_the_chosen_candidate(self):
+        print("\nTesting Manifest With Several Passing Candidates...")
+        image_dir = tempfile.mkdtemp(dir=self.manifest_dir)
+
+        async def candidates(prompt, theme, page_num, count, use_cache=True, run_id=None):
+            paths = [os.path.join(image_dir, f"{page_num}_c{n}.png") for n in range(count)]
+            for path in paths:
+                open(path, "wb").close()
+            return paths
+
+        self.omega.charlie.generate_candidates_async = AsyncMock(side_effect=candidates)
+        with patch.object(config, "TARGET_PAGES_LIST", [5]), \
+             patch.object(config, "CANDIDATES_PER_PAGE", 2):
+            result = asyncio.run(self.omega.start_job("TestTheme")) # Both candidates pass
+
+        chosen = os.path.join(image_dir, "05_c0.png")
+        self.assertEqual(self.omega.echo.assemble_pdf.call_args[0][0], [chosen])
+        self.omega.charlie.cache_image.assert_called_once_with("p5", chosen)
+        manifest = JobManifest.load(result["run_id"])
+        self.assertEqual(manifest.completed_image("05"), chosen) # A resume rebuilds the same book
+        self.assertEqual([a["qa"] for a in manifest.data["pages"]["05"]["attempts"]], ["PASS", "PASS"])
+
+    def test_failed_qa_repairs_prompt(self):
+        print("\nTesting QA Feedback Loop...")
+        fail = {"passed": False, "reason": "FAIL [2]: gray shading", "failed_criteria": [2]}
+        self.omega.delta.review_async = AsyncMock(side_effect=[fail, PASS])
+        with patch.object(config, "TARGET_PAGES_LIST", [5]):
+            asyncio.run(self.omega.start_job("TestTheme"))
+
+        prompts = [call[0][0] for call in self.omega.charlie.generate_image_async.call_args_list]
+        self.assertEqual(prompts[0], "p5")
+        self.assertIn("no shading", prompts[1])                           # Repaired, not a blind retry
+        self.assertIn("--negative_prompt: shading, grayscale", prompts[1])
+        self.omega.charlie.cache_image.assert_called_once_with("p5", "temp/test_05.png")
+
+        manifest_file = [f for f in os.listdir(self.manifest_dir) if f.endswith(".json")][0]
+        attempts = JobManifest.load(manifest_file[:-len(".json")]).data["pages"]["05"]["attempts"]
+        self.assertEqual([a["qa"] for a in attempts], ["FAIL", "PASS"])
+        self.assertEqual(attempts[0]["reason"], "FAIL [2]: gray shading")
+
+    def test_cover_keeps_its_colors(self):
+        print("\nTesting Cover Repair...")
+        fail = {"passed": False, "reason": "FAIL [2, 4]: colors, gibberish title", "failed_criteria": [2, 4]}
+        self.omega.delta.review_async = AsyncMock(side_effect=[fail, PASS])
+        with patch.object(config, "TARGET_PAGES_LIST", [1]):
+            asyncio.run(self.omega.start_job("TestTheme"))
+
+        retry_prompt = self.omega.charlie.generate_image_async.call_args_list[1][0][0]
+        self.assertIn("no text", retry_prompt)    # Criterion 4 still repaired
+        self.assertNotIn("shading", retry_prompt) # Criterion 2 never turns the cover into line art
+        self.assertNotIn("line art", retry_prompt)
+
+    def test_resume_redoes_only_missing_work(self):
+        print("\nTesting Checkpoint & Resume...")
+        # First run: PDF assembly fails after every page passed QA
+        self.omega.echo.assemble_pdf = MagicMock(return_value=None)
+        image_dir = tempfile.mkdtemp(dir=self.manifest_dir)
+
+        async def generate(prompt, theme, page_num, use_cache=True, run_id=None):
+            path = os.path.join(image_dir, f"{page_num}.png")
+            open(path, "wb").close()
+            return path
+
+        self.omega.charlie.generate_image_async = AsyncMock(side_effect=generate)
+        with patch.object(config, "TARGET_PAGES_LIST", []):
+            with self.assertRaises(Exception):
+                asyncio.run(self.omega.start_job("TestTheme"))
+
+            run_id = [f[:-len(".json")] for f in os.listdir(self.manifest_dir) if f.endswith(".json")][0]
+            manifest = JobManifest.load(run_id)
+            self.assertEqual(manifest.stage, "failed")
+            self.assertEqual(self.omega.charlie.generate_image_async.call_count, 5)
+
+            # Resume: no new prompts, no new images, only the PDF step
+            self.omega.bravo.generate_prompts_async.reset_mock()
+            self.omega.charlie.generate_image_async.reset_mock()
+            self.omega.delta.review_async.reset_mock()
+            self.omega.echo.assemble_pdf = MagicMock(return_value="temp/test_output.pdf")
+            result = asyncio.run(self.omega.start_job(None, resume_run_id=run_id))
+
+        self.assertEqual(result["run_id"], run_id)
+        self.omega.bravo.generate_prompts_async.assert_not_called()
+        self.omega.charlie.generate_image_async.assert_not_called()
+        self.omega.delta.review_async.assert_not_called()
+        self.assertEqual(len(self.omega.echo.assemble_pdf.call_args[0][0]), 5)
+        self.assertEqual(JobManifest.load(run_id).stage, "completed")
+
+    def test_resume_is_owner_only(self):
+        print("\nTesting Resume Ownership...")
+        for run_id in ("../../secrets", "AB12CD34", "ab12cd3", "ab12cd34/.."):
+            with self.assertRaises(ValueError):
+                JobManifest.load(run_id)
+
+        self.omega.echo.assemble_pdf = MagicMock(return_value=None) # Fail so there is something to resume
+        with patch.object(config, "TARGET_PAGES_LIST", [5]):
+            with self.assertRaises(Exception):
+                asyncio.run(self.omega.start_job("TestTheme", user_id=42))
+            run_id = [f[:-len(".json")] for f in os.listdir(self.manifest_dir) if f.endswith(".json")][0]
+            self.assertEqual(JobManifest.load(run_id).user_id, 42)
+
+            with self.assertRaises(PermissionError):
+                asyncio.run(self.omega.start_job(None, resume_run_id=run_id, user_id=7))
+        self.assertEqual(JobManifest.load(run_id).stage, "failed") # Untouched by the refused resume
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+import os
+import sys
+from unittest.mock import patch
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.modules.prompt_cache import PromptCache
+
+class TestPromptCache(unittest.TestCase):
+    def test_lru_bound(self):
+        print("\nTesting Prompt Cache LRU...")
+        cache = PromptCache(ttl=60, max_entries=2, enabled=True)
+        cache.put("a", "A")
+        cache.put("b", "B")
+        cache.get("a") # a is now most recently used
+        cache.put("c", "C")
+        self.assertEqual(cache.get("a"), "A")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), "C")
+
+    def test_ttl_expiry(self):
+        print("\nTesting Prompt Cache TTL...")
+        cache = PromptCache(ttl=10, max_entries=10, enabled=True)
+        with patch("src.modules.prompt_cache.time.monotonic", return_value=100.0):
+            cache.put("a", "A")
+        with patch("src.modules.prompt_cache.time.monotonic", return_value=105.0):
+            self.assertEqual(cache.get("a"), "A")
+        with patch("src.modules.prompt_cache.time.monotonic", return_value=111.0):
+            self.assertIsNone(cache.get("a"))
+
+    def test_key_covers_inputs(self):
+        cache = PromptCache(enabled=True)
+        base = cache.make_key("Firefighter", "action", "spec", "dna")
+        self.assertEqual(base, cache.make_key("Firefighter", "action", "spec", "dna"))
+        self.assertNotEqual(base, cache.make_key("Firefighter", "action", "spec v2", "dna"))
+        self.assertNotEqual(base, cache.make_key("Firefighter", "action", "spec", "dna v2"))
+        self.assertNotEqual(base, cache.make_key("Astronaut", "action", "spec", "dna"))
+
+if __name__ == '__main__':
+    unittest.main()
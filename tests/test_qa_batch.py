@@ -0,0 +1,112 @@
+import unittest
+import asyncio
+import json
+import os
+import sys
+import shutil
+import tempfile
+from unittest.mock import MagicMock, AsyncMock, patch
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from PIL import Image
+from src import config
+from src.modules.qa_agent import AgentDelta, validate_batch_verdicts
+from src.modules.qa_cache import QAVerdictCache
+
+class TestBatchedQA(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        # Batching on the QA_MODEL_NAME tier alone (the cascade has its own tests)
+        self.cascade_patch = patch.object(config, "QA_CASCADE_ENABLED", False)
+        self.cascade_patch.start()
+
+    def tearDown(self):
+        self.cascade_patch.stop()
+        shutil.rmtree(self.tmp)
+
+    def test_validate_batch_verdicts(self):
+        print("\nTesting Batched QA Reply Validation...")
+        reply = json.dumps({"images": [
+            {"image": 1, "verdict": "PASS", "reason": ""},
+            {"image": 2, "verdict": "FAIL", "reason": "gray shading"},
+            {"image": 3, "verdict": "MAYBE"},                  # Unknown verdict
+            {"image": 4, "verdict": "PASS"},
+            {"image": 4, "verdict": "FAIL", "reason": "text"}, # Judged twice
+            {"image": 9, "verdict": "PASS"},                   # Out of range
+        ]})
+        verdicts = validate_batch_verdicts(f"```json\n{reply}\n```", 5)
+        self.assertEqual(verdicts, {
+            1: {"passed": True, "reason": "PASS", "failed_criteria": []},
+            2: {"passed": False, "reason": "FAIL: gray shading", "failed_criteria": [2]}, # Inferred from the reason
+        })
+        with self.assertRaises(ValueError):
+            validate_batch_verdicts('["PASS", "FAIL"]', 2)
+
+    def test_one_request_for_concurrent_checks(self):
+        print("\nTesting Batched QA Requests...")
+        paths = []
+        for index in range(3):
+            path = os.path.join(self.tmp, f"page_{index}.png")
+            Image.new("RGB", (64, 64), (255, 255, index)).save(path) # Distinct bytes per page
+            paths.append(path)
+
+        delta = AgentDelta()
+        delta.qa_cache = QAVerdictCache(path=os.path.join(self.tmp, "qa.json"), enabled=False)
+        batch_reply = json.dumps({"images": [
+            {"image": 1, "verdict": "PASS", "reason": ""},
+            {"image": 2, "verdict": "FAIL", "failed_criteria": [1, 2], "reason": "colors"},
+        ]}) # Image 3 missing -> single-image fallback
+        delta._generate_async = AsyncMock(side_effect=[
+            MagicMock(text=batch_reply),
+            MagicMock(text="FAIL: broken lines"),
+        ])
+
+        async def check_all():
+            return await asyncio.gather(*(delta.review_async(path) for path in paths))
+
+        with patch.object(config, "PRECHECK_ENABLED", False), \
+             patch.object(config, "QA_BATCH_SIZE", 3):
+            verdicts = asyncio.run(check_all())
+
+        self.assertEqual([verdict["passed"] for verdict in verdicts], [True, False, False])
+        self.assertEqual(verdicts[1]["failed_criteria"], [1, 2])
+        self.assertEqual(verdicts[2]["failed_criteria"], [3]) # "broken lines"
+        self.assertEqual(delta._generate_async.call_count, 2) # 3 images: 1 batch + 1 fallback
+        batch_contents = delta._generate_async.call_args_list[0][0][0]
+        self.assertIn("3 images", batch_contents[0])
+        self.assertEqual(batch_contents[1::2], ["IMAGE 1:", "IMAGE 2:", "IMAGE 3:"])
+        fallback_contents = delta._generate_async.call_args_list[1][0][0]
+        self.assertEqual(fallback_contents[0], AgentDelta.QA_PROMPT)
+
+    def test_garbled_batch_reply_falls_back(self):
+        print("\nTesting Batched QA Fallback...")
+        paths = []
+        for index in range(2):
+            path = os.path.join(self.tmp, f"page_{index}.png")
+            Image.new("RGB", (64, 64), (255, index, 255)).save(path)
+            paths.append(path)
+
+        delta = AgentDelta()
+        delta.qa_cache = QAVerdictCache(path=os.path.join(self.tmp, "qa.json"), enabled=False)
+        delta._generate_async = AsyncMock(side_effect=[
+            MagicMock(text="Both look fine to me."),
+            MagicMock(text="PASS"),
+            MagicMock(text="PASS"),
+        ])
+
+        async def check_all():
+            return await asyncio.gather(*(delta.quality_check_async(path) for path in paths))
+
+        # A lone check still goes out once the batch window closes
+        with patch.object(config, "PRECHECK_ENABLED", False), \
+             patch.object(config, "QA_BATCH_SIZE", 4), \
+             patch.object(config, "QA_BATCH_WINDOW_SEC", 0.05):
+            verdicts = asyncio.run(check_all())
+
+        self.assertEqual(verdicts, [True, True])
+        self.assertEqual(delta._generate_async.call_count, 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+import asyncio
+import os
+import sys
+import shutil
+import tempfile
+from unittest.mock import MagicMock, AsyncMock, patch
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from PIL import Image, ImageDraw
+from src import config
+from src.modules.qa_cache import QAVerdictCache, prompt_version
+from src.modules.qa_agent import AgentDelta
+
+class TestQACache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.cache_path = os.path.join(self.tmp, "qa_verdicts.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_key_and_persistence(self):
+        print("\nTesting QA Verdict Cache Keys...")
+        cache = QAVerdictCache(self.cache_path, enabled=True, max_entries=2)
+        key = cache.make_key(b"image", "v1")
+        cache.put(key, {"passed": False, "reason": "FAIL [2]: gray shading", "failed_criteria": [2]})
+
+        # Survives a restart
+        self.assertEqual(QAVerdictCache(self.cache_path, enabled=True).get(key),
+                         {"passed": False, "reason": "FAIL [2]: gray shading", "failed_criteria": [2]})
+
+        # Other image, prompt version or model -> other key
+        self.assertNotEqual(key, cache.make_key(b"image2", "v1"))
+        self.assertNotEqual(key, cache.make_key(b"image", "v2"))
+        self.assertNotEqual(key, cache.make_key(b"image", "v1", model="models/other"))
+        self.assertNotEqual(prompt_version("A"), prompt_version("B"))
+        self.assertNotEqual(prompt_version("A", "B"), prompt_version("A", "C")) # Single and batched prompt
+
+        # Bounded: the oldest verdict goes first
+        cache.put(cache.make_key(b"b", "v1"), {"passed": True, "reason": "PASS"})
+        cache.put(cache.make_key(b"c", "v1"), {"passed": True, "reason": "PASS"})
+        self.assertIsNone(cache.get(key))
+
+    def test_delta_judges_once(self):
+        print("\nTesting Delta Verdict Reuse...")
+        image_path = os.path.join(self.tmp, "page.png")
+        img = Image.new("RGB", (256, 256), "white")
+        ImageDraw.Draw(img).ellipse([40, 40, 200, 200], outline="black", width=4)
+        img.save(image_path)
+
+        delta = AgentDelta()
+        delta.qa_cache = QAVerdictCache(self.cache_path, enabled=True)
+        delta._generate_async = AsyncMock(return_value=MagicMock(text="PASS"))
+        delta._generate = MagicMock(return_value=MagicMock(text="PASS"))
+
+        with patch.object(config, "QA_CASCADE_ENABLED", False):
+            self.assertTrue(asyncio.run(delta.quality_check_async(image_path)))
+            self.assertTrue(asyncio.run(delta.quality_check_async(image_path))) # e.g. a resumed run
+            self.assertTrue(delta.quality_check(image_path))                     # e.g. a debug script
+            self.assertEqual(delta._generate_async.call_count, 1)
+            delta._generate.assert_not_called()
+
+            # A new QA prompt invalidates the verdict
+            delta.prompt_version = prompt_version("stricter prompt")
+            self.assertTrue(asyncio.run(delta.quality_check_async(image_path)))
+            self.assertEqual(delta._generate_async.call_count, 2)
+
+    def test_versions_cover_every_verdict_input(self):
+        print("\nTesting QA Cache Versioning...")
+        delta = AgentDelta()
+        # Editing the batched prompt alone invalidates the verdicts too
+        with patch.object(AgentDelta, "QA_BATCH_PROMPT", "Judge the {count} images."):
+            self.assertNotEqual(AgentDelta().prompt_version, delta.prompt_version)
+
+        with patch.object(config, "QA_CASCADE_ENABLED", True):
+            source = delta._verdict_source()
+            with patch.object(config, "QA_FAST_PASS_CONFIDENCE", 0.5):
+                self.assertNotEqual(delta._verdict_source(), source)
+            with patch.object(config, "PRECHECK_MAX_GRAY_RATIO", 0.5):
+                self.assertNotEqual(delta._verdict_source(), source)
+        with patch.object(config, "QA_CASCADE_ENABLED", False):
+            self.assertEqual(delta._verdict_source(), config.QA_MODEL_NAME)
+
+if __name__ == '__main__':
+    unittest.main()
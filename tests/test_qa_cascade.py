@@ -0,0 +1,130 @@
+import unittest
+import asyncio
+import json
+import os
+import sys
+import shutil
+import tempfile
+from unittest.mock import MagicMock, patch
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from PIL import Image, ImageDraw
+from src import config
+from src.modules.qa_agent import AgentDelta, local_opinion, escalation_reason, for_page_type
+from src.modules.qa_cache import QAVerdictCache
+
+def fast_reply(verdict, confidence, criteria=(), reason=""):
+    return MagicMock(text=json.dumps({"images": [
+        {"image": 1, "verdict": verdict, "failed_criteria": list(criteria), "reason": reason, "confidence": confidence}
+    ]}))
+
+class TestQACascade(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def _image(self, name, lines=0):
+        img = Image.new("RGB", (1024, 1024), "white")
+        canvas = ImageDraw.Draw(img)
+        for offset in range(100, 900, 80):
+            canvas.ellipse([offset, offset // 2, offset + 120, offset // 2 + 200], outline="black", width=6)
+        for offset in range(100, 100 + 80 * lines, 80):
+            canvas.line([100, offset, 900, offset + 40], fill="black", width=5)
+        path = os.path.join(self.tmp, f"{name}.png")
+        img.resize((512, 512), Image.LANCZOS).save(path)
+        return path
+
+    def test_escalation_rules(self):
+        print("\nTesting QA Cascade Escalation Rules...")
+        clean = {"color_ratio": 0.0, "gray_ratio": 0.02, "ink": 0.05}
+        borderline = {"color_ratio": 0.0, "gray_ratio": 0.15, "ink": 0.05}
+        self.assertEqual(local_opinion(clean), "clean")
+        self.assertEqual(local_opinion(borderline), "borderline")
+        self.assertIsNone(local_opinion(borderline, "cover")) # Covers are full color
+        self.assertIsNone(local_opinion(None))
+
+        sure_pass = {"passed": True, "failed_criteria": [], "confidence": 0.95}
+        sure_gray_fail = {"passed": False, "failed_criteria": [2], "confidence": 0.95}
+        sure_text_fail = {"passed": False, "failed_criteria": [4], "confidence": 0.95}
+        self.assertIsNone(escalation_reason(sure_pass, "clean"))
+        self.assertIsNone(escalation_reason(sure_text_fail, "clean"))   # Local metrics can't see text
+        self.assertEqual(escalation_reason(None, "clean"), "fast_unclear")
+        self.assertEqual(escalation_reason(sure_pass, "borderline"), "disagreement")
+        self.assertEqual(escalation_reason(sure_gray_fail, "clean"), "disagreement")
+        self.assertEqual(escalation_reason({**sure_pass, "confidence": 0.85}, None), "low_confidence")
+        self.assertIsNone(escalation_reason({**sure_text_fail, "confidence": 0.85}, None)) # FAIL threshold is lower
+        self.assertEqual(escalation_reason({"passed": True, "failed_criteria": []}, None), "low_confidence")
+
+    def test_cover_color_criteria_ignored(self):
+        print("\nTesting Cover QA Criteria...")
+        colored = {"passed": False, "reason": "FAIL [1, 2]: full color", "failed_criteria": [1, 2]}
+        self.assertTrue(for_page_type(colored, "cover")["passed"])
+        self.assertFalse(for_page_type(colored, "knolling")["passed"])
+        garbled = {"passed": False, "reason": "FAIL [2, 4]: gibberish title", "failed_criteria": [2, 4]}
+        self.assertEqual(for_page_type(garbled, "cover")["failed_criteria"], [4])
+        self.assertFalse(for_page_type(garbled, "cover")["passed"])
+
+        delta = AgentDelta()
+        delta.qa_cache = QAVerdictCache(path=os.path.join(self.tmp, "qa.json"), enabled=False)
+        delta._generate = MagicMock(return_value=MagicMock(text="FAIL [2]: colored background"))
+        with patch.object(config, "QA_CASCADE_ENABLED", False):
+            self.assertTrue(delta.quality_check(self._image("cover", lines=10), "cover"))
+            self.assertFalse(delta.quality_check(self._image("page", lines=10), "knolling"))
+
+    def test_stages_and_hit_rates(self):
+        print("\nTesting QA Cascade Stages...")
+        delta = AgentDelta()
+        delta.qa_cache = QAVerdictCache(path=os.path.join(self.tmp, "qa.json"), enabled=True)
+        replies = {
+            config.QA_FAST_MODEL_NAME: [fast_reply("PASS", 0.97), fast_reply("PASS", 0.4)],
+            config.QA_MODEL_NAME: [MagicMock(text="FAIL [3]: broken lines")],
+        }
+        calls = []
+
+        async def generate(contents, tokens=None, generation_config=None, model_name=None):
+            model_name = model_name or config.QA_MODEL_NAME
+            calls.append(model_name)
+            return replies[model_name].pop(0)
+
+        delta._generate_async = generate
+        sure, unsure = self._image("sure", lines=10), self._image("unsure", lines=9)
+        blank = os.path.join(self.tmp, "blank.png")
+        Image.new("RGB", (512, 512), "white").save(blank)
+
+        with patch.object(config, "QA_CASCADE_ENABLED", True), \
+             patch.object(config, "QA_BATCH_SIZE", 1):
+            self.assertFalse(asyncio.run(delta.review_async(blank))["passed"])  # local
+            self.assertTrue(asyncio.run(delta.review_async(sure))["passed"])    # fast, confident
+            verdict = asyncio.run(delta.review_async(unsure))                    # fast unsure -> pro
+            self.assertFalse(verdict["passed"])
+            self.assertEqual(verdict["failed_criteria"], [3])
+            self.assertTrue(asyncio.run(delta.review_async(sure))["passed"])    # cache
+
+        self.assertEqual(calls, [config.QA_FAST_MODEL_NAME, config.QA_FAST_MODEL_NAME, config.QA_MODEL_NAME])
+        status = delta.cascade_status()
+        self.assertEqual(status["checks"], 4)
+        self.assertEqual({stage: entry["decided"] for stage, entry in status["stages"].items()},
+                         {"local": 1, "cache": 1, "fast": 1, "pro": 1})
+        self.assertEqual(status["stages"]["fast"]["rate"], 0.25)
+        self.assertEqual(status["escalations"]["low_confidence"], 1)
+
+    def test_sync_review_escalates_unclear_reply(self):
+        print("\nTesting QA Cascade (sync)...")
+        delta = AgentDelta()
+        delta.qa_cache = QAVerdictCache(path=os.path.join(self.tmp, "qa.json"), enabled=False)
+        delta._generate = MagicMock(side_effect=[MagicMock(text="Looks fine!"), MagicMock(text="PASS")])
+
+        with patch.object(config, "QA_CASCADE_ENABLED", True):
+            self.assertTrue(delta.quality_check(self._image("page", lines=10), "knolling"))
+
+        self.assertEqual(delta._generate.call_args_list[0][0][3], config.QA_FAST_MODEL_NAME)
+        self.assertEqual(delta._generate.call_args_list[1][0][0][0], AgentDelta.QA_PROMPT)
+        self.assertEqual(delta.cascade_status()["escalations"]["fast_unclear"], 1)
+        self.assertEqual(delta.cascade_status()["stages"]["pro"]["decided"], 1)
+
+if __name__ == '__main__':
+    unittest.main()
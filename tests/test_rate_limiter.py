@@ -0,0 +1,64 @@
+import unittest
+import asyncio
+import os
+import sys
+import time
+from unittest.mock import patch
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src import config
+from src.modules import rate_limiter
+from src.modules.rate_limiter import RateLimiter, TokenBucket, get_limiter
+
+class TestRateLimiter(unittest.TestCase):
+    def test_burst_is_free(self):
+        print("\nTesting Burst Capacity...")
+        bucket = TokenBucket(rate_per_sec=1.0, capacity=3)
+        self.assertEqual([bucket.reserve() for _ in range(3)], [0.0, 0.0, 0.0])
+        # Fourth request has to wait about one refill interval
+        self.assertAlmostEqual(bucket.reserve(), 1.0, delta=0.05)
+
+    def test_waiters_queue_up(self):
+        print("\nTesting Reservation Ordering...")
+        bucket = TokenBucket(rate_per_sec=2.0, capacity=1)
+        bucket.reserve()
+        waits = [bucket.reserve() for _ in range(3)]
+        for expected, actual in zip([0.5, 1.0, 1.5], waits):
+            self.assertAlmostEqual(actual, expected, delta=0.05)
+
+    def test_tpm_budget(self):
+        print("\nTesting TPM Budget...")
+        limiter = RateLimiter("test-model", rpm=6000, tpm=600, burst=10)
+        self.assertEqual(limiter._reserve(600), 0.0)
+        # Budget exhausted: 60 tokens refill in ~6s (10 tokens/s)
+        self.assertAlmostEqual(limiter._reserve(60), 6.0, delta=0.1)
+
+    def test_async_acquire_paces_calls(self):
+        print("\nTesting Async Pacing...")
+        limiter = RateLimiter("test-model", rpm=600, burst=1) # 1 request every 0.1s
+
+        async def run():
+            start = time.monotonic()
+            await asyncio.gather(*(limiter.acquire_async() for _ in range(4)))
+            return time.monotonic() - start
+
+        elapsed = asyncio.run(run())
+        self.assertGreaterEqual(elapsed, 0.25)
+        self.assertLess(elapsed, 1.0)
+
+    def test_registry_shares_limiter_per_model(self):
+        print("\nTesting Process-Wide Registry...")
+        with patch.dict(rate_limiter._limiters, clear=True), \
+             patch.dict(config.RATE_LIMITS, {"model-a": {"rpm": 30, "burst": 2}}):
+            a1 = get_limiter("model-a")
+            a2 = get_limiter("model-a")
+            other = get_limiter("model-unknown")
+            self.assertIs(a1, a2)
+            self.assertIsNot(a1, other)
+            self.assertEqual(a1.requests.capacity, 2)
+            self.assertAlmostEqual(a1.requests.rate, 0.5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+import base64
+import io
+import os
+import sys
+import shutil
+import tempfile
+from unittest.mock import patch
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from PIL import Image
+from src.modules.reference_registry import ReferenceRegistry, resample_filter
+
+class TestReferenceRegistry(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, "ref_page4_layout_wireframe_kdp.png")
+        Image.new("RGB", (2000, 1000), "white").save(self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_downscaled_once(self):
+        print("\nTesting Reference Preprocessing...")
+        registry = ReferenceRegistry(max_side=512, max_bytes=10 * 1024 * 1024)
+        part = registry.part(self.path)
+        with Image.open(io.BytesIO(part["data"])) as img:
+            self.assertEqual(img.size, (512, 256))
+        self.assertEqual(base64.b64decode(registry.base64(self.path)), part["data"])
+
+        # Served from memory afterwards
+        with patch("builtins.open") as mock_open:
+            registry.part(self.path)
+            registry.digest(self.path)
+            mock_open.assert_not_called()
+
+        self.assertIsNone(registry.part(os.path.join(self.tmp, "missing.png")))
+
+    def test_wireframes_keep_their_colors(self):
+        print("\nTesting Reference Resampling...")
+        self.assertEqual(resample_filter("assets/ref_page5_structure_example.png"), Image.NEAREST)
+        self.assertEqual(resample_filter("assets/ref_cover_01.png"), Image.LANCZOS)
+
+        # Zones and 1px outlines: no blended colors after downscaling
+        img = Image.new("RGB", (2000, 1000), "white")
+        img.paste((255, 0, 0), (0, 0, 1000, 1000))
+        for x in range(0, 2000, 4):
+            img.paste((0, 0, 0), (x, 0, x + 1, 1000))
+        img.save(self.path)
+        registry = ReferenceRegistry(max_side=512, max_bytes=10 * 1024 * 1024)
+        with Image.open(io.BytesIO(registry.part(self.path)["data"])) as processed:
+            colors = {color for _, color in processed.convert("RGB").getcolors(1 << 16)}
+        self.assertTrue(colors <= {(255, 255, 255), (255, 0, 0), (0, 0, 0)}, colors)
+
+    def test_reload_on_change(self):
+        print("\nTesting Reference Reload...")
+        registry = ReferenceRegistry(max_side=512, max_bytes=10 * 1024 * 1024)
+        digest = registry.digest(self.path)
+        Image.new("RGB", (100, 100), "black").save(self.path)
+        os.utime(self.path, (0, 12345))
+        self.assertNotEqual(registry.digest(self.path), digest)
+
+    def test_size_cap(self):
+        print("\nTesting Reference Registry Size Cap...")
+        paths = []
+        for i in range(3):
+            path = os.path.join(self.tmp, f"ref_{i}.png")
+            Image.effect_noise((64, 64), 50 + i).save(path)
+            paths.append(path)
+        registry = ReferenceRegistry(max_side=512, max_bytes=1)
+        for path in paths:
+            registry.part(path)
+        # Only the most recently used entry survives a tiny budget
+        self.assertEqual(list(registry.entries), [paths[-1]])
+
+if __name__ == '__main__':
+    unittest.main()
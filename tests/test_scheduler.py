@@ -0,0 +1,95 @@
+import unittest
+import asyncio
+import os
+import sys
+from unittest.mock import patch
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src import config
+from src.modules.scheduler import JobScheduler, QueueFullError, PRIORITY_HIGH
+
+class FakeOrchestrator:
+    def __init__(self):
+        self.started = []
+
+    async def start_job(self, theme, progress_callback=None, page_slots=None, resume_run_id=None, bible_version=None,
+                        user_id=None):
+        self.started.append(theme)
+        await asyncio.sleep(0.01)
+        return {"status": "SUCCESS", "theme": theme}
+
+class TestScheduler(unittest.TestCase):
+    def setUp(self):
+        self.patches = [
+            patch.object(config, "MAX_CONCURRENT_JOBS", 1),
+            patch.object(config, "JOB_QUEUE_MAX", 5),
+            patch.object(config, "JOB_QUEUE_PER_USER_MAX", 3),
+        ]
+        for p in self.patches:
+            p.start()
+        self.omega = FakeOrchestrator()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+
+    def test_round_robin_between_users(self):
+        print("\nTesting Per-User Fairness...")
+
+        async def run():
+            scheduler = JobScheduler(self.omega)
+            jobs = [scheduler.submit("alice", f"A{i}") for i in range(3)]
+            jobs.append(scheduler.submit("bob", "B0"))
+            return await asyncio.gather(*jobs)
+
+        results = asyncio.run(run())
+        self.assertEqual([r["theme"] for r in results], ["A0", "A1", "A2", "B0"])
+        # Bob is interleaved with Alice's backlog instead of waiting behind all of it
+        self.assertEqual(self.omega.started, ["A0", "A1", "B0", "A2"])
+
+    def test_priority_jumps_the_queue(self):
+        print("\nTesting Priorities...")
+
+        async def run():
+            scheduler = JobScheduler(self.omega)
+            jobs = [scheduler.submit(f"user{i}", f"N{i}") for i in range(3)]
+            jobs.append(scheduler.submit("vip", "VIP", priority=PRIORITY_HIGH))
+            await asyncio.gather(*jobs)
+
+        asyncio.run(run())
+        self.assertEqual(self.omega.started, ["N0", "VIP", "N1", "N2"])
+
+    def test_admission_control(self):
+        print("\nTesting Admission Control...")
+
+        async def run():
+            scheduler = JobScheduler(self.omega)
+            jobs = [asyncio.ensure_future(scheduler.submit("alice", f"A{i}")) for i in range(3)]
+            await asyncio.sleep(0)
+            with self.assertRaises(QueueFullError):
+                await scheduler.submit("alice", "A3")
+            await asyncio.gather(*jobs)
+
+        asyncio.run(run())
+
+    def test_position_reporting(self):
+        print("\nTesting Queue Position Reporting...")
+        positions = []
+
+        async def report(position):
+            positions.append(position)
+
+        async def run():
+            scheduler = JobScheduler(self.omega)
+            first = scheduler.submit("alice", "A0")
+            second = scheduler.submit("bob", "B0")
+            third = scheduler.submit("carol", "C0", position_callback=report)
+            await asyncio.gather(first, second, third)
+
+        asyncio.run(run())
+        self.assertEqual(positions, [2, 1])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,12 +1,16 @@
 import unittest
+import asyncio
 import os
 import sys
-from unittest.mock import MagicMock, patch
+import threading
+from unittest.mock import MagicMock, AsyncMock, patch
 
 # Add src to path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from src.modules.prompt_generator import AgentBravo
+from src import config
+from src.modules.prompt_generator import AgentBravo, validate_book_plan
+from src.modules.adaptive_control import AdaptiveController
 
 class TestSmartPrompts(unittest.TestCase):
     def setUp(self):
@@ -16,7 +20,9 @@ class TestSmartPrompts(unittest.TestCase):
         self.bravo.vision_model.generate_content.return_value.text = "Mocked Prompt"
         
         # Mock rate limit to speed up tests
-        self.bravo._rate_limit = MagicMock()
+        self.bravo.limiter = MagicMock()
+        # Every test talks to the (mocked) model
+        self.bravo.prompt_cache.clear()
 
     def test_bible_spec_extraction(self):
         print("\nTesting Bible Spec Extraction...")
@@ -72,5 +78,164 @@ class TestSmartPrompts(unittest.TestCase):
                 
                 print("Verified 'Full Color' instruction for cover.")
 
+    def test_prompt_memoization(self):
+        print("\nTesting Smart Prompt Memoization...")
+        first = self.bravo._generate_smart_prompt("action", "Test", "Context")
+        second = self.bravo._generate_smart_prompt("action", "Test", "Context")
+        self.assertEqual(first, second)
+        self.assertEqual(self.bravo.vision_model.generate_content.call_count, 1)
+
+        # A different spec (or DNA) is a different prompt
+        self.bravo._generate_smart_prompt("action", "Test", "Other Context")
+        self.bravo.style_library["dna_cover"] = "New DNA"
+        self.bravo._generate_smart_prompt("action", "Test", "Context")
+        self.assertEqual(self.bravo.vision_model.generate_content.call_count, 3)
+
+        # Force fresh always asks the model
+        self.bravo._generate_smart_prompt("action", "Test", "Context", force_fresh=True)
+        self.assertEqual(self.bravo.vision_model.generate_content.call_count, 4)
+        print("Identical prompts were served from the cache.")
+
+    def test_target_aware_generation(self):
+        print("\nTesting Target-Aware Prompt Generation...")
+        self.bravo.analyze_assets = MagicMock()
+        self.bravo._generate_smart_prompt = MagicMock(return_value="Smart Prompt")
+        self.bravo._extract_bible_specs = MagicMock(return_value="")
+
+        # Certificate only: one smart prompt, only the DNA it falls back to
+        result = self.bravo.generate_prompts("Test", pages=[50])
+        self.assertEqual([p["page_number"] for p in result["prompts"]], [50])
+        self.assertEqual(self.bravo._generate_smart_prompt.call_count, 1)
+        self.bravo.analyze_assets.assert_called_once_with(["cover"])
+
+        # Cover only: no interior prompts, Cover DNA still prepared for generate_cover
+        self.bravo._generate_smart_prompt.reset_mock()
+        result = self.bravo.generate_prompts("Test", pages=[1])
+        self.assertEqual(result["prompts"], [])
+        self.bravo._generate_smart_prompt.assert_not_called()
+        self.bravo.analyze_assets.assert_called_with(["cover"])
+
+        # Full book keeps every interior page
+        result = self.bravo.generate_prompts("Test")
+        self.assertEqual([p["page_number"] for p in result["prompts"]], [2, 3, 4, 5, 6, 50])
+        print("Only targeted pages were generated.")
+
+    def test_parallel_fan_out(self):
+        print("\nTesting Parallel Smart Prompt Fan-Out...")
+        self.bravo.analyze_assets = MagicMock()
+        self.bravo._extract_bible_specs = MagicMock(return_value="")
+        self.bravo.limiter.acquire_async = AsyncMock()
+        self.bravo.controller = AdaptiveController("test-model", MagicMock(), initial=8, minimum=1, maximum=8)
+
+        in_flight = 0
+        max_in_flight = 0
+
+        async def slow_generate(inputs):
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0.05)
+            in_flight -= 1
+            response = MagicMock()
+            response.text = "Prompt for " + inputs[0].split("CONTEXT (BIBLE SPECS): ")[1].split("\n")[0]
+            return response
+
+        self.bravo.vision_model.generate_content_async = AsyncMock(side_effect=slow_generate)
+        result = asyncio.run(self.bravo.generate_prompts_async("Test"))
+
+        # Cover + 6 interior pages, all in flight together, gathered in book order
+        self.assertEqual(max_in_flight, 7)
+        self.assertEqual([p["page_number"] for p in result["prompts"]], [1, 2, 3, 4, 5, 6, 50])
+        self.assertIn("Certificate of completion", result["prompts"][-1]["prompt"])
+        self.assertEqual(result["main_character"], "Heroic Test")
+        print("All smart prompts were dispatched concurrently.")
+
+    def test_book_plan_mode(self):
+        print("\nTesting Single-Call Book Plan...")
+        self.bravo.analyze_assets = MagicMock()
+        self.bravo._extract_bible_specs = MagicMock(return_value="")
+        self.bravo.limiter.acquire_async = AsyncMock()
+        self.bravo.controller = AdaptiveController("test-model", MagicMock(), initial=8, minimum=1, maximum=8)
+
+        plan_reply = MagicMock()
+        plan_reply.text = (
+            '{"pages": ['
+            + ", ".join(f'{{"page_number": {n}, "prompt": "Planned {n}"}}' for n in [1, 2, 3, 4, 5, 6])
+            + ', {"page_number": 50, "prompt": ""}]}' # Invalid entry -> per-page fallback
+        )
+        page_reply = MagicMock()
+        page_reply.text = "Single page prompt"
+
+        async def generate(inputs, generation_config=None):
+            return plan_reply if generation_config else page_reply
+
+        self.bravo.vision_model.generate_content_async = AsyncMock(side_effect=generate)
+        with patch.object(config, "PROMPT_PLANNING_MODE", "book"):
+            result = asyncio.run(self.bravo.generate_prompts_async("Test"))
+
+        # One plan call + one fallback call instead of seven
+        self.assertEqual(self.bravo.vision_model.generate_content_async.call_count, 2)
+        prompts = {p["page_number"]: p["prompt"] for p in result["prompts"]}
+        self.assertTrue(prompts[5].startswith("Planned 5 --negative_prompt:"))
+        self.assertIn("perspective, angled view", prompts[5]) # Knolling Negative DNA
+        self.assertTrue(prompts[50].startswith("Single page prompt"))
+        print("Book planned in one call with per-page fallback.")
+
+    def test_file_work_off_event_loop(self):
+        print("\nTesting Smart Prompt File Work Off the Event Loop...")
+        self.bravo.analyze_assets = MagicMock()
+        self.bravo.limiter.acquire_async = AsyncMock()
+        self.bravo.controller = AdaptiveController("test-model", MagicMock(), initial=8, minimum=1, maximum=8)
+        self.bravo.vision_model.generate_content_async = AsyncMock(return_value=MagicMock(text="Async Prompt"))
+        threads = []
+        extract, part = self.bravo._extract_bible_specs, self.bravo.references.part
+
+        def record(blocking):
+            def call(*args):
+                threads.append(threading.current_thread())
+                return blocking(*args)
+            return call
+
+        self.bravo._extract_bible_specs = record(extract)
+        self.bravo.references.part = record(part)
+        for mode in ["page", "book"]:
+            self.bravo.prompt_cache.clear()
+            with patch.object(config, "PROMPT_PLANNING_MODE", mode):
+                asyncio.run(self.bravo.generate_prompts_async("Test"))
+
+        # Bible reads (6 pages) and reference loads (2 per page incl. Cover), in both modes
+        self.assertGreaterEqual(len(threads), 2 * (6 + 7 * 2))
+        self.assertNotIn(threading.main_thread(), threads)
+
+    def test_book_plan_validation(self):
+        plan = validate_book_plan(
+            '```json\n{"pages": [{"page_number": 2, "prompt": " A "}, {"page_number": 2, "prompt": "dup"},'
+            ' {"page_number": 99, "prompt": "x"}, {"page_number": "3", "prompt": "x"}, "junk"]}\n```',
+            {2, 3}
+        )
+        self.assertEqual(plan, {2: "A"})
+        with self.assertRaises(ValueError):
+            validate_book_plan('[{"page_number": 2}]', {2})
+        with self.assertRaises(ValueError):
+            validate_book_plan("not json", {2})
+
+    def test_repair_prompt(self):
+        print("\nTesting QA Prompt Repair...")
+        prompt = "A fox camping. --negative_prompt: text, shading"
+        verdicts = [{"passed": False, "reason": "FAIL [2, 4]: gray sky, gibberish sign", "failed_criteria": [2, 4]}]
+        repaired = self.bravo.repair_prompt(prompt, verdicts)
+
+        body, negative = repaired.split(" --negative_prompt: ")
+        self.assertTrue(body.startswith("A fox camping. QA FIX: no shading"))
+        self.assertIn("no text", body)
+        terms = negative.split(", ")
+        self.assertEqual(terms[:2], ["text", "shading"])                  # Page's Negative DNA kept first
+        self.assertIn("gradients", terms)
+        self.assertEqual(len(terms), len(set(terms)))                     # No duplicate terms
+
+        # Failing the same way again adds nothing; unknown failures keep the prompt
+        self.assertEqual(self.bravo.repair_prompt(repaired, verdicts), repaired)
+        self.assertEqual(self.bravo.repair_prompt(prompt, [{"passed": False, "failed_criteria": []}]), prompt)
+
 if __name__ == '__main__':
     unittest.main()
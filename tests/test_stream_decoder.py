@@ -0,0 +1,133 @@
+import unittest
+import asyncio
+import base64
+import json
+import os
+import sys
+import shutil
+import tempfile
+from unittest.mock import patch, MagicMock
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import httpx
+from src.modules.stream_decoder import Base64StreamDecoder
+from src.modules.image_generator import AgentCharlie
+from src.modules.image_backends import get_backend
+from src.modules.key_pool import KeyPool
+
+class TestStreamDecoder(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.images = [os.urandom(10000), os.urandom(7001)] # 7001 bytes -> base64 padding
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def _decode(self, body, fields, chunk_size):
+        decoder = Base64StreamDecoder(fields, lambda index: os.path.join(self.tmp, f"img_{index}.png"))
+        for start in range(0, len(body), chunk_size):
+            decoder.feed(body[start:start + chunk_size])
+        paths = decoder.close()
+        contents = []
+        for path in paths:
+            with open(path, "rb") as f:
+                contents.append(f.read())
+        return contents
+
+    def test_imagen_chunk_boundaries(self):
+        print("\nTesting Streamed Decode Across Chunk Boundaries...")
+        body = json.dumps({"predictions": [
+            {"mimeType": "image/png", "bytesBase64Encoded": base64.b64encode(img).decode()} for img in self.images
+        ]}, indent=2).encode()
+        # Chunk sizes that split field names, escapes and 4-char groups at every offset
+        for chunk_size in (1, 3, 7, 64, 4096, len(body)):
+            self.assertEqual(self._decode(body, ["bytesBase64Encoded"], chunk_size), self.images)
+
+    def test_gemini_escapes(self):
+        print("\nTesting Streamed Decode of Gemini inlineData...")
+        b64 = base64.b64encode(self.images[1]).decode()
+        escaped = b64.replace("/", "\\/")
+        body = ('{"candidates": [{"content": {"parts": ['
+                '{"text": "Here is \\"data\\": your image"}, '
+                '{"inlineData": {"mimeType": "image/png", "data": "' + escaped + '"}}]}}]}').encode()
+        for chunk_size in (1, 5, 1000):
+            self.assertEqual(self._decode(body, ["data"], chunk_size), [self.images[1]])
+
+    def test_truncated_and_empty(self):
+        print("\nTesting Truncated Stream...")
+        decoder = Base64StreamDecoder(["data"], lambda index: os.path.join(self.tmp, "cut.png"))
+        decoder.feed(b'{"inlineData": {"data": "iVBORw0K')
+        with self.assertRaises(ValueError):
+            decoder.close()
+        self.assertFalse(os.path.exists(os.path.join(self.tmp, "cut.png")))
+
+        decoder = Base64StreamDecoder(["data"], lambda index: os.path.join(self.tmp, "none.png"))
+        decoder.feed(b'{"error": "blocked"}')
+        self.assertEqual(decoder.close(), [])
+        self.assertIn("blocked", decoder.preview_text())
+
+    def test_charlie_streams_to_disk(self):
+        print("\nTesting Charlie Streamed Download...")
+        body = json.dumps({"predictions": [
+            {"bytesBase64Encoded": base64.b64encode(img).decode()} for img in self.images
+        ]}).encode()
+
+        def handler(request):
+            return httpx.Response(200, content=body)
+
+        async def run():
+            client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            charlie = AgentCharlie(get_backend("imagen"))
+            charlie.keys = KeyPool(["test-key"])
+            charlie.limiter = MagicMock()
+            charlie.limiter.acquire_async = MagicMock(side_effect=lambda *a: asyncio.sleep(0))
+            charlie._output_path = lambda theme, page, index=None, run_id=None: os.path.join(self.tmp, f"{page}_{index}.png")
+            with patch("src.modules.image_generator.get_async_client", return_value=client):
+                paths = await charlie.generate_candidates_async("prompt", "Theme", 4, 2, use_cache=False)
+            await client.aclose()
+            return paths
+
+        paths = asyncio.run(run())
+        self.assertEqual([os.path.basename(p) for p in paths], ["4_0.png", "4_1.png"])
+        for path, img in zip(paths, self.images):
+            with open(path, "rb") as f:
+                self.assertEqual(f.read(), img)
+
+    def test_cancelled_download_leaves_no_file(self):
+        print("\nTesting Cancelled Streamed Download...")
+        started = None
+
+        async def body():
+            # More than one STREAM_CHUNK_SIZE, so the decoder has started writing
+            yield b'{"predictions": [{"bytesBase64Encoded": "' + base64.b64encode(os.urandom(100000))[:80000]
+            started.set()
+            await asyncio.sleep(60) # Stalled mid-image
+
+        def handler(request):
+            return httpx.Response(200, content=body())
+
+        async def run():
+            nonlocal started
+            started = asyncio.Event()
+            client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            charlie = AgentCharlie(get_backend("imagen"))
+            charlie.keys = KeyPool(["test-key"])
+            charlie.limiter = MagicMock()
+            charlie.limiter.acquire_async = MagicMock(side_effect=lambda *a: asyncio.sleep(0))
+            charlie._output_path = lambda theme, page, index=None, run_id=None: os.path.join(self.tmp, f"{page}.png")
+            with patch("src.modules.image_generator.get_async_client", return_value=client):
+                task = asyncio.create_task(charlie.generate_image_async("prompt", "Theme", 4, use_cache=False))
+                await started.wait()
+                self.assertTrue(os.path.exists(os.path.join(self.tmp, "4.png"))) # Half written
+                task.cancel() # e.g. a sibling page failed the gather
+                with self.assertRaises(asyncio.CancelledError):
+                    await task
+            await client.aclose()
+
+        asyncio.run(run())
+        self.assertEqual(os.listdir(self.tmp), [])
+
+if __name__ == '__main__':
+    unittest.main()